@@ -1,29 +1,163 @@
-from flask import Flask, render_template, request, jsonify, send_file, session, redirect, url_for, flash
+from flask import Flask, Response, render_template, request, jsonify, send_file, session, redirect, url_for, flash, g
 import numpy as np
 import matplotlib
 matplotlib.use('Agg')  # Use non-interactive backend
-import matplotlib.pyplot as plt
 import io
 import base64
 import random
 import datetime
 import time
-import bcrypt
 import secrets
-from functools import wraps
-from database import FuzzyDatabase
+import os
+import json
+import hashlib
+import threading
+import atexit
+import logging
+from collections import Counter
+from auth import PasswordHasher, SessionCache, login_required
+from database import FuzzyDatabase, decode_cursor, encode_cursor
+from db_backends import backend_from_url
+from fuzzy_lut import FuzzyLUT
+from fuzzy_rules import DEFAULT_RULES_PATH, compile_rule_base, save_rule_definition
+from fuzzy_sensor import DEFAULT_SENSOR_RULES_PATH, SensorFuzzyModel
+from membership_graph import FORMAT_GAMBAR, MembershipGraphRenderer
+from history_store import HistoryStore
+from insights import generate_insights, generate_insights_batch
+from irrigation_pipeline import DatabaseReadingSource, IrrigationPipeline, klasifikasi_cuaca
+from maintenance import MaintenanceScheduler, RowArchiver, retention_task
+from metrics import CONTENT_TYPE, MetricsRegistry, hit_ratio, instrument
+from sensor_ingest import SENSOR_RANGES, DeviceRateTracker, parse_body, parse_device_keys, to_rows, validate_readings
+from sensor_stream import SensorBroadcaster
+from structured_log import configure_logging
+from write_behind import WriteBehindQueue
+from zone_state import DEFAULT_ZONE, create_zone_state
 from models import FuzzyCalculation, WeatherConditions, NeedLevels
 
+try:
+    import orjson
+except ImportError:  # Opsional: serializer JSON lebih cepat untuk respons ringkas
+    orjson = None
+
+# Log JSON per baris ke stderr (LOG_FORMAT=text untuk development, LOG_LEVEL untuk level)
+configure_logging()
+logger = logging.getLogger(__name__)
+
 app = Flask(__name__)
 
 # Configure session
-app.secret_key = secrets.token_hex(32)  # Generate a secure secret key
+# Semua worker harus memakai secret key yang sama agar session tetap valid
+# di worker mana pun; tanpa SECRET_KEY dibuat acak per proses (development)
+app.secret_key = os.environ.get('SECRET_KEY') or secrets.token_hex(32)
 app.config['SESSION_TYPE'] = 'filesystem'
 app.config['SESSION_PERMANENT'] = False
 app.config['SESSION_USE_SIGNER'] = True
 app.config['SESSION_KEY_PREFIX'] = 'fuzzy_irrigation:'
 app.config['PERMANENT_SESSION_LIFETIME'] = datetime.timedelta(hours=24)
 
+# Cost bcrypt untuk password baru; hash lama diganti otomatis saat login.
+# Validasi token session di-cache selama SESSION_CACHE_TTL detik.
+app.config['BCRYPT_ROUNDS'] = int(os.environ.get('BCRYPT_ROUNDS', 12))
+app.config['SESSION_CACHE_TTL'] = float(os.environ.get('SESSION_CACHE_TTL', 60))
+
+# Batas dpi untuk /membership_graph.png (ukuran figure tetap 12x8 inci); dpi dibulatkan
+# ke preset terdekat (DPI_PRESETS di membership_graph.py)
+app.config['GRAPH_DPI_MIN'] = 30
+app.config['GRAPH_DPI_MAX'] = 300
+
+# Batas jumlah data per request /calculate_batch
+app.config['CALCULATE_BATCH_LIMIT'] = 10000
+
+# Batas jumlah baris per halaman /api/calculations (respons di-stream per chunk)
+app.config['CALCULATIONS_LIMIT_MAX'] = 10000
+
+# Kapasitas ring buffer history perhitungan (entri tertua ditimpa jika penuh)
+app.config['HISTORY_CAPACITY'] = int(os.environ.get('HISTORY_CAPACITY', 10000))
+app.config['HISTORY_PAGE_LIMIT'] = 1000
+
+# Interval producer data sensor untuk /api/sensor-stream (detik) dan batas client SSE per
+# proses (0 = tanpa batas); setiap client menahan satu thread server selama terhubung
+app.config['SENSOR_STREAM_INTERVAL'] = float(os.environ.get('SENSOR_STREAM_INTERVAL', 3))
+app.config['SENSOR_STREAM_MAX_CLIENTS'] = int(os.environ.get('SENSOR_STREAM_MAX_CLIENTS', 0))
+
+# Ingest data sensor dari perangkat: API key per perangkat (`device_id:key`, pisahkan dengan
+# koma), batas ukuran batch, dan batas laju per perangkat (reading/detik, 0 = tanpa batas)
+app.config['INGEST_API_KEYS'] = parse_device_keys(os.environ.get('INGEST_API_KEYS', ''))
+app.config['INGEST_MAX_READINGS'] = 50000
+app.config['INGEST_MAX_BYTES'] = 8 * 1024 * 1024
+app.config['INGEST_DEVICE_RATE'] = float(os.environ.get('INGEST_DEVICE_RATE', 0))
+app.config['INGEST_DEVICE_BURST'] = float(os.environ.get('INGEST_DEVICE_BURST', 0)) or None
+
+# Pipeline evaluasi otomatis: panjang window (detik) dan toleransi selisih durasi
+# agar keputusan yang tidak berubah tidak ditulis ulang
+app.config['PIPELINE_WINDOW'] = float(os.environ.get('PIPELINE_WINDOW', 5))
+app.config['PIPELINE_DEDUP_TOLERANCE'] = float(os.environ.get('PIPELINE_DEDUP_TOLERANCE', 0.5))
+# Sumber data pipeline: 'memory' (reading /api/ingest proses ini, hanya benar untuk satu
+# proses) atau 'database' (multi-worker: satu proses pemegang PIPELINE_LOCK_PATH membaca
+# sensor_readings dan mengevaluasi semua zona)
+app.config['PIPELINE_SOURCE'] = os.environ.get('PIPELINE_SOURCE', 'memory')
+app.config['PIPELINE_LOCK_PATH'] = os.environ.get('PIPELINE_LOCK_PATH', os.path.join(app.instance_path, 'pipeline.lock'))
+# Jumlah id terakhir yang dibaca ulang setiap poll untuk reading yang commit tidak berurutan
+app.config['PIPELINE_SOURCE_LAG'] = int(os.environ.get('PIPELINE_SOURCE_LAG', 1000))
+
+# Penyimpanan state per zona: 'memory' (satu proses) atau 'sqlite:///path/state.db'
+# agar hasil terbaru sama di semua worker gunicorn
+app.config['ZONE_STATE_URL'] = os.environ.get('ZONE_STATE_URL', 'memory')
+
+# Pemeliharaan berkala (detik, 0 = nonaktif): hapus data lama per chunk dan session
+# kadaluarsa. Retensi dalam hari, default 0 = simpan selamanya (harus diaktifkan
+# eksplisit); isi ARCHIVE_DIR untuk menyimpan baris yang dihapus sebagai .jsonl.gz
+app.config['MAINTENANCE_INTERVAL'] = float(os.environ.get('MAINTENANCE_INTERVAL', 3600))
+app.config['CALCULATION_RETENTION_DAYS'] = float(os.environ.get('CALCULATION_RETENTION_DAYS', 0))
+app.config['SENSOR_RETENTION_DAYS'] = float(os.environ.get('SENSOR_RETENTION_DAYS', 0))
+app.config['MAINTENANCE_CHUNK_SIZE'] = int(os.environ.get('MAINTENANCE_CHUNK_SIZE', 1000))
+app.config['MAINTENANCE_CHUNK_PAUSE'] = float(os.environ.get('MAINTENANCE_CHUNK_PAUSE', 0.1))
+app.config['ARCHIVE_DIR'] = os.environ.get('ARCHIVE_DIR', '')
+
+# Mode lookup table: isi FUZZY_LUT_STEP (mis. 0.01) untuk prakomputasi durasi saat startup
+app.config['FUZZY_LUT_STEP'] = float(os.environ.get('FUZZY_LUT_STEP', 0)) or None
+app.config['FUZZY_LUT_TOLERANCE'] = float(os.environ.get('FUZZY_LUT_TOLERANCE', 1e-9))
+
+# Lokasi file rule base fuzzy (JSON/YAML), dapat diubah tanpa mengubah kode
+app.config['FUZZY_RULES_PATH'] = os.environ.get('FUZZY_RULES_PATH', DEFAULT_RULES_PATH)
+
+# Rule base model cuaca kontinu (curah hujan, suhu, kelembaban udara dari sensor);
+# kosongkan untuk selalu memakai label cuaca
+app.config['FUZZY_SENSOR_RULES_PATH'] = os.environ.get('FUZZY_SENSOR_RULES_PATH', DEFAULT_SENSOR_RULES_PATH)
+
+# Backend database: kosong untuk MySQL (parameter di bawah), atau 'sqlite:///path/ke/file.db'
+# untuk gateway lapangan tanpa server MySQL
+app.config['DATABASE_URL'] = os.environ.get('DATABASE_URL', '')
+
+# Token Bearer untuk /metrics (kosong = terbuka, mis. hanya dapat diakses dari jaringan internal)
+app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN', '')
+# Direktori snapshot metrik bersama untuk beberapa worker (kosong = metrik satu proses)
+app.config['METRICS_MULTIPROC_DIR'] = os.environ.get('METRICS_MULTIPROC_DIR', '')
+
+# Metrik Prometheus (latensi request, query database, inferensi fuzzy, render grafik);
+# gauge antrean dan cache dibaca dari komponen masing-masing saat /metrics di-scrape
+metrics_registry = MetricsRegistry(prefix='fuzzy_irrigation_',
+                                   multiprocess_dir=app.config['METRICS_MULTIPROC_DIR'] or None)
+# Didaftarkan pertama sehingga snapshot terakhir ditulis setelah antrean lain ditutup
+atexit.register(metrics_registry.close)
+http_request_seconds = metrics_registry.histogram(
+    'http_request_duration_seconds', 'Latensi request HTTP per endpoint', ['method', 'endpoint', 'status'])
+db_query_seconds = metrics_registry.histogram(
+    'db_query_duration_seconds', 'Durasi method FuzzyDatabase', ['method'])
+fuzzy_inference_seconds = metrics_registry.histogram(
+    'fuzzy_inference_duration_seconds', 'Durasi inferensi fuzzy Tsukamoto', ['method'],
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0))
+graph_render_seconds = metrics_registry.histogram(
+    'graph_render_duration_seconds', 'Durasi render grafik keanggotaan (termasuk cache hit)', ['method'])
+
+# Method database yang diukur durasinya (dipasang sebelum bound method dipakai write-behind)
+DB_METRIC_METHODS = [
+    'save_calculation', 'save_calculations', 'save_sensor_readings', 'rebuild_rollups',
+    'iter_calculations', 'get_all_calculations', 'get_calculations_by_weather', 'get_calculation_statistics',
+    'get_calculation_trends', 'get_recent_calculations', 'purge_rows', 'purge_calculations', 'ensure_partitions',
+    'get_user_by_username', 'create_user', 'record_logins', 'get_session_expiry', 'delete_user_session'
+]
+
 # Initialize database with MySQL configuration
 # Sesuaikan parameter koneksi MySQL sesuai dengan setup Anda
 db_manager = FuzzyDatabase(
@@ -31,507 +165,460 @@ db_manager = FuzzyDatabase(
     database="fuzzy_irrigation",  # Nama database
     user="root",          # Username MySQL
     password="",          # Password MySQL (kosongkan jika tidak ada password)
-    port=3306            # Port MySQL (default: 3306)
+    port=3306,           # Port MySQL (default: 3306)
+    pool_size=int(os.environ.get('DB_POOL_SIZE', 10)),                    # Jumlah koneksi maksimum
+    pool_timeout=float(os.environ.get('DB_POOL_TIMEOUT', 5)),             # Batas tunggu checkout (detik)
+    health_check_interval=float(os.environ.get('DB_HEALTH_CHECK_INTERVAL', 30)),  # Ping koneksi menganggur (detik)
+    statistics_ttl=float(os.environ.get('DB_STATISTICS_TTL', 60)),                # Umur cache statistik (detik)
+    partition_months_ahead=int(os.environ.get('DB_PARTITION_MONTHS_AHEAD', 3)),   # Partisi bulanan yang disiapkan
+    backend=backend_from_url(app.config['DATABASE_URL'])
 )
+instrument(db_manager, DB_METRIC_METHODS, db_query_seconds)
 
-# Password utility functions
-def hash_password(password):
-    """Hash password using bcrypt"""
-    try:
-        # Generate salt and hash password
-        salt = bcrypt.gensalt()
-        hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-        return hashed.decode('utf-8')
-    except Exception as e:
-        print(f"Error hashing password: {e}")
-        return None
+# Penyimpanan hasil /calculate secara write-behind (batch di thread latar)
+calculation_writer = WriteBehindQueue(
+    db_manager.save_calculations,
+    batch_size=int(os.environ.get('DB_WRITE_BATCH_SIZE', 100)),         # Jumlah baris per batch
+    flush_interval=float(os.environ.get('DB_WRITE_FLUSH_INTERVAL', 1)),  # Batas umur batch (detik)
+    max_queue=int(os.environ.get('DB_WRITE_QUEUE_SIZE', 10000)),         # Batas antrean di memori
+    name='calculation-writer'
+)
+# Pastikan sisa antrean ditulis saat aplikasi berhenti
+atexit.register(calculation_writer.close)
 
-def verify_password(password, hashed_password):
-    """Verify password against hash"""
-    try:
-        # Ensure both password and hash are properly encoded
-        if isinstance(password, str):
-            password = password.encode('utf-8')
-        if isinstance(hashed_password, str):
-            hashed_password = hashed_password.encode('utf-8')
-        
-        return bcrypt.checkpw(password, hashed_password)
-    except Exception as e:
-        print(f"Login error: {e}")
-        return False
+# Penyimpanan data sensor dari /api/ingest (multi-row insert di thread latar)
+sensor_writer = WriteBehindQueue(
+    db_manager.save_sensor_readings,
+    batch_size=int(os.environ.get('SENSOR_WRITE_BATCH_SIZE', 2000)),
+    flush_interval=float(os.environ.get('SENSOR_WRITE_FLUSH_INTERVAL', 1)),
+    max_queue=int(os.environ.get('SENSOR_WRITE_QUEUE_SIZE', 200000)),
+    name='sensor-writer'
+)
+atexit.register(sensor_writer.close)
+ingest_tracker = DeviceRateTracker(app.config['INGEST_DEVICE_RATE'], app.config['INGEST_DEVICE_BURST'])
 
-# Login required decorator
-def login_required(f):
-    """Decorator to require login for protected routes"""
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        if 'user_id' not in session:
-            if request.is_json:
-                return jsonify({'success': False, 'message': 'Login required'}), 401
-            return redirect(url_for('login'))
-        return f(*args, **kwargs)
-    return decorated_function
+# Autentikasi: hash password, cache validasi session, dan penulisan login per batch
+password_hasher = PasswordHasher(app.config['BCRYPT_ROUNDS'])
+session_cache = SessionCache(db_manager.get_session_expiry, ttl=app.config['SESSION_CACHE_TTL'])
+session_cache.init_app(app)
+login_writer = WriteBehindQueue(db_manager.record_logins, batch_size=200, flush_interval=0.5,
+                                name='login-writer')
+atexit.register(login_writer.close)
+
+# Retensi data dan pembersihan session di thread latar (satu worker per putaran lewat GET_LOCK)
+row_archiver = RowArchiver(app.config['ARCHIVE_DIR']) if app.config['ARCHIVE_DIR'] else None
+maintenance_scheduler = MaintenanceScheduler(
+    interval=app.config['MAINTENANCE_INTERVAL'],
+    lock=lambda: db_manager.named_lock('fuzzy_irrigation_maintenance'),
+    initial_delay=10
+)
+_chunk = (app.config['MAINTENANCE_CHUNK_SIZE'], app.config['MAINTENANCE_CHUNK_PAUSE'])
+# Siapkan partisi bulan depan lebih dulu (tidak melakukan apa pun jika tabel tidak dipartisi)
+maintenance_scheduler.add_task('partitions', lambda: len(db_manager.ensure_partitions()))
+if app.config['CALCULATION_RETENTION_DAYS'] > 0:
+    maintenance_scheduler.add_task('fuzzy_calculations', retention_task(
+        db_manager, 'fuzzy_calculations', app.config['CALCULATION_RETENTION_DAYS'], *_chunk, archive=row_archiver))
+if app.config['SENSOR_RETENTION_DAYS'] > 0:
+    maintenance_scheduler.add_task('sensor_readings', retention_task(
+        db_manager, 'sensor_readings', app.config['SENSOR_RETENTION_DAYS'], *_chunk, archive=row_archiver))
+maintenance_scheduler.add_task('user_sessions', retention_task(db_manager, 'user_sessions', 0, *_chunk))
+atexit.register(maintenance_scheduler.close)
+
+
+# Bagian hasil /calculate yang dapat dipilih dengan fields=; mode ringkas (verbose=false)
+# untuk pengendali pompa hanya mengirim durasi dan tingkat
+RESULT_FIELDS = ('kelembaban', 'cuaca', 'durasi', 'tingkat', 'rules', 'fuzzifikasi', 'insights')
+COMPACT_FIELDS = ('durasi', 'tingkat')
 
 class FuzzyTsukamoto:
-    def __init__(self):
-        # Variabel untuk menyimpan data input dan output
-        self.history = []
-    
-    def durasi_rendah(self, x):
-        """Fungsi keanggotaan durasi rendah (0-20 detik)"""
-        if x <= 5:
-            return 1
-        elif x <= 20:
-            return (20 - x) / 15
-        else:
-            return 0
-    
-    def durasi_sedang(self, x):
-        """Fungsi keanggotaan durasi sedang (10-40 detik)"""
-        if x <= 10:
-            return 0
-        elif x <= 20:
-            return (x - 10) / 10
-        elif x <= 30:
-            return 1
-        elif x <= 40:
-            return (40 - x) / 10
-        else:
-            return 0
-    
-    def durasi_tinggi(self, x):
-        """Fungsi keanggotaan durasi tinggi (30-60 detik)"""
-        if x <= 30:
-            return 0
-        elif x <= 45:
-            return (x - 30) / 15
-        else:
-            return 1
-    
-    def kelembaban_rendah(self, x):
-        """Fungsi keanggotaan kelembaban rendah (0-40%)"""
-        if x <= 20:
-            return 1
-        elif 20 < x <= 40:
-            return (40 - x) / 20
-        else:
-            return 0
-    
-    def kelembaban_sedang(self, x):
-        """Fungsi keanggotaan kelembaban sedang (20-60%)"""
-        if 20 <= x <= 40:
-            return (x - 20) / 20
-        elif 40 < x <= 60:
-            return (60 - x) / 20
-        else:
-            return 0
-    
-    def kelembaban_tinggi(self, x):
-        """Fungsi keanggotaan kelembaban tinggi (40-100%)"""
-        if x <= 40:
-            return 0
-        elif 40 < x <= 60:
-            return (x - 40) / 20
-        else:
-            return 1
-    
-    def cuaca_cerah(self, cuaca):
-        """Fungsi keanggotaan cuaca cerah"""
-        return 1 if cuaca == "Cerah" else 0
-    
-    def cuaca_berawan(self, cuaca):
-        """Fungsi keanggotaan cuaca berawan"""
-        return 1 if cuaca == "Berawan" else 0
-    
-    def cuaca_hujan_ringan(self, cuaca):
-        """Fungsi keanggotaan cuaca hujan ringan"""
-        return 1 if cuaca == "Hujan Ringan" else 0
-    
-    def cuaca_hujan_lebat(self, cuaca):
-        """Fungsi keanggotaan cuaca hujan lebat"""
-        return 1 if cuaca == "Hujan Lebat" else 0
-    
-    def hitung_durasi_penyiraman(self, kelembaban, cuaca):
-        """Implementasi metode Fuzzy Tsukamoto"""
-        
-        # Fuzzifikasi input
-        k_rendah = self.kelembaban_rendah(kelembaban)
-        k_sedang = self.kelembaban_sedang(kelembaban)
-        k_tinggi = self.kelembaban_tinggi(kelembaban)
-        
-        c_cerah = self.cuaca_cerah(cuaca)
-        c_berawan = self.cuaca_berawan(cuaca)
-        c_hujan_ringan = self.cuaca_hujan_ringan(cuaca)
-        c_hujan_lebat = self.cuaca_hujan_lebat(cuaca)
-        
-        # Aturan fuzzy dan inferensi
-        rules = []
-        
-        # Rule 1: Jika kelembaban rendah dan cuaca cerah -> penyiraman tinggi (45 detik)
-        alpha1 = min(k_rendah, c_cerah)
-        if alpha1 > 0:
-            z1 = 45
-            rules.append((alpha1, z1, "Kelembaban rendah + cuaca cerah"))
-        
-        # Rule 2: Jika kelembaban rendah dan cuaca berawan -> penyiraman tinggi (40 detik)
-        alpha2 = min(k_rendah, c_berawan)
-        if alpha2 > 0:
-            z2 = 40
-            rules.append((alpha2, z2, "Kelembaban rendah + cuaca berawan"))
-        
-        # Rule 3: Jika kelembaban rendah dan cuaca hujan ringan -> penyiraman sedang (30 detik)
-        alpha3 = min(k_rendah, c_hujan_ringan)
-        if alpha3 > 0:
-            z3 = 30
-            rules.append((alpha3, z3, "Kelembaban rendah + hujan ringan"))
-        
-        # Rule 4: Jika kelembaban rendah dan cuaca hujan lebat -> penyiraman rendah (15 detik)
-        alpha4 = min(k_rendah, c_hujan_lebat)
-        if alpha4 > 0:
-            z4 = 15
-            rules.append((alpha4, z4, "Kelembaban rendah + hujan lebat"))
-        
-        # Rule 5: Jika kelembaban sedang dan cuaca cerah -> penyiraman sedang (35 detik)
-        alpha5 = min(k_sedang, c_cerah)
-        if alpha5 > 0:
-            z5 = 35
-            rules.append((alpha5, z5, "Kelembaban sedang + cuaca cerah"))
-        
-        # Rule 6: Jika kelembaban sedang dan cuaca berawan -> penyiraman sedang (25 detik)
-        alpha6 = min(k_sedang, c_berawan)
-        if alpha6 > 0:
-            z6 = 25
-            rules.append((alpha6, z6, "Kelembaban sedang + cuaca berawan"))
-        
-        # Rule 7: Jika kelembaban sedang dan cuaca hujan ringan -> penyiraman rendah (20 detik)
-        alpha7 = min(k_sedang, c_hujan_ringan)
-        if alpha7 > 0:
-            z7 = 20
-            rules.append((alpha7, z7, "Kelembaban sedang + hujan ringan"))
-        
-        # Rule 8: Jika kelembaban sedang dan cuaca hujan lebat -> penyiraman rendah (10 detik)
-        alpha8 = min(k_sedang, c_hujan_lebat)
-        if alpha8 > 0:
-            z8 = 10
-            rules.append((alpha8, z8, "Kelembaban sedang + hujan lebat"))
-        
-        # Rule 9: Jika kelembaban tinggi dan cuaca cerah -> penyiraman rendah (15 detik)
-        alpha9 = min(k_tinggi, c_cerah)
-        if alpha9 > 0:
-            z9 = 15
-            rules.append((alpha9, z9, "Kelembaban tinggi + cuaca cerah"))
-        
-        # Rule 10: Jika kelembaban tinggi dan cuaca berawan -> penyiraman rendah (10 detik)
-        alpha10 = min(k_tinggi, c_berawan)
-        if alpha10 > 0:
-            z10 = 10
-            rules.append((alpha10, z10, "Kelembaban tinggi + cuaca berawan"))
-        
-        # Rule 11: Jika kelembaban tinggi dan cuaca hujan -> penyiraman rendah (5 detik)
-        alpha11 = min(k_tinggi, c_hujan_ringan)
-        if alpha11 > 0:
-            z11 = 5
-            rules.append((alpha11, z11, "Kelembaban tinggi + hujan ringan"))
-        
-        # Rule 12: Jika kelembaban tinggi dan cuaca hujan lebat -> tidak perlu penyiraman (0 detik)
-        alpha12 = min(k_tinggi, c_hujan_lebat)
-        if alpha12 > 0:
-            z12 = 0
-            rules.append((alpha12, z12, "Kelembaban tinggi + hujan lebat"))
-        
+    def __init__(self, rule_base=None, history_capacity=10000):
+        # Ring buffer riwayat input dan output (kolom numerik, kapasitas tetap)
+        self.history = HistoryStore(history_capacity)
+
+        # Rule base terkompilasi (membership + tabel rule), dapat ditukar saat runtime
+        self.rule_base = rule_base or compile_rule_base()
+        self._reload_lock = threading.Lock()
+        # Rule base yang masih direferensikan entri history (id -> rule base) dan
+        # id per versi; rule base yang tidak lagi dipakai dibuang saat reload
+        self._rule_bases = {0: self.rule_base}
+        self._id_rule_base = {self.rule_base.versi: 0}
+        self._id_berikut = 1
+
+        # Model cuaca kontinu (SensorFuzzyModel) untuk menjelaskan ulang entri history hasil sensor
+        self.sensor_model = None
+
+        # Renderer grafik keanggotaan dengan background dan gambar yang di-cache
+        self.graph_renderer = MembershipGraphRenderer()
+
+    def muat_rule_base(self, definisi=None, path=DEFAULT_RULES_PATH):
+        """Kompilasi rule base baru lalu tukar referensinya tanpa restart
+
+        Request yang sedang berjalan tetap memakai rule base lama karena setiap
+        perhitungan mengambil referensi rule base satu kali di awal.
+        """
+        with self._reload_lock:
+            rule_base = compile_rule_base(definisi, path)
+
+            # Pertahankan rule base yang dipakai history dan yang sedang aktif
+            # (masih dipakai request yang berjalan); definisi yang sama memakai id lama
+            terpakai = self.history.rule_base_terpakai()
+            terpakai.add(self._id_rule_base[self.rule_base.versi])
+            id_baru = self._id_rule_base.get(rule_base.versi)
+            if id_baru is None:
+                id_baru = self._id_berikut
+                self._id_berikut += 1
+            rule_bases = {i: rb for i, rb in self._rule_bases.items() if i in terpakai}
+            rule_bases[id_baru] = rule_base
+
+            self._rule_bases = rule_bases
+            self._id_rule_base = {rb.versi: i for i, rb in rule_bases.items()}
+            self.rule_base = rule_base
+            return rule_base
+
+    def kode_cuaca(self, cuaca_list, rule_base=None):
+        """Konversi label cuaca (atau kode numerik) menjadi array kode, -1 untuk nilai tidak valid"""
+        variabel_cuaca = (rule_base or self.rule_base).variabel['cuaca']
+        jumlah_cuaca = len(variabel_cuaca.nama_himpunan)
+        kode = []
+        for cuaca in cuaca_list:
+            if isinstance(cuaca, str):
+                kode.append(variabel_cuaca.kode(cuaca))
+            elif isinstance(cuaca, int) and not isinstance(cuaca, bool) and 0 <= cuaca < jumlah_cuaca:
+                kode.append(cuaca)
+            else:
+                kode.append(-1)
+        return np.array(kode, dtype=np.int64)
+
+    def hitung_durasi_penyiraman(self, kelembaban, cuaca, fields=None):
+        """Implementasi metode Fuzzy Tsukamoto
+
+        fields memilih bagian penjelasan yang dihitung (lihat RESULT_FIELDS);
+        kelembaban, cuaca, durasi dan tingkat selalu ada di hasil.
+        """
+        rule_base = self.rule_base
+        fields = RESULT_FIELDS if fields is None else fields
+
+        # Fuzzifikasi input dan inferensi seluruh rule
+        hasil = rule_base.evaluasi_tunggal({
+            'kelembaban': kelembaban,
+            'cuaca': rule_base.variabel['cuaca'].kode(cuaca)
+        })
+
         # Defuzzifikasi menggunakan metode Tsukamoto (weighted average)
-        if rules:
-            numerator = sum(alpha * z for alpha, z, _ in rules)
-            denominator = sum(alpha for alpha, z, _ in rules)
-            durasi = numerator / denominator if denominator > 0 else 0
-        else:
-            durasi = 0
-        
+        durasi = hasil['durasi']
+
         # Tentukan tingkat kebutuhan penyiraman berdasarkan durasi (dalam detik)
-        if durasi <= 15:
-            tingkat = "Rendah"
-        elif durasi <= 35:
-            tingkat = "Sedang"
-        else:
-            tingkat = "Tinggi"
-        
-        # Generate insights
-        insights = self.generate_insights(kelembaban, cuaca, round(durasi, 2), tingkat, rules)
-        
-        # Simpan ke history
+        tingkat = rule_base.tingkat(durasi)
+
         result = {
             'kelembaban': kelembaban,
             'cuaca': cuaca,
             'durasi': round(durasi, 2),
-            'tingkat': tingkat,
-            'rules': rules,
-            'fuzzifikasi': {
-                'kelembaban_rendah': round(k_rendah, 3),
-                'kelembaban_sedang': round(k_sedang, 3),
-                'kelembaban_tinggi': round(k_tinggi, 3),
-                'cuaca_aktif': cuaca
-            },
-            'insights': insights
+            'tingkat': tingkat
         }
-        
-        self.history.append(result)
-        
+
+        if 'rules' in fields or 'insights' in fields:
+            alpha = hasil['alpha']
+            rules = [
+                (alpha[r], rule_base.z_asli[r], rule_base.deskripsi[r])
+                for r in range(len(alpha)) if alpha[r] > 0
+            ]
+            result['rules'] = rules
+
+        if 'fuzzifikasi' in fields:
+            mu_kelembaban = hasil['mu']['kelembaban']
+            fuzzifikasi = {
+                f'kelembaban_{himpunan}': round(mu_kelembaban[i], 3)
+                for i, himpunan in enumerate(rule_base.variabel['kelembaban'].nama_himpunan)
+            }
+            fuzzifikasi['cuaca_aktif'] = cuaca
+            result['fuzzifikasi'] = fuzzifikasi
+
+        # Generate insights
+        if 'insights' in fields:
+            result['insights'] = self.generate_insights(kelembaban, cuaca, round(durasi, 2), tingkat, rules)
+
+        # Simpan ke history
+        self.catat_riwayat(kelembaban, cuaca, durasi, tingkat, rule_base)
+
         return result
-        
+
+    def catat_riwayat(self, kelembaban, cuaca, durasi, tingkat, rule_base=None, sensor=None):
+        """Simpan satu hasil perhitungan ke history (juga untuk hasil lookup table)
+
+        sensor = (curah_hujan, suhu, kelembaban_udara) untuk hasil model sensor;
+        tingkat entri itu diindeks pada rule base model sensor.
+        """
+        if sensor is not None:
+            self.history.append(
+                kelembaban,
+                self.rule_base.variabel['cuaca'].kode(cuaca),
+                durasi,
+                self.sensor_model.rule_base.tingkat_label.index(tingkat),
+                -1,
+                sensor=sensor
+            )
+            return
+        rule_base = rule_base or self.rule_base
+        self.history.append(
+            kelembaban,
+            rule_base.variabel['cuaca'].kode(cuaca),
+            durasi,
+            rule_base.tingkat_label.index(tingkat),
+            self._id_rule_base.get(rule_base.versi, -1)
+        )
+
+    def riwayat(self, offset=0, limit=50):
+        """Halaman history (terbaru dulu); rules, fuzzifikasi, dan insights dihitung ulang saat dibaca"""
+        hasil = []
+        for entri in self.history.page(offset, limit):
+            if entri['sensor'] is not None and self.sensor_model is not None:
+                hasil.append(self._riwayat_sensor(entri))
+                continue
+            rule_base = self._rule_bases.get(entri['rule_base'], self.rule_base)
+            kelembaban = entri['kelembaban']
+            cuaca = rule_base.variabel['cuaca'].nama_himpunan[entri['kode_cuaca']]
+            durasi = round(entri['durasi'], 2)
+            tingkat = rule_base.tingkat_label[entri['tingkat']]
+
+            evaluasi = rule_base.evaluasi_tunggal({'kelembaban': kelembaban, 'cuaca': entri['kode_cuaca']})
+            alpha = evaluasi['alpha']
+            rules = [
+                (alpha[r], rule_base.z_asli[r], rule_base.deskripsi[r])
+                for r in range(len(alpha)) if alpha[r] > 0
+            ]
+            mu_kelembaban = evaluasi['mu']['kelembaban']
+            fuzzifikasi = {
+                f'kelembaban_{himpunan}': round(mu_kelembaban[i], 3)
+                for i, himpunan in enumerate(rule_base.variabel['kelembaban'].nama_himpunan)
+            }
+            fuzzifikasi['cuaca_aktif'] = cuaca
+
+            hasil.append({
+                'kelembaban': kelembaban,
+                'cuaca': cuaca,
+                'durasi': durasi,
+                'tingkat': tingkat,
+                'rules': rules,
+                'fuzzifikasi': fuzzifikasi,
+                'insights': self.generate_insights(kelembaban, cuaca, durasi, tingkat, rules),
+                'timestamp': datetime.datetime.fromtimestamp(entri['timestamp']).strftime('%Y-%m-%d %H:%M:%S')
+            })
+        return hasil
+
+    def _riwayat_sensor(self, entri):
+        curah_hujan, suhu, kelembaban_udara = entri['sensor']
+        item = self.sensor_model.jelaskan(entri['kelembaban'], curah_hujan, suhu, kelembaban_udara)
+        item['durasi'] = round(entri['durasi'], 2)
+        item['tingkat'] = self.sensor_model.rule_base.tingkat_label[entri['tingkat']]
+        item['model'] = 'sensor'
+        item['sensor'] = {'curah_hujan': curah_hujan, 'suhu': suhu, 'kelembaban_udara': kelembaban_udara}
+        item['timestamp'] = datetime.datetime.fromtimestamp(entri['timestamp']).strftime('%Y-%m-%d %H:%M:%S')
+        return item
+
+    def hitung_durasi_penyiraman_batch(self, kelembaban, kode_cuaca, rule_base=None):
+        """Fuzzy Tsukamoto untuk banyak input sekaligus.
+
+        Hasil identik dengan hitung_durasi_penyiraman untuk setiap pasangan input,
+        tetapi tidak disimpan ke history dan tanpa insights.
+        """
+        rule_base = rule_base or self.rule_base
+        hasil = rule_base.evaluasi({
+            'kelembaban': np.asarray(kelembaban, dtype=float),
+            'cuaca': np.asarray(kode_cuaca, dtype=np.int64)
+        })
+        durasi = hasil['durasi']
+
+        # round() Python dipakai agar pembulatan sama persis dengan jalur skalar
+        durasi_bulat = np.array([round(d, 2) for d in durasi.tolist()], dtype=float)
+
+        return {
+            'durasi': durasi_bulat,
+            'durasi_mentah': durasi,
+            'tingkat': rule_base.tingkat_batch(durasi),
+            'alpha': hasil['alpha']
+        }
+
     def generate_membership_graph(self, highlight_input=None):
         """Generate membership function graph for soil moisture with optional input highlighting"""
-        # Create figure with Indonesian labels
-        plt.style.use('default')
-        fig, ax = plt.subplots(figsize=(12, 8))
-        
-        # Define x range (0-100% moisture)
-        x = np.linspace(0, 100, 1000)
-        
-        # Calculate membership values
-        rendah = [self.kelembaban_rendah(xi) for xi in x]
-        sedang = [self.kelembaban_sedang(xi) for xi in x]
-        tinggi = [self.kelembaban_tinggi(xi) for xi in x]
-        
-        # Plot membership functions with enhanced styling
-        ax.plot(x, rendah, 'r-', linewidth=3, label='Rendah', alpha=0.8)
-        ax.plot(x, sedang, 'g-', linewidth=3, label='Sedang', alpha=0.8) 
-        ax.plot(x, tinggi, 'b-', linewidth=3, label='Tinggi', alpha=0.8)
-        
-        # Fill areas under curves for better visualization
-        ax.fill_between(x, rendah, alpha=0.2, color='red')
-        ax.fill_between(x, sedang, alpha=0.2, color='green')
-        ax.fill_between(x, tinggi, alpha=0.2, color='blue')
-        
-        # Highlight input value if provided
-        if highlight_input is not None and 0 <= highlight_input <= 100:
-            # Calculate membership values for the input
-            mu_rendah = self.kelembaban_rendah(highlight_input)
-            mu_sedang = self.kelembaban_sedang(highlight_input)
-            mu_tinggi = self.kelembaban_tinggi(highlight_input)
-            
-            # Draw vertical line at input value
-            ax.axvline(x=highlight_input, color='black', linestyle='--', linewidth=2, alpha=0.7)
-            
-            # Mark membership values with dots
-            ax.plot(highlight_input, mu_rendah, 'ro', markersize=8, markerfacecolor='red', markeredgecolor='darkred', markeredgewidth=2)
-            ax.plot(highlight_input, mu_sedang, 'go', markersize=8, markerfacecolor='green', markeredgecolor='darkgreen', markeredgewidth=2)
-            ax.plot(highlight_input, mu_tinggi, 'bo', markersize=8, markerfacecolor='blue', markeredgecolor='darkblue', markeredgewidth=2)
-            
-            # Add value annotations
-            ax.annotate(f'μ_rendah = {mu_rendah:.3f}', 
-                       xy=(highlight_input, mu_rendah), 
-                       xytext=(highlight_input + 15, mu_rendah + 0.1),
-                       fontsize=10, fontweight='bold', color='darkred',
-                       bbox=dict(boxstyle="round,pad=0.3", facecolor='white', edgecolor='red', alpha=0.8),
-                       arrowprops=dict(arrowstyle='->', color='red', alpha=0.7))
-            
-            ax.annotate(f'μ_sedang = {mu_sedang:.3f}', 
-                       xy=(highlight_input, mu_sedang), 
-                       xytext=(highlight_input + 15, mu_sedang + 0.1),
-                       fontsize=10, fontweight='bold', color='darkgreen',
-                       bbox=dict(boxstyle="round,pad=0.3", facecolor='white', edgecolor='green', alpha=0.8),
-                       arrowprops=dict(arrowstyle='->', color='green', alpha=0.7))
-            
-            ax.annotate(f'μ_tinggi = {mu_tinggi:.3f}', 
-                       xy=(highlight_input, mu_tinggi), 
-                       xytext=(highlight_input + 15, mu_tinggi + 0.1),
-                       fontsize=10, fontweight='bold', color='darkblue',
-                       bbox=dict(boxstyle="round,pad=0.3", facecolor='white', edgecolor='blue', alpha=0.8),
-                       arrowprops=dict(arrowstyle='->', color='blue', alpha=0.7))
-            
-            # Add input value label
-            ax.annotate(f'Input: {highlight_input}%', 
-                       xy=(highlight_input, 0), 
-                       xytext=(highlight_input, -0.15),
-                       fontsize=12, fontweight='bold', color='black',
-                       ha='center',
-                       bbox=dict(boxstyle="round,pad=0.5", facecolor='yellow', alpha=0.8))
-        
-        # Customize plot with enhanced styling
-        ax.set_xlabel('Kelembaban Tanah (%)', fontsize=14, fontweight='bold')
-        ax.set_ylabel('Derajat Keanggotaan', fontsize=14, fontweight='bold')
-        
-        # Dynamic title based on whether input is highlighted
-        if highlight_input is not None:
-            ax.set_title(f'Fungsi Keanggotaan Kelembaban Tanah\nDengan Input Terbaru: {highlight_input}%', 
-                        fontsize=16, fontweight='bold', pad=20)
-        else:
-            ax.set_title('Fungsi Keanggotaan Kelembaban Tanah', 
-                        fontsize=16, fontweight='bold', pad=20)
-        
-        ax.grid(True, alpha=0.4, linestyle='-', linewidth=0.5)
-        ax.legend(fontsize=12, loc='upper right', framealpha=0.9)
-        ax.set_xlim(0, 100)
-        ax.set_ylim(-0.2, 1.2)
-        
-        # Add enhanced annotations for key transition points
-        key_points = [
-            (0, 'Sangat Kering'),
-            (20, 'Transisi Rendah-Sedang'),
-            (40, 'Optimal Sedang'),
-            (60, 'Transisi Sedang-Tinggi'),
-            (100, 'Sangat Basah')
-        ]
-        
-        for point, label in key_points:
-            ax.axvline(x=point, color='gray', linestyle=':', alpha=0.5)
-            ax.text(point, 1.15, label, rotation=45, ha='left', va='bottom', 
-                   fontsize=9, alpha=0.7, style='italic')
-        
-        # Add color-coded regions
-        ax.axvspan(0, 20, alpha=0.1, color='red', label='_nolegend_')
-        ax.axvspan(20, 60, alpha=0.1, color='green', label='_nolegend_')
-        ax.axvspan(60, 100, alpha=0.1, color='blue', label='_nolegend_')
-        
-        plt.tight_layout()
-        
-        # Convert plot to base64 string
-        img_buffer = io.BytesIO()
-        plt.savefig(img_buffer, format='png', dpi=200, bbox_inches='tight', 
-                   facecolor='white', edgecolor='none')
-        img_buffer.seek(0)
-        img_base64 = base64.b64encode(img_buffer.getvalue()).decode()
-        plt.close(fig)  # Close figure to free memory
-        return img_base64
-    
+        png = self.graph_renderer.render_png(self.rule_base, highlight_input)
+        return base64.b64encode(png).decode()
+
     def generate_insights(self, kelembaban, cuaca, durasi, tingkat, rules):
         """Generate insights and recommendations based on calculation results"""
-        insights = []
-        recommendations = []
-        
-        # Analisis kondisi kelembaban
-        if kelembaban <= 20:
-            insights.append("🔴 Kondisi tanah sangat kering - memerlukan perhatian segera")
-            recommendations.append("Lakukan penyiraman intensif dan pantau kelembaban secara berkala")
-        elif kelembaban <= 40:
-            insights.append("🟡 Kondisi tanah cukup kering - perlu penyiraman")
-            recommendations.append("Tingkatkan frekuensi penyiraman untuk menjaga kelembaban optimal")
-        elif kelembaban <= 60:
-            insights.append("🟢 Kondisi kelembaban tanah dalam rentang normal")
-            recommendations.append("Pertahankan jadwal penyiraman rutin sesuai kondisi cuaca")
-        elif kelembaban <= 80:
-            insights.append("🔵 Kondisi tanah cukup lembab - penyiraman minimal")
-            recommendations.append("Kurangi intensitas penyiraman dan pastikan drainase baik")
-        else:
-            insights.append("🟣 Kondisi tanah sangat lembab - risiko overwatering")
-            recommendations.append("Hentikan penyiraman sementara dan periksa sistem drainase")
-        
-        # Analisis pengaruh cuaca
-        weather_impact = {
-            "Cerah": {
-                "icon": "☀️",
-                "impact": "Cuaca cerah meningkatkan evaporasi air dari tanah",
-                "advice": "Penyiraman lebih intensif diperlukan untuk mengkompensasi penguapan"
-            },
-            "Berawan": {
-                "icon": "⛅",
-                "impact": "Cuaca berawan mengurangi tingkat evaporasi",
-                "advice": "Penyiraman dapat dikurangi karena penguapan lebih rendah"
-            },
-            "Hujan Ringan": {
-                "icon": "🌦️",
-                "impact": "Hujan ringan memberikan kelembaban tambahan alami",
-                "advice": "Penyiraman dapat dikurangi atau ditunda sesuai intensitas hujan"
-            },
-            "Hujan Lebat": {
-                "icon": "🌧️",
-                "impact": "Hujan lebat memberikan kelembaban berlebih",
-                "advice": "Hentikan penyiraman dan pastikan drainase berfungsi baik"
-            }
-        }
-        
-        if cuaca in weather_impact:
-            weather_info = weather_impact[cuaca]
-            insights.append(f"{weather_info['icon']} {weather_info['impact']}")
-            recommendations.append(weather_info['advice'])
-        
-        # Analisis hasil penyiraman
-        if durasi == 0:
-            insights.append("✅ Tidak diperlukan penyiraman saat ini")
-            recommendations.append("Pantau kondisi tanah dalam 6-12 jam ke depan")
-        elif durasi <= 10:
-            insights.append("💧 Penyiraman sangat ringan sudah cukup")
-            recommendations.append("Lakukan penyiraman singkat dengan semprotan halus")
-        elif durasi <= 25:
-            insights.append("💦 Penyiraman ringan diperlukan")
-            recommendations.append("Lakukan penyiraman dengan tekanan rendah")
-        elif durasi <= 40:
-            insights.append("🌊 Penyiraman sedang diperlukan")
-            recommendations.append("Lakukan penyiraman dengan intensitas normal untuk tanaman kecil")
-        else:
-            insights.append("🚿 Penyiraman intensif diperlukan")
-            recommendations.append("Lakukan penyiraman bertahap untuk tanaman yang sangat kering")
-        
-        # Analisis aturan fuzzy yang dominan
-        if rules:
-            dominant_rule = max(rules, key=lambda x: x[0])  # Rule dengan alpha tertinggi
-            alpha_value = dominant_rule[0]
-            rule_desc = dominant_rule[2]
-            
-            if alpha_value >= 0.8:
-                insights.append(f"🎯 Keputusan sangat yakin berdasarkan: {rule_desc}")
-            elif alpha_value >= 0.5:
-                insights.append(f"✓ Keputusan cukup yakin berdasarkan: {rule_desc}")
-            else:
-                insights.append(f"⚠️ Keputusan dengan tingkat keyakinan rendah: {rule_desc}")
-        
-        # Rekomendasi waktu penyiraman
-        if durasi > 0:
-            if cuaca in ["Cerah"]:
-                recommendations.append("⏰ Waktu optimal: pagi hari (06:00-08:00) atau sore hari (17:00-19:00)")
-            elif cuaca in ["Berawan"]:
-                recommendations.append("⏰ Waktu optimal: pagi atau siang hari (08:00-16:00)")
-            else:
-                recommendations.append("⏰ Hindari penyiraman saat hujan, tunggu hingga cuaca membaik")
-        
-        # Peringatan khusus
-        warnings = []
-        if kelembaban > 80 and cuaca in ["Hujan Ringan", "Hujan Lebat"]:
-            warnings.append("⚠️ PERINGATAN: Risiko tinggi genangan air dan pembusukan akar")
-        elif kelembaban < 20 and cuaca == "Cerah":
-            warnings.append("⚠️ PERINGATAN: Risiko stress kekeringan pada tanaman")
-        elif durasi > 50:
-            warnings.append("⚠️ PERINGATAN: Durasi penyiraman cukup lama untuk tanaman kecil, lakukan secara bertahap")
-        
-        return {
-            "insights": insights,
-            "recommendations": recommendations,
-            "warnings": warnings,
-            "summary": f"Berdasarkan kelembaban {kelembaban}% dan cuaca {cuaca}, sistem merekomendasikan penyiraman {tingkat.lower()} selama {durasi} detik."
-        }
+        return generate_insights(kelembaban, cuaca, durasi, tingkat, rules)
+
+    def generate_insights_batch(self, kelembaban, kode_cuaca, hasil, rule_base=None):
+        """Insights untuk hasil hitung_durasi_penyiraman_batch/lookup table (list per input)"""
+        rule_base = rule_base or self.rule_base
+        alpha = hasil.get('alpha')
+        if alpha is None:
+            # Lookup table tidak menyimpan kekuatan rule, hitung ulang untuk rule dominan
+            alpha = rule_base.evaluasi({
+                'kelembaban': np.asarray(kelembaban, dtype=float),
+                'cuaca': np.asarray(kode_cuaca, dtype=np.int64)
+            })['alpha']
+        nama_cuaca = rule_base.variabel['cuaca'].nama_himpunan
+        return generate_insights_batch(
+            kelembaban, [nama_cuaca[k] for k in np.asarray(kode_cuaca).tolist()],
+            hasil['durasi'], hasil['tingkat'].tolist(), alpha, rule_base.deskripsi)
 
 # Inisialisasi fuzzy system
-fuzzy_system = FuzzyTsukamoto()
-
-# Global variable untuk menyimpan hasil perhitungan fuzzy terbaru
-latest_fuzzy_result = {
-    'timestamp': None,
-    'kelembaban_input': None,
-    'cuaca_input': None,
-    'durasi_output': None,
-    'tingkat_output': None,
-    'is_active': False
+fuzzy_system = FuzzyTsukamoto(
+    compile_rule_base(path=app.config['FUZZY_RULES_PATH']),
+    history_capacity=app.config['HISTORY_CAPACITY']
+)
+instrument(fuzzy_system, ['hitung_durasi_penyiraman', 'hitung_durasi_penyiraman_batch'], fuzzy_inference_seconds)
+instrument(fuzzy_system.graph_renderer, ['render'], graph_render_seconds)
+
+# Model cuaca kontinu untuk request/zona yang mengirim nilai sensor lengkap
+sensor_model = None
+if app.config['FUZZY_SENSOR_RULES_PATH']:
+    sensor_model = instrument(SensorFuzzyModel.from_file(app.config['FUZZY_SENSOR_RULES_PATH']),
+                              ['hitung', 'hitung_batch'], fuzzy_inference_seconds)
+    fuzzy_system.sensor_model = sensor_model
+
+def build_fuzzy_lut(step, tolerance, rule_base=None):
+    """Bangun lookup table dan verifikasi terhadap rule engine, None jika tidak valid"""
+    lut = FuzzyLUT(fuzzy_system, step=step, rule_base=rule_base)
+    report = lut.verify(tolerance=tolerance)
+    if not report['valid']:
+        logger.warning("Lookup table tidak valid, mode LUT dinonaktifkan: %s", report)
+        return None
+    logger.info("Lookup table aktif (step=%s, max_error=%.2e)", step, report['max_error'])
+    return lut
+
+# Lookup table opsional untuk jalur cepat durasi/tingkat
+fuzzy_lut = None
+if app.config['FUZZY_LUT_STEP']:
+    fuzzy_lut = build_fuzzy_lut(app.config['FUZZY_LUT_STEP'], app.config['FUZZY_LUT_TOLERANCE'])
+
+def evaluasi_batch(kelembaban, kode_cuaca, rule_base):
+    """Evaluasi batch lewat lookup table jika dibangun untuk rule base yang sama"""
+    lut = fuzzy_lut
+    if lut is not None and lut.rule_base is rule_base:
+        with fuzzy_inference_seconds.time(method='lookup_batch'):
+            return lut.lookup_batch(kelembaban, kode_cuaca)
+    return fuzzy_system.hitung_durasi_penyiraman_batch(kelembaban, kode_cuaca, rule_base)
+
+# Bagian hasil yang dapat dijawab lookup table (tanpa jejak rule dan fuzzifikasi)
+LUT_FIELDS = frozenset(('kelembaban', 'cuaca', 'durasi', 'tingkat'))
+
+def evaluasi_tunggal(kelembaban, cuaca, fields):
+    """Satu perhitungan /calculate lewat lookup table jika aktif dan fields tidak butuh jejak rule"""
+    lut = fuzzy_lut
+    if (lut is not None and fields is not None and lut.rule_base is fuzzy_system.rule_base
+            and LUT_FIELDS.issuperset(fields)):
+        with fuzzy_inference_seconds.time(method='lookup'):
+            hasil = lut.lookup(kelembaban, cuaca)
+        # History sama dengan jalur rule engine, tidak bergantung pada FUZZY_LUT_STEP
+        fuzzy_system.catat_riwayat(kelembaban, cuaca, hasil['durasi'], hasil['tingkat'], lut.rule_base)
+        return {'kelembaban': kelembaban, 'cuaca': cuaca, 'durasi': hasil['durasi'], 'tingkat': hasil['tingkat']}
+    return fuzzy_system.hitung_durasi_penyiraman(kelembaban, cuaca, fields)
+
+# Hasil perhitungan fuzzy terbaru per zona (in-process atau SQLite untuk multi-worker)
+zone_state = create_zone_state(app.config['ZONE_STATE_URL'])
+
+def hasil_fuzzy_terbaru(zone=None):
+    """Hasil fuzzy aktif terbaru untuk zona, None jika belum ada atau sudah direset"""
+    return zone_state.get(zone or DEFAULT_ZONE)
+
+def simpan_hasil_fuzzy(zone, kelembaban, cuaca, durasi, tingkat, timestamp):
+    zone_state.set(zone or DEFAULT_ZONE, {
+        'timestamp': timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+        'kelembaban_input': kelembaban,
+        'cuaca_input': cuaca,
+        'durasi_output': durasi,
+        'tingkat_output': tingkat,
+        'is_active': True
+    })
+
+def simpan_keputusan_pipeline(keputusan):
+    """Keputusan otomatis pipeline menjadi hasil fuzzy terbaru zona masing-masing"""
+    for baris in keputusan:
+        simpan_hasil_fuzzy(baris['zona'], baris['kelembaban_input'], baris['cuaca_input'],
+                           baris['durasi_output'], baris['tingkat_kebutuhan'], baris['timestamp'])
+
+# Pipeline keputusan penyiraman otomatis dari data sensor /api/ingest per zona
+irrigation_pipeline = IrrigationPipeline(
+    fuzzy_system,
+    evaluasi_batch,
+    calculation_writer,
+    window=app.config['PIPELINE_WINDOW'],
+    dedup_tolerance=app.config['PIPELINE_DEDUP_TOLERANCE'],
+    on_decision=simpan_keputusan_pipeline,
+    sensor_evaluate=sensor_model.hitung_batch if sensor_model else None
+)
+# Didaftarkan setelah calculation_writer sehingga ditutup lebih dulu (atexit LIFO)
+atexit.register(irrigation_pipeline.close)
+
+pipeline_source = None
+if app.config['PIPELINE_SOURCE'] == 'database':
+    pipeline_source = DatabaseReadingSource(
+        irrigation_pipeline,
+        db_manager.get_sensor_readings_after,
+        db_manager.last_sensor_reading_id,
+        app.config['PIPELINE_LOCK_PATH'],
+        interval=min(1.0, app.config['PIPELINE_WINDOW']),
+        lag=app.config['PIPELINE_SOURCE_LAG']
+    )
+    atexit.register(pipeline_source.close)
+elif app.config['PIPELINE_SOURCE'] != 'memory':
+    raise ValueError(f"PIPELINE_SOURCE tidak dikenal: {app.config['PIPELINE_SOURCE']}")
+
+
+@app.before_request
+def mulai_timer_request():
+    g.request_mulai = time.perf_counter()
+
+@app.after_request
+def catat_latensi_request(response):
+    """Latensi per pola route (bukan URL mentah) agar jumlah label tetap kecil"""
+    mulai = g.pop('request_mulai', None)
+    if mulai is not None:
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        http_request_seconds.observe(time.perf_counter() - mulai, method=request.method,
+                                     endpoint=endpoint, status=response.status_code)
+    return response
+
+def compact_json(payload, status=200):
+    """Respons JSON tanpa spasi dan tanpa pengurutan key (orjson jika terpasang)"""
+    if orjson is not None:
+        body = orjson.dumps(payload)
+    else:
+        body = json.dumps(payload, separators=(',', ':'), ensure_ascii=False)
+    return Response(body, status=status, mimetype='application/json')
+
+# Nilai sensor cuaca opsional pada /calculate: kolom -> alias parameter (batas nilai dari
+# sensor_ingest.SENSOR_RANGES)
+SENSOR_PARAMS = {
+    'suhu': ('suhu', 'temperature'),
+    'kelembaban_udara': ('kelembaban_udara', 'air_humidity'),
+    'curah_hujan': ('curah_hujan', 'rainfall')
 }
 
-# Authentication Helper Functions
-def login_required(f):
-    """Decorator to require login for protected routes"""
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        if 'user_id' not in session:
-            if request.is_json:
-                return jsonify({'success': False, 'message': 'Login required'}), 401
-            return redirect(url_for('login'))
-        return f(*args, **kwargs)
-    return decorated_function
-
-def hash_password(password: str) -> str:
-    """Hash password using bcrypt"""
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-
-def verify_password(password: str, hashed: str) -> bool:
-    """Verify password against hash"""
-    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+def sensor_input(data):
+    """Nilai sensor cuaca dari request (None jika tidak dikirim); ValueError jika bukan angka"""
+    nilai = {}
+    for kolom, kunci in SENSOR_PARAMS.items():
+        mentah = next((data.get(k) for k in kunci if data.get(k) not in (None, '')), None)
+        nilai[kolom] = None if mentah is None else float(mentah)
+    return nilai
+
+def result_fields(fields, verbose):
+    """Field hasil dari parameter fields (list atau dipisah koma) / verbose; None = lengkap"""
+    if fields:
+        if isinstance(fields, str):
+            fields = [f.strip() for f in fields.split(',') if f.strip()]
+        if not isinstance(fields, (list, tuple)):
+            raise KeyError(str(fields))
+        tidak_dikenal = [f for f in fields if f not in RESULT_FIELDS]
+        if tidak_dikenal:
+            raise KeyError(', '.join(map(str, tidak_dikenal)))
+        return tuple(dict.fromkeys(fields))
+    if verbose is not None and str(verbose).lower() in ('false', '0', 'no'):
+        return COMPACT_FIELDS
+    return None
 
 # Protect existing routes
 @app.route('/')
@@ -543,73 +630,194 @@ def index():
 @app.route('/calculate', methods=['POST'])
 @login_required
 def calculate():
-    global latest_fuzzy_result
-    
     try:
         # Validasi input - handle both form data and JSON
         if request.is_json:
             data = request.get_json()
             kelembaban = float(data.get('humidity', data.get('kelembaban', 0)))
             cuaca = data.get('weather', data.get('cuaca', ''))
+            zona = data.get('zone', data.get('zona'))
         else:
+            data = request.form
             kelembaban = float(request.form.get('kelembaban', 0))
             cuaca = request.form.get('cuaca', '')
+            zona = request.form.get('zona')
+
+        # Bentuk respons: fields=durasi,tingkat atau verbose=false (body atau query string)
+        try:
+            fields = result_fields(data.get('fields', request.args.get('fields')),
+                                   data.get('verbose', request.args.get('verbose')))
+        except KeyError as e:
+            return jsonify({
+                'error': f'Field tidak dikenal: {e.args[0]}',
+                'fields': list(RESULT_FIELDS)
+            }), 400
         
         # Validasi range kelembaban
         if not (0 <= kelembaban <= 100):
             return jsonify({
                 'error': 'Kelembaban harus antara 0-100%'
             }), 400
-        # Validasi pilihan cuaca
-        cuaca_valid = ['Cerah', 'Berawan', 'Hujan Ringan', 'Hujan Lebat']
-        if cuaca not in cuaca_valid:
+
+        # Nilai sensor cuaca (suhu, kelembaban_udara, curah_hujan) harus lengkap jika dikirim
+        sensor = sensor_input(data)
+        dikirim = [kolom for kolom, v in sensor.items() if v is not None]
+        if dikirim and len(dikirim) < len(sensor):
             return jsonify({
-                'error': 'Pilihan cuaca tidak valid'
+                'error': f"Data sensor harus lengkap: {', '.join(SENSOR_PARAMS)}"
             }), 400
+        for kolom, v in sensor.items():
+            bawah, atas = SENSOR_RANGES[kolom]
+            if v is not None and not (bawah <= v <= atas):
+                return jsonify({
+                    'error': f'{kolom} harus antara {bawah}-{atas}'
+                }), 400
+
+        model = None
+        if dikirim:
+            suhu, udara, hujan = sensor['suhu'], sensor['kelembaban_udara'], sensor['curah_hujan']
+            cuaca = cuaca or str(klasifikasi_cuaca(hujan, udara))
+        if dikirim and sensor_model is not None:
+            # Cuaca kontinu dari nilai sensor; label cuaca hanya untuk penyimpanan dan insights
+            model = 'sensor'
+            result = sensor_model.hitung(kelembaban, hujan, suhu, udara, fields)
+            cuaca = result['cuaca']
+            fuzzy_system.catat_riwayat(kelembaban, cuaca, result['durasi'], result['tingkat'],
+                                       sensor=(hujan, suhu, udara))
+        else:
+            # Validasi pilihan cuaca
+            if fuzzy_system.rule_base.variabel['cuaca'].kode(cuaca) < 0:
+                return jsonify({
+                    'error': 'Pilihan cuaca tidak valid'
+                }), 400
+
+            # Hitung menggunakan fuzzy logic (bagian penjelasan hanya jika diminta; mode
+            # ringkas memakai lookup table jika FUZZY_LUT_STEP diisi)
+            result = evaluasi_tunggal(kelembaban, cuaca, fields)
+
+            # Generate sensor data based on weather
+            if not dikirim:
+                suhu, udara, hujan = generate_weather_based_sensor_data(cuaca)
+        timestamp = datetime.datetime.now()
         
-        # Hitung menggunakan fuzzy logic
-        result = fuzzy_system.hitung_durasi_penyiraman(kelembaban, cuaca)
-        
-        # Generate sensor data based on weather
-        sensor_data = generate_weather_based_sensor_data(cuaca)
+        # Simpan hasil terbaru zona untuk monitoring
+        simpan_hasil_fuzzy(zona, kelembaban, cuaca, result['durasi'], result['tingkat'], timestamp)
+        sensor_broadcaster.trigger()
         
-        # Simpan hasil ke global variable untuk monitoring
-        latest_fuzzy_result = {
-            'timestamp': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        # Simpan ke database melalui antrean write-behind (tidak menunggu commit)
+        calculation_writer.put({
             'kelembaban_input': kelembaban,
             'cuaca_input': cuaca,
             'durasi_output': result['durasi'],
-            'tingkat_output': result['tingkat'],
-            'is_active': True
-        }
+            'tingkat_kebutuhan': result['tingkat'],
+            'kelembaban_tanah': kelembaban,
+            'suhu': suhu,
+            'kelembaban_udara': udara,
+            'curah_hujan': hujan,
+            'status_pompa': "Aktif" if result['durasi'] > 0 else "Tidak Aktif",
+            'timestamp': timestamp,
+            'zona': zona
+        })
         
-        # Simpan ke database
-        try:
-            calculation_data = {
-                'kelembaban_input': kelembaban,
-                'cuaca_input': cuaca,
-                'durasi_output': result['durasi'],
-                'tingkat_kebutuhan': result['tingkat'],
-                'kelembaban_tanah': sensor_data['kelembaban_tanah'],
-                'suhu': sensor_data['suhu'],
-                'kelembaban_udara': sensor_data['kelembaban_udara'],
-                'curah_hujan': sensor_data['curah_hujan'],
-                'status_pompa': "Aktif" if result['durasi'] > 0 else "Tidak Aktif"
-            }
-            
-            calculation_id = db_manager.save_calculation(calculation_data)
-            print(f"Calculation saved to database with ID: {calculation_id}")
-            
-        except Exception as db_error:
-            print(f"Database error: {str(db_error)}")
-            # Continue without failing the request
+        response = {'success': True, 'model': model} if model else {'success': True}
+        if fields is not None:
+            response['result'] = {field: result[field] for field in fields}
+            return compact_json(response)
+        response['result'] = result
+        return jsonify(response)
         
+    except ValueError:
+        return jsonify({
+            'error': 'Input kelembaban harus berupa angka'
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'error': f'Terjadi kesalahan: {str(e)}'
+        }), 500
+
+@app.route('/calculate_batch', methods=['POST'])
+@login_required
+def calculate_batch():
+    """Hitung durasi penyiraman untuk banyak lahan dalam satu request"""
+    try:
+        data = request.get_json(silent=True) or {}
+        if not isinstance(data, dict):
+            return jsonify({
+                'error': 'Body harus berupa object JSON'
+            }), 400
+
+        # Terima format kolom {"humidity": [...], "weather": [...]} atau {"items": [{...}, ...]}
+        if 'items' in data:
+            items = data['items']
+            if not isinstance(items, list):
+                return jsonify({
+                    'error': 'Input harus berupa array'
+                }), 400
+            bukan_object = [i for i, item in enumerate(items) if not isinstance(item, dict)]
+            if bukan_object:
+                return jsonify({
+                    'error': f'Item ke-{bukan_object[0]} harus berupa object {{"kelembaban", "cuaca"}}',
+                    'invalid_indices': bukan_object[:100]
+                }), 400
+            kelembaban_list = [item.get('humidity', item.get('kelembaban')) for item in items]
+            cuaca_list = [item.get('weather', item.get('cuaca')) for item in items]
+        else:
+            kelembaban_list = data.get('humidity', data.get('kelembaban', []))
+            cuaca_list = data.get('weather', data.get('cuaca', []))
+
+        if not isinstance(kelembaban_list, list) or not isinstance(cuaca_list, list):
+            return jsonify({
+                'error': 'Input harus berupa array'
+            }), 400
+        if len(kelembaban_list) != len(cuaca_list):
+            return jsonify({
+                'error': 'Jumlah data kelembaban dan cuaca harus sama'
+            }), 400
+        if not kelembaban_list:
+            return jsonify({
+                'error': 'Data input kosong'
+            }), 400
+        if len(kelembaban_list) > app.config['CALCULATE_BATCH_LIMIT']:
+            return jsonify({
+                'error': f"Maksimal {app.config['CALCULATE_BATCH_LIMIT']} data per request"
+            }), 400
+
+        kelembaban = np.array(kelembaban_list, dtype=float)
+
+        # Validasi range kelembaban (NaN juga ditolak)
+        tidak_valid = np.flatnonzero(~((kelembaban >= 0) & (kelembaban <= 100)))
+        if tidak_valid.size:
+            return jsonify({
+                'error': 'Kelembaban harus antara 0-100%',
+                'invalid_indices': tidak_valid[:100].tolist()
+            }), 400
+
+        # Validasi pilihan cuaca (rule base diambil sekali agar konsisten selama request)
+        rule_base = fuzzy_system.rule_base
+        kode_cuaca = fuzzy_system.kode_cuaca(cuaca_list, rule_base)
+        tidak_valid = np.flatnonzero(kode_cuaca < 0)
+        if tidak_valid.size:
+            return jsonify({
+                'error': 'Pilihan cuaca tidak valid',
+                'invalid_indices': tidak_valid[:100].tolist()
+            }), 400
+
+        result = evaluasi_batch(kelembaban, kode_cuaca, rule_base)
+        response = {
+            'durasi': result['durasi'].tolist(),
+            'tingkat': result['tingkat'].tolist()
+        }
+        # Insights opsional ({"insights": true}); teks yang sama dipakai bersama antar baris
+        if data.get('insights'):
+            response['insights'] = fuzzy_system.generate_insights_batch(kelembaban, kode_cuaca, result, rule_base)
+
         return jsonify({
             'success': True,
-            'result': result
+            'count': len(kelembaban),
+            'result': response
         })
-        
-    except ValueError:
+
+    except (TypeError, ValueError):
         return jsonify({
             'error': 'Input kelembaban harus berupa angka'
         }), 400
@@ -618,25 +826,147 @@ def calculate():
             'error': f'Terjadi kesalahan: {str(e)}'
         }), 500
 
+@app.route('/api/rules')
+@login_required
+def get_rules():
+    """API endpoint untuk melihat rule base fuzzy yang sedang aktif"""
+    rule_base = fuzzy_system.rule_base
+    return jsonify({
+        'success': True,
+        'versi': rule_base.versi,
+        'rule_base': rule_base.definisi
+    })
+
+@app.route('/api/rules/reload', methods=['POST'])
+@login_required
+def reload_rules():
+    """Kompilasi ulang rule base dari file, atau dari body JSON lalu simpan ke file"""
+    global fuzzy_lut
+
+    if session.get('role') != 'admin':
+        return jsonify({
+            'success': False,
+            'message': 'Hanya admin yang dapat mengubah rule base'
+        }), 403
+
+    try:
+        definisi = request.get_json(silent=True)
+        rule_base = fuzzy_system.muat_rule_base(definisi, app.config['FUZZY_RULES_PATH'])
+        if definisi is not None:
+            save_rule_definition(rule_base.definisi, app.config['FUZZY_RULES_PATH'])
+
+        # LUT lama tidak dipakai lagi karena terikat ke rule base sebelumnya
+        if app.config['FUZZY_LUT_STEP']:
+            fuzzy_lut = build_fuzzy_lut(app.config['FUZZY_LUT_STEP'], app.config['FUZZY_LUT_TOLERANCE'], rule_base)
+
+        return jsonify({
+            'success': True,
+            'versi': rule_base.versi,
+            'jumlah_rule': len(rule_base.z)
+        })
+    except (ValueError, KeyError, TypeError) as e:
+        return jsonify({
+            'success': False,
+            'error': f'Rule base tidak valid: {str(e)}'
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Gagal memuat rule base: {str(e)}'
+        }), 500
+
 @app.route('/membership_graph')
 @login_required
 def membership_graph():
     """Generate and return membership function graph with latest calculation highlight"""
     try:
         # Get the latest calculation input for highlighting
-        highlight_value = None
-        if latest_fuzzy_result['is_active'] and latest_fuzzy_result['kelembaban_input'] is not None:
-            highlight_value = latest_fuzzy_result['kelembaban_input']
-        
-        # Generate graph with or without highlighting
-        graph_base64 = fuzzy_system.generate_membership_graph(highlight_input=highlight_value)
-        
-        return jsonify({
+        calculation_data = hasil_fuzzy_terbaru(request.args.get('zone'))
+        highlight_value = calculation_data['kelembaban_input'] if calculation_data else None
+
+        # ETag dari kunci grafik + data perhitungan, browser dapat memakai ulang respons lama (304)
+        rule_base = fuzzy_system.rule_base
+        etag = fuzzy_system.graph_renderer.etag(rule_base, highlight_value)
+        if calculation_data:
+            data_hash = hashlib.sha1(json.dumps(calculation_data, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+            etag = f"{etag}-{data_hash}"
+        if etag in request.if_none_match:
+            response = app.response_class(status=304)
+            response.set_etag(etag)
+            return response
+
+        # Generate graph with or without highlighting (dari cache jika tersedia)
+        png = fuzzy_system.graph_renderer.render_png(rule_base, highlight_value)
+
+        response = jsonify({
             'success': True,
-            'graph': graph_base64,
+            'graph': base64.b64encode(png).decode(),
             'highlighted_input': highlight_value,
-            'calculation_data': latest_fuzzy_result if latest_fuzzy_result['is_active'] else None
+            'calculation_data': calculation_data
         })
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Gagal membuat grafik: {str(e)}'
+        }), 500
+
+@app.route('/membership_graph.<fmt>')
+@login_required
+def membership_graph_image(fmt):
+    """Kirim grafik keanggotaan sebagai file gambar (png/svg) tanpa base64"""
+    if fmt not in FORMAT_GAMBAR:
+        return jsonify({
+            'success': False,
+            'error': f'Format gambar harus salah satu dari {list(FORMAT_GAMBAR)}'
+        }), 404
+
+    renderer = fuzzy_system.graph_renderer
+    try:
+        # Ukuran gambar: ?dpi=... atau ?width=... (piksel, figure 12x8 inci), dibulatkan ke preset
+        dpi = request.args.get('dpi', type=int)
+        width = request.args.get('width', type=int)
+        if width:
+            dpi = round(width / renderer.figsize[0])
+        dpi = dpi or renderer.dpi
+        if not (app.config['GRAPH_DPI_MIN'] <= dpi <= app.config['GRAPH_DPI_MAX']):
+            return jsonify({
+                'success': False,
+                'error': f"dpi harus antara {app.config['GRAPH_DPI_MIN']}-{app.config['GRAPH_DPI_MAX']}"
+            }), 400
+        if fmt == 'svg':
+            dpi = 72  # ukuran SVG tidak bergantung pada dpi
+
+        # Nilai highlight eksplisit (?highlight=) membuat URL selalu menghasilkan gambar yang sama
+        highlight_value = request.args.get('highlight', type=float)
+        explicit_highlight = highlight_value is not None
+        if not explicit_highlight:
+            calculation_data = hasil_fuzzy_terbaru(request.args.get('zone'))
+            highlight_value = calculation_data['kelembaban_input'] if calculation_data else None
+
+        rule_base = fuzzy_system.rule_base
+        etag = renderer.etag(rule_base, highlight_value, fmt, dpi)
+        if etag in request.if_none_match:
+            response = app.response_class(status=304)
+            response.set_etag(etag)
+            return response
+
+        data = renderer.render(rule_base, highlight_value, fmt, dpi)
+        response = send_file(
+            io.BytesIO(data),
+            mimetype=FORMAT_GAMBAR[fmt],
+            download_name=f'membership_graph.{fmt}',
+            etag=etag,
+            max_age=3600 if explicit_highlight else None
+        )
+        if explicit_highlight:
+            response.cache_control.public = False
+            response.cache_control.private = True
+        else:
+            response.cache_control.no_cache = True
+        return response
     except Exception as e:
         return jsonify({
             'success': False,
@@ -646,8 +976,19 @@ def membership_graph():
 @app.route('/history')
 @login_required
 def history():
+    offset = request.args.get('offset', 0, type=int)
+    limit = request.args.get('limit', 50, type=int)
+    if offset < 0 or not (1 <= limit <= app.config['HISTORY_PAGE_LIMIT']):
+        return jsonify({
+            'error': f"Parameter offset minimal 0 dan limit antara 1-{app.config['HISTORY_PAGE_LIMIT']}"
+        }), 400
+    
     return jsonify({
-        'history': fuzzy_system.history
+        'history': fuzzy_system.riwayat(offset, limit),
+        'total': len(fuzzy_system.history),
+        'offset': offset,
+        'limit': limit,
+        'capacity': fuzzy_system.history.capacity
     })
 
 # IoT Monitoring System Endpoints
@@ -688,16 +1029,14 @@ def generate_weather_based_sensor_data(cuaca_input):
     
     return suhu, udara, hujan
 
-@app.route('/api/sensor-data')
-@login_required
-def get_sensor_data():
-    """API endpoint untuk mendapatkan data sensor IoT dengan integrasi hasil fuzzy"""
-    global latest_fuzzy_result
+def build_sensor_data(zone=None):
+    """Data sensor IoT dengan integrasi hasil fuzzy (dipakai polling dan SSE)"""
+    latest_fuzzy_result = hasil_fuzzy_terbaru(zone)
     
     current_time = datetime.datetime.now()
     
     # Jika ada hasil fuzzy yang aktif, gunakan data tersebut
-    if latest_fuzzy_result['is_active']:
+    if latest_fuzzy_result:
         # Gunakan hasil perhitungan fuzzy untuk kelembaban tanah dan durasi penyiraman
         kelembaban_tanah = latest_fuzzy_result['kelembaban_input']
         durasi_penyiraman = latest_fuzzy_result['durasi_output']
@@ -734,7 +1073,139 @@ def get_sensor_data():
             'fuzzy_source': False
         }
     
-    return jsonify(data)
+    return data
+
+# Satu producer data sensor untuk semua dashboard yang terhubung via SSE
+sensor_broadcaster = SensorBroadcaster(build_sensor_data, interval=app.config['SENSOR_STREAM_INTERVAL'],
+                                       max_subscribers=app.config['SENSOR_STREAM_MAX_CLIENTS'])
+
+@app.route('/api/sensor-data')
+@login_required
+def get_sensor_data():
+    """API endpoint untuk mendapatkan data sensor IoT dengan integrasi hasil fuzzy"""
+    return jsonify(build_sensor_data(request.args.get('zone')))
+
+@app.route('/api/sensor-stream')
+@login_required
+def sensor_stream():
+    """Server-Sent Events: data sensor dikirim hanya saat berubah"""
+    if not sensor_broadcaster.available():
+        # Slot SSE habis: dashboard beralih ke polling /api/sensor-data
+        response = jsonify({'success': False, 'error': 'Terlalu banyak client sensor stream'})
+        response.status_code = 503
+        response.headers['Retry-After'] = '30'
+        return response
+
+    response = Response(sensor_broadcaster.subscribe(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # Nonaktifkan buffering reverse proxy (nginx)
+    return response
+
+def ingest_devices():
+    """device_id yang boleh dikirim request ini; None = semua, False = tidak berhak
+
+    Device key hanya berlaku untuk device_id yang didaftarkan bersamanya,
+    sehingga batas laju per perangkat tidak dapat dilewati dengan key lain.
+    Pengguna yang login boleh mengirim untuk semua perangkat.
+    """
+    device_key = request.headers.get('X-Device-Key')
+    if device_key:
+        for key, devices in app.config['INGEST_API_KEYS'].items():
+            if secrets.compare_digest(device_key, key):
+                return devices
+        return False
+    return None if 'user_id' in session else False
+
+@app.route('/api/ingest', methods=['POST'])
+def ingest_sensor_readings():
+    """Terima batch data sensor dari perangkat (JSON, JSON lines, atau CSV)"""
+    devices = ingest_devices()
+    if devices is False:
+        return jsonify({'success': False, 'error': 'Device key tidak valid'}), 401
+    if request.content_length and request.content_length > app.config['INGEST_MAX_BYTES']:
+        return jsonify({'success': False, 'error': 'Ukuran body terlalu besar'}), 413
+    
+    try:
+        records = parse_body(request.get_data(cache=False), request.content_type)
+    except (ValueError, UnicodeDecodeError) as e:
+        return jsonify({'success': False, 'error': f'Body tidak valid: {str(e)}'}), 400
+    if not records:
+        return jsonify({'success': False, 'error': 'Tidak ada data sensor'}), 400
+    if len(records) > app.config['INGEST_MAX_READINGS']:
+        return jsonify({
+            'success': False,
+            'error': f"Maksimal {app.config['INGEST_MAX_READINGS']} data per request"
+        }), 413
+    
+    # device_id default: header X-Device-Id, atau satu-satunya perangkat milik device key
+    default_device = request.headers.get('X-Device-Id')
+    if default_device is None and devices and len(devices) == 1:
+        default_device = next(iter(devices))
+    kolom, errors, rejected = validate_readings(records, default_device, allowed_devices=devices)
+    rows = to_rows(kolom)
+    
+    # Batas laju per perangkat: reading yang melebihi kuota dibuang
+    jumlah = Counter(kolom['device_id'])
+    diizinkan = ingest_tracker.consume(jumlah, rejected)
+    rate_limited = len(rows) - sum(diizinkan.values())
+    if rate_limited:
+        kuota = dict(diizinkan)
+        diterima = np.zeros(len(rows), dtype=bool)
+        for i, device_id in enumerate(kolom['device_id']):
+            if kuota[device_id] > 0:
+                kuota[device_id] -= 1
+                diterima[i] = True
+        rows = [row for row, ok in zip(rows, diterima) if ok]
+        kolom = {
+            nama: [v for v, ok in zip(nilai, diterima) if ok] if isinstance(nilai, list) else nilai[diterima]
+            for nama, nilai in kolom.items()
+        }
+    
+    sensor_writer.put_many(rows)
+    if pipeline_source is None:
+        irrigation_pipeline.submit(kolom)
+    
+    if rows:
+        status = 202
+    else:
+        status = 429 if rate_limited else 400
+    return jsonify({
+        'success': bool(rows),
+        'accepted': len(rows),
+        'rejected': rejected,
+        'rate_limited': rate_limited,
+        'errors': errors
+    }), status
+
+@app.route('/api/ingest/stats')
+@login_required
+def get_ingest_stats():
+    """API endpoint untuk statistik ingest data sensor per perangkat"""
+    return jsonify({
+        'success': True,
+        'ingest': ingest_tracker.stats(),
+        'write_behind': sensor_writer.stats()
+    })
+
+@app.route('/api/pipeline/zones')
+@login_required
+def get_pipeline_zones():
+    """API endpoint untuk keputusan penyiraman otomatis terakhir per zona"""
+    return jsonify({
+        'success': True,
+        'zones': irrigation_pipeline.zones(),
+        'stats': irrigation_pipeline.stats(),
+        'source': pipeline_source.stats() if pipeline_source else {'leader': True}
+    })
+
+@app.route('/api/zones')
+@login_required
+def get_zones():
+    """API endpoint untuk hasil fuzzy terbaru semua zona"""
+    return jsonify({
+        'success': True,
+        'zones': zone_state.all()
+    })
 
 # Database and Insights Endpoints
 @app.route('/api/insights')
@@ -753,68 +1224,125 @@ def get_insights():
             'error': f'Gagal mengambil insights: {str(e)}'
         }), 500
 
-@app.route('/api/calculations')
+@app.route('/api/insights/trends')
 @login_required
-def get_calculations():
-    """API endpoint untuk mendapatkan riwayat perhitungan fuzzy"""
+def get_insight_trends():
+    """API endpoint untuk tren perhitungan per jam/per hari (dari tabel rollup)"""
+    granularity = request.args.get('granularity', 'day')
+    days = request.args.get('days', 30, type=int)
+    granularitas = {'hour': 'jam', 'day': 'hari'}.get(granularity, granularity)
+    if granularitas not in ('jam', 'hari'):
+        return jsonify({
+            'success': False,
+            'error': "Parameter granularity harus 'hour' atau 'day'"
+        }), 400
+    if not days or not (1 <= days <= 366):
+        return jsonify({
+            'success': False,
+            'error': 'Parameter days harus antara 1-366'
+        }), 400
+    
     try:
-        limit = request.args.get('limit', 50, type=int)
-        weather_filter = request.args.get('weather', None)
-        
-        if weather_filter:
-            calculations = db_manager.get_calculations_by_weather(weather_filter)
-        else:
-            calculations = db_manager.get_all_calculations(limit)
-        
-        # Convert to dict format for JSON response
-        calculations_data = calculations  # Already in dict format from database
-        
+        trends = db_manager.get_calculation_trends(granularitas, days)
         return jsonify({
             'success': True,
-            'calculations': calculations_data,
-            'total': len(calculations_data)
+            'granularity': granularity,
+            'days': days,
+            'trends': trends
         })
     except Exception as e:
         return jsonify({
             'success': False,
-            'error': f'Gagal mengambil data perhitungan: {str(e)}'
+            'error': f'Gagal mengambil tren: {str(e)}'
         }), 500
 
+def stream_calculations(calculations, limit, buffer_size=100):
+    """Generator respons JSON daftar perhitungan yang ditulis bertahap
+
+    `calculations` diiterasi dengan limit + 1 baris; baris ekstra hanya
+    menandakan masih ada halaman berikutnya (next_cursor).
+    """
+    yield '{"calculations": ['
+    total = 0
+    terakhir = None
+    ada_berikutnya = False
+    buffer = []
+    try:
+        for row in calculations:
+            if total == limit:
+                ada_berikutnya = True
+                break
+            buffer.append(app.json.dumps(row))
+            total += 1
+            terakhir = row
+            if len(buffer) >= buffer_size:
+                yield ('' if total == len(buffer) else ',') + ','.join(buffer)
+                buffer = []
+        status = '"success": true'
+    except Exception as e:
+        logger.error("Database error: %s", e)
+        status = f'"success": false, "error": {json.dumps(f"Gagal mengambil data perhitungan: {e}")}'
+        ada_berikutnya = False
+    
+    if buffer:
+        yield ('' if total == len(buffer) else ',') + ','.join(buffer)
+    next_cursor = encode_cursor(terakhir) if ada_berikutnya else None
+    yield f'], "total": {total}, "next_cursor": {json.dumps(next_cursor)}, {status}}}'
+
+def calculations_response(weather=None, since=None, default_limit=50):
+    """Respons streaming /api/calculations* dengan pagination keyset (?limit=&cursor=)"""
+    limit = request.args.get('limit', default_limit, type=int)
+    if not limit or not (1 <= limit <= app.config['CALCULATIONS_LIMIT_MAX']):
+        return jsonify({
+            'success': False,
+            'error': f"Parameter limit harus antara 1-{app.config['CALCULATIONS_LIMIT_MAX']}"
+        }), 400
+    
+    after = None
+    if request.args.get('cursor'):
+        try:
+            after = decode_cursor(request.args['cursor'])
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+    
+    calculations = db_manager.iter_calculations(weather, since=since, after=after, limit=limit + 1)
+    return Response(stream_calculations(calculations, limit), mimetype='application/json')
+
+@app.route('/api/calculations')
+@login_required
+def get_calculations():
+    """API endpoint untuk mendapatkan riwayat perhitungan fuzzy"""
+    return calculations_response(weather=request.args.get('weather', None))
+
 @app.route('/api/calculations/recent')
 @login_required
 def get_recent_calculations():
     """API endpoint untuk mendapatkan perhitungan terbaru"""
-    try:
-        days = request.args.get('days', 7, type=int)
-        calculations = db_manager.get_recent_calculations(days)
-        
-        # Convert to dict format for JSON response
-        calculations_data = [calc.to_dict() for calc in calculations]
-        
-        return jsonify({
-            'success': True,
-            'calculations': calculations_data,
-            'total': len(calculations_data)
-        })
-    except Exception as e:
+    days = request.args.get('days', 7, type=int)
+    if not days or not (1 <= days <= 366):
         return jsonify({
             'success': False,
-            'error': f'Gagal mengambil data perhitungan terbaru: {str(e)}'
-        }), 500
+            'error': 'Parameter days harus antara 1-366'
+        }), 400
+    since = datetime.datetime.now() - datetime.timedelta(days=days)
+    return calculations_response(since=since)
 
 @app.route('/api/statistics')
 @login_required
 def get_statistics():
     """API endpoint untuk mendapatkan statistik perhitungan"""
     try:
-        insights = db_manager.get_insights()
+        insights = db_manager.get_calculation_statistics()
         
         # Extract key statistics
         stats = {
             'total_calculations': insights.get('total_calculations', 0),
             'weather_distribution': insights.get('weather_distribution', {}),
             'need_level_distribution': insights.get('need_level_distribution', {}),
-            'average_duration_by_weather': insights.get('average_duration_by_weather', {}),
+            'average_duration_by_weather': insights.get('avg_duration_by_weather', {}),
             'humidity_ranges': insights.get('humidity_ranges', {})
         }
         
@@ -828,21 +1356,114 @@ def get_statistics():
             'error': f'Gagal mengambil statistik: {str(e)}'
         }), 500
 
+@app.route('/api/monitoring/db-pool')
+@login_required
+def get_db_pool_stats():
+    """API endpoint untuk metrik pool koneksi database"""
+    return jsonify({
+        'success': True,
+        'pool': db_manager.pool_stats(),
+        'write_behind': calculation_writer.stats(),
+        'login_writer': login_writer.stats(),
+        'session_cache': session_cache.stats(),
+        'sensor_stream': sensor_broadcaster.stats()
+    })
+
+@app.route('/api/monitoring/maintenance', methods=['GET', 'POST'])
+@login_required
+def maintenance():
+    """API endpoint untuk metrik pemeliharaan; POST (admin) membangunkan thread pemeliharaan"""
+    if request.method == 'POST':
+        if session.get('role') != 'admin':
+            return jsonify({
+                'success': False,
+                'message': 'Hanya admin yang dapat menjalankan pemeliharaan'
+            }), 403
+        # Penghapusan berjalan di thread pemeliharaan, bukan di thread request
+        if not maintenance_scheduler.trigger():
+            return jsonify({
+                'success': False,
+                'error': 'Penjadwal pemeliharaan sudah dihentikan'
+            }), 503
+        return jsonify({
+            'success': True,
+            'message': 'Pemeliharaan dijadwalkan',
+            'maintenance': maintenance_scheduler.stats()
+        }), 202
+
+    try:
+        return jsonify({
+            'success': True,
+            'maintenance': maintenance_scheduler.stats(),
+            'archived': row_archiver.archived if row_archiver else None
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+def _per_komponen(komponen, kunci):
+    """Nilai `kunci` dari stats() setiap komponen, dengan nama komponen sebagai label"""
+    return {(nama,): obj.stats()[kunci] for nama, obj in komponen.items()}
+
+def _cache_stats():
+    graph = fuzzy_system.graph_renderer.stats()
+    sesi = session_cache.stats()
+    return {
+        'membership_graph': (graph['hits'], graph['misses']),
+        'session': (sesi['hits'], sesi['misses']),
+        'statistics': (db_manager.statistics_hits, db_manager.statistics_misses)
+    }
+
+_write_queues = {'calculation': calculation_writer, 'sensor': sensor_writer, 'login': login_writer}
+metrics_registry.callback(
+    'queue_depth', 'Jumlah item yang menunggu di antrean latar',
+    lambda: _per_komponen({**_write_queues, 'pipeline': irrigation_pipeline}, 'queued'), ['queue'])
+for _status in ('written', 'failed', 'dropped'):
+    metrics_registry.callback(
+        f'write_behind_{_status}_total', f'Jumlah baris write-behind dengan status {_status}',
+        lambda status=_status: _per_komponen(_write_queues, status), ['queue'], kind='counter')
+metrics_registry.callback(
+    'db_pool_connections', 'Koneksi pool database per state',
+    lambda: {(state,): db_manager.pool_stats()[state] for state in ('in_use', 'idle', 'size')}, ['state'])
+metrics_registry.callback(
+    'db_pool_waits_total', 'Checkout pool yang harus menunggu', lambda: db_manager.pool_stats()['waits'], kind='counter')
+metrics_registry.callback(
+    'db_pool_timeouts_total', 'Checkout pool yang gagal karena timeout',
+    lambda: db_manager.pool_stats()['timeouts'], kind='counter')
+metrics_registry.callback(
+    'cache_requests_total', 'Akses cache per hasil (hit/miss)',
+    lambda: {(nama, hasil): nilai for nama, (hits, misses) in _cache_stats().items()
+             for hasil, nilai in (('hit', hits), ('miss', misses))},
+    ['cache', 'result'], kind='counter')
+metrics_registry.callback(
+    'cache_hit_ratio', 'Rasio hit cache sejak proses dimulai',
+    lambda: {(nama,): hit_ratio(hits, misses) for nama, (hits, misses) in _cache_stats().items()}, ['cache'])
+metrics_registry.callback(
+    'sensor_stream_subscribers', 'Client SSE /api/sensor-stream yang terhubung',
+    lambda: sensor_broadcaster.stats()['subscribers'])
+metrics_registry.callback(
+    'ingest_readings_total', 'Reading sensor dari /api/ingest per hasil',
+    lambda: {(hasil,): ingest_tracker.stats()[hasil] for hasil in ('accepted', 'rejected', 'rate_limited')},
+    ['result'], kind='counter')
+
+@app.route('/metrics')
+def metrics():
+    """Metrik dalam format teks Prometheus (gabungan semua worker jika METRICS_MULTIPROC_DIR diisi)"""
+    token = app.config['METRICS_TOKEN']
+    if token and not secrets.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return jsonify({'success': False, 'error': 'Token metrics tidak valid'}), 401
+    return Response(metrics_registry.render(), content_type=CONTENT_TYPE)
+
 # Endpoint untuk reset data fuzzy (opsional)
 @app.route('/api/reset-fuzzy', methods=['POST'])
 @login_required
 def reset_fuzzy_data():
     """Reset data fuzzy untuk kembali ke mode dummy sensor"""
-    global latest_fuzzy_result
-    
-    latest_fuzzy_result = {
-        'timestamp': None,
-        'kelembaban_input': None,
-        'cuaca_input': None,
-        'durasi_output': None,
-        'tingkat_output': None,
-        'is_active': False
-    }
+    data = request.get_json(silent=True) or {}
+    zone_state.clear(data.get('zone') or request.args.get('zone') or DEFAULT_ZONE)
+    sensor_broadcaster.trigger()
     
     return jsonify({
         'success': True,
@@ -903,35 +1524,34 @@ def login():
             }), 401
         
         # Verify password
-        if not verify_password(password, user['password_hash']):
+        if not password_hasher.verify(password, user['password_hash']):
             return jsonify({
                 'success': False,
                 'message': 'Username atau password salah'
             }), 401
         
         # Create session
+        login_time = datetime.datetime.now()
+        session_token = secrets.token_urlsafe(32)
+        expires_at = login_time + datetime.timedelta(hours=24)
         session['user_id'] = user['id']
         session['username'] = user['username']
         session['full_name'] = user['full_name']
         session['role'] = user['role']
-        session['login_time'] = datetime.datetime.now().isoformat()
-        
-        # Update last login in database
-        db_manager.update_last_login(user['id'])
-        
-        # Optional: Save session to database for additional security
-        session_token = secrets.token_urlsafe(32)
-        expires_at = datetime.datetime.now() + datetime.timedelta(hours=24)
-        
-        db_manager.save_user_session(
-            user['id'], 
-            session_token,
-            request.remote_addr or 'unknown',
-            request.headers.get('User-Agent', 'unknown'),
-            expires_at
-        )
-        
+        session['login_time'] = login_time.isoformat()
         session['session_token'] = session_token
+        session_cache.add(session_token, expires_at)
+        
+        # Session, last login dan hash baru (jika cost bcrypt berubah) ditulis per batch
+        login_writer.put({
+            'user_id': user['id'],
+            'session_token': session_token,
+            'ip_address': request.remote_addr or 'unknown',
+            'user_agent': request.headers.get('User-Agent', 'unknown'),
+            'expires_at': expires_at,
+            'login_time': login_time,
+            'password_hash': password_hasher.hash(password) if password_hasher.needs_rehash(user['password_hash']) else None
+        })
         
         return jsonify({
             'success': True,
@@ -945,7 +1565,7 @@ def login():
         })
         
     except Exception as e:
-        print(f"Login error: {e}")
+        logger.error("Login error: %s", e)
         return jsonify({
             'success': False,
             'message': 'Terjadi kesalahan sistem. Silakan coba lagi.'
@@ -996,7 +1616,7 @@ def register():
             }), 400
         
         # Hash password
-        password_hash = hash_password(password)
+        password_hash = password_hasher.hash(password)
         
         # Buat user baru
         user_id = db_manager.create_user(
@@ -1019,7 +1639,7 @@ def register():
             }), 500
             
     except Exception as e:
-        print(f"Registration error: {e}")
+        logger.error("Registration error: %s", e)
         return jsonify({
             'success': False,
             'message': 'Terjadi kesalahan sistem. Silakan coba lagi.'
@@ -1031,6 +1651,7 @@ def logout():
     try:
         # Delete session from database if exists
         if 'session_token' in session:
+            session_cache.invalidate(session['session_token'])
             db_manager.delete_user_session(session['session_token'])
         
         # Clear Flask session
@@ -1040,7 +1661,7 @@ def logout():
         return redirect(url_for('login'))
         
     except Exception as e:
-        print(f"Logout error: {e}")
+        logger.error("Logout error: %s", e)
         session.clear()  # Clear session anyway
         return redirect(url_for('login'))
 
@@ -1064,7 +1685,36 @@ def get_user_profile():
             'error': str(e)
         }), 500
 
+def start_app():
+    """Mulai thread latar proses ini lalu kembalikan `app` tingkat modul
+
+    Bukan app factory: aplikasi, pool database, rule engine, thread
+    write-behind dan pipeline dibuat saat modul di-import, sekali per proses
+    worker, dan fungsi ini selalu mengembalikan objek `app` yang sama.
+    State yang harus sama di semua worker (session, hasil fuzzy per zona)
+    disimpan di luar proses lewat SECRET_KEY dan ZONE_STATE_URL; evaluasi
+    otomatis /api/ingest hanya berjalan di satu proses jika
+    PIPELINE_SOURCE=database.
+    """
+    global _app_siap
+    with _app_lock:
+        if not _app_siap:
+            # Retensi dan pembersihan session kadaluarsa berjalan periodik di latar
+            maintenance_scheduler.start()
+            metrics_registry.start()
+            if pipeline_source is not None:
+                pipeline_source.start()
+            _app_siap = True
+    return app
+
+_app_lock = threading.Lock()
+_app_siap = False
+
 if __name__ == '__main__':
-    # Clean up expired sessions on startup
-    db_manager.cleanup_expired_sessions()
-    app.run(debug=True)
\ No newline at end of file
+    start_app().run(
+        host=os.environ.get('FLASK_RUN_HOST', '127.0.0.1'),
+        port=int(os.environ.get('FLASK_RUN_PORT', 5000)),
+        # Debugger Werkzeug menjalankan kode dari browser: hanya aktif jika FLASK_DEBUG=1
+        debug=os.environ.get('FLASK_DEBUG', '0') == '1',
+        threaded=True  # /api/sensor-stream menahan satu thread per client
+    )
\ No newline at end of file
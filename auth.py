@@ -0,0 +1,140 @@
+import logging
+import time
+import threading
+from datetime import datetime
+from functools import wraps
+from typing import Callable, Dict, Optional
+
+import bcrypt
+from flask import current_app, jsonify, redirect, request, session, url_for
+
+logger = logging.getLogger(__name__)
+
+# Cost bcrypt default (2^12 iterasi); dapat diubah lewat BCRYPT_ROUNDS
+BCRYPT_ROUNDS = 12
+
+class PasswordHasher:
+    """Hash dan verifikasi password bcrypt dengan cost yang dapat diatur
+
+    Hash lama dengan cost berbeda tetap dapat diverifikasi; `needs_rehash`
+    menandai hash yang perlu diganti saat login berikutnya.
+    """
+
+    def __init__(self, rounds: int = BCRYPT_ROUNDS):
+        if not 4 <= rounds <= 31:
+            raise ValueError("BCRYPT_ROUNDS harus antara 4-31")
+        self.rounds = rounds
+
+    def hash(self, password: str) -> Optional[str]:
+        """Hash password using bcrypt"""
+        try:
+            return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(self.rounds)).decode('utf-8')
+        except Exception:
+            logger.exception("Error hashing password")
+            return None
+
+    def verify(self, password: str, hashed: str) -> bool:
+        """Verify password against hash"""
+        try:
+            return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+        except Exception:
+            logger.exception("Login error")
+            return False
+
+    def needs_rehash(self, hashed: str) -> bool:
+        """True jika cost hash ($2b$<cost>$...) berbeda dari cost yang dikonfigurasi"""
+        try:
+            return int(hashed.split('$')[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+class SessionCache:
+    """Cache TTL hasil validasi token session ke tabel user_sessions
+
+    `validator(token)` mengembalikan waktu kadaluarsa session, False jika
+    token tidak ada (logout/dihapus), atau None jika database tidak dapat
+    diakses. Hasil disimpan selama `ttl` detik sehingga request berikutnya
+    tidak menyentuh database; logout dari worker lain terlihat paling lambat
+    setelah `ttl`. Token yang baru diterbitkan (kurang dari `grace` detik)
+    dianggap valid selama penulisan session ke database masih diantrekan.
+    """
+
+    def __init__(self, validator: Callable[[str], object], ttl: float = 60.0,
+                 max_entries: int = 10000, grace: float = 10.0):
+        self.validator = validator
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.grace = grace
+        self._entries = {}  # token -> (expires_at, berlaku sampai monotonic)
+        self._lock = threading.Lock()
+
+        # Metrik cache
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        app.extensions['session_cache'] = self
+
+    def _simpan(self, token: str, expires_at):
+        with self._lock:
+            if len(self._entries) >= self.max_entries and token not in self._entries:
+                # Buang entri yang paling cepat habis masa cache-nya
+                del self._entries[min(self._entries, key=lambda t: self._entries[t][1])]
+            self._entries[token] = (expires_at, time.monotonic() + self.ttl)
+
+    def add(self, token: str, expires_at: datetime):
+        """Catat token yang baru diterbitkan saat login"""
+        self._simpan(token, expires_at)
+
+    def invalidate(self, token: str):
+        with self._lock:
+            self._entries.pop(token, None)
+
+    def valid(self, token: Optional[str], issued_at: Optional[str] = None) -> bool:
+        if not token:
+            return False
+        with self._lock:
+            entri = self._entries.get(token)
+            if entri and entri[1] > time.monotonic():
+                self.hits += 1
+                expires_at = entri[0]
+                return bool(expires_at) and expires_at > datetime.now()
+            self.misses += 1
+
+        expires_at = self.validator(token)
+        if expires_at is None:
+            # Database tidak tersedia: jangan keluarkan user, coba lagi di request berikutnya
+            return True
+        if expires_at is False and self._baru_diterbitkan(issued_at):
+            return True
+        self._simpan(token, expires_at)
+        return bool(expires_at) and expires_at > datetime.now()
+
+    def _baru_diterbitkan(self, issued_at: Optional[str]) -> bool:
+        try:
+            return (datetime.now() - datetime.fromisoformat(issued_at)).total_seconds() < self.grace
+        except (TypeError, ValueError):
+            return False
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'ttl': self.ttl
+            }
+
+def login_required(f):
+    """Decorator to require login for protected routes"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        cache = current_app.extensions.get('session_cache')
+        if 'user_id' not in session or (
+                cache and not cache.valid(session.get('session_token'), session.get('login_time'))):
+            session.clear()
+            if request.is_json:
+                return jsonify({'success': False, 'message': 'Login required'}), 401
+            return redirect(url_for('login'))
+        return f(*args, **kwargs)
+    return decorated_function
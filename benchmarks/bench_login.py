@@ -0,0 +1,62 @@
+"""Benchmark throughput login dan validasi session
+
+    python benchmarks/bench_login.py [--rounds 10 12] [--requests 50]
+
+Database diganti user di memori agar yang terukur hanya biaya aplikasi
+(bcrypt, session, antrean login); latensi query dapat disimulasikan
+dengan --db-latency (detik).
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def ukur(fungsi, jumlah):
+    mulai = time.perf_counter()
+    for _ in range(jumlah):
+        fungsi()
+    return jumlah / (time.perf_counter() - mulai)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rounds', type=int, nargs='+', default=[10, 12])
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--db-latency', type=float, default=0.002)
+    args = parser.parse_args()
+
+    import app as aplikasi
+    from auth import PasswordHasher, SessionCache
+
+    client = aplikasi.app.test_client()
+    aplikasi.login_writer.writer = lambda logins: time.sleep(args.db_latency) or len(logins)
+
+    for rounds in args.rounds:
+        hasher = PasswordHasher(rounds)
+        user = {'id': 1, 'username': 'bench', 'email': 'bench@example.com', 'full_name': 'Bench',
+                'role': 'user', 'is_active': True, 'last_login': None,
+                'password_hash': hasher.hash('rahasia123')}
+        aplikasi.password_hasher = hasher
+        aplikasi.db_manager.get_user_by_username = lambda username: time.sleep(args.db_latency) or user
+
+        def login():
+            response = client.post('/login', data={'username': 'bench', 'password': 'rahasia123'})
+            assert response.status_code == 200, response.data
+        print(f"bcrypt rounds={rounds}: {ukur(login, args.requests):8.1f} login/detik")
+
+    # Validasi session: query database setiap request vs cache TTL
+    def validator(token):
+        time.sleep(args.db_latency)
+        return aplikasi.datetime.datetime.now() + aplikasi.datetime.timedelta(hours=1)
+    tanpa_cache = SessionCache(validator, ttl=0)
+    dengan_cache = SessionCache(validator, ttl=60)
+    jumlah = args.requests * 20
+    print(f"validasi session tanpa cache: {ukur(lambda: tanpa_cache.valid('token'), jumlah):10.1f} request/detik")
+    print(f"validasi session dengan cache: {ukur(lambda: dengan_cache.valid('token'), jumlah):10.1f} request/detik")
+
+    aplikasi.login_writer.close()
+    print(f"login writer: {aplikasi.login_writer.stats()}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,262 @@
+"""Benchmark engine fuzzy, grafik keanggotaan, layer database dan /calculate
+
+    python benchmarks/run_benchmarks.py --output hasil.json
+    python benchmarks/run_benchmarks.py --rows 10000 1000000 10000000 --compare hasil_lama.json
+    python benchmarks/run_benchmarks.py --db mysql --mysql-database fuzzy_irrigation_bench
+
+Hasil ditulis sebagai JSON (metadata mesin + satu entri per kasus) agar dapat
+dibandingkan antar rilis dengan --compare. Data sintetis dibuat dengan seed
+tetap. Backend default adalah file SQLite baru per jumlah baris; untuk MySQL
+gunakan database khusus benchmark karena baris sintetis ditambahkan ke
+tabelnya.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CUACA = ['Cerah', 'Berawan', 'Hujan Ringan', 'Hujan Lebat']
+TINGKAT = ['Rendah', 'Sedang', 'Tinggi']
+
+def ukur(fungsi, number=1, repeat=5, warmup=1):
+    """Jalankan `fungsi` `number` kali per putaran; kembalikan statistik per operasi"""
+    for _ in range(warmup):
+        fungsi()
+    waktu = []
+    for _ in range(repeat):
+        mulai = time.perf_counter()
+        for _ in range(number):
+            fungsi()
+        waktu.append((time.perf_counter() - mulai) / number)
+    return {
+        'repeat': repeat,
+        'number': number,
+        'min_ms': round(min(waktu) * 1000, 4),
+        'median_ms': round(statistics.median(waktu) * 1000, 4),
+        'mean_ms': round(statistics.fmean(waktu) * 1000, 4),
+        'ops_per_sec': round(1 / statistics.median(waktu), 2)
+    }
+
+def metadata(args):
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    import numpy
+    return {
+        'started_at': datetime.now().isoformat(),
+        'git_commit': commit,
+        'python': platform.python_version(),
+        'numpy': numpy.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'db': args.db,
+        'rows': args.rows,
+        'seed': args.seed
+    }
+
+def baris_sintetis(rng, jumlah, akhir):
+    """Baris fuzzy_calculations acak tersebar 60 hari terakhir"""
+    kelembaban = rng.uniform(0, 100, jumlah).round(2)
+    cuaca = rng.integers(0, len(CUACA), jumlah)
+    durasi = rng.uniform(0, 60, jumlah).round(2)
+    detik = rng.integers(0, 60 * 24 * 3600, jumlah)
+    for i in range(jumlah):
+        waktu = (akhir - timedelta(seconds=int(detik[i]))).replace(microsecond=0)
+        yield {
+            'kelembaban_input': float(kelembaban[i]),
+            'cuaca_input': CUACA[cuaca[i]],
+            'durasi_output': float(durasi[i]),
+            'tingkat_kebutuhan': TINGKAT[min(int(durasi[i] // 20), 2)],
+            'status_pompa': 'Aktif' if durasi[i] > 0 else 'Tidak Aktif',
+            'timestamp': waktu
+        }
+
+def jumlah_baris(db):
+    with db.connection() as connection:
+        cursor = connection.cursor()
+        try:
+            cursor.execute("SELECT COUNT(*) FROM fuzzy_calculations")
+            return cursor.fetchone()[0]
+        finally:
+            cursor.close()
+
+def isi_database(db, target, rng, batch=20000):
+    """Tambah baris sintetis (lewat save_calculations, termasuk rollup) sampai `target` baris"""
+    ada = jumlah_baris(db)
+    akhir = datetime.now()
+    mulai = time.perf_counter()
+    while ada < target:
+        ukuran = min(batch, target - ada)
+        db.save_calculations(list(baris_sintetis(rng, ukuran, akhir)))
+        ada += ukuran
+    return round(time.perf_counter() - mulai, 2)
+
+def buka_database(args, rows):
+    from database import FuzzyDatabase
+    from db_backends import MySQLBackend, SQLiteBackend
+    if args.db == 'mysql':
+        backend = MySQLBackend(args.mysql_host, args.mysql_database, args.mysql_user,
+                               args.mysql_password, args.mysql_port)
+    else:
+        backend = SQLiteBackend(os.path.join(args.workdir, f'bench_{rows}.db'))
+    return FuzzyDatabase(backend=backend, pool_size=4)
+
+def bench_engine(aplikasi, rng, hasil, args):
+    fuzzy = aplikasi.fuzzy_system
+    kelembaban = rng.uniform(0, 100, 100000)
+    kode = rng.integers(0, len(CUACA), 100000)
+    indeks = iter(range(10 ** 9))
+
+    def tunggal():
+        i = next(indeks) % len(kelembaban)
+        fuzzy.hitung_durasi_penyiraman(float(kelembaban[i]), CUACA[kode[i]])
+    hasil.append({'name': 'engine.hitung_durasi_penyiraman', **ukur(tunggal, number=200, repeat=args.repeat)})
+
+    for ukuran in (1000, 100000):
+        hasil.append({'name': 'engine.hitung_durasi_penyiraman_batch', 'params': {'batch': ukuran},
+                      **ukur(lambda: fuzzy.hitung_durasi_penyiraman_batch(kelembaban[:ukuran], kode[:ukuran]),
+                             repeat=args.repeat)})
+
+    # Model cuaca kontinu (4 input trapesium, rule base sensor)
+    model = aplikasi.sensor_model
+    if model is not None:
+        sensor = {'curah_hujan': rng.uniform(0, 40, 100000), 'suhu': rng.uniform(15, 40, 100000),
+                  'kelembaban_udara': rng.uniform(20, 100, 100000)}
+
+        def sensor_tunggal():
+            i = next(indeks) % len(kelembaban)
+            model.hitung(float(kelembaban[i]), float(sensor['curah_hujan'][i]), float(sensor['suhu'][i]),
+                         float(sensor['kelembaban_udara'][i]))
+        params = {'rules': len(model.rule_base.z)}
+        hasil.append({'name': 'engine.sensor_model.hitung', 'params': params,
+                      **ukur(sensor_tunggal, number=200, repeat=args.repeat)})
+        hasil.append({'name': 'engine.sensor_model.hitung_batch', 'params': {**params, 'batch': 100000},
+                      **ukur(lambda: model.hitung_batch(kelembaban, sensor['curah_hujan'], sensor['suhu'],
+                                                        sensor['kelembaban_udara']), repeat=args.repeat)})
+
+    contoh = fuzzy.hitung_durasi_penyiraman(35.0, 'Berawan')
+    hasil.append({'name': 'engine.generate_insights', **ukur(
+        lambda: fuzzy.generate_insights(35.0, 'Berawan', contoh['durasi'], contoh['tingkat'], contoh['rules']),
+        number=1000, repeat=args.repeat)})
+
+def bench_graph(aplikasi, rng, hasil, args):
+    fuzzy = aplikasi.fuzzy_system
+    renderer = fuzzy.graph_renderer
+    nilai = iter(rng.uniform(0, 100, 100000).round(2).tolist())
+
+    # Highlight berbeda setiap panggilan (cache gambar miss, background tetap di-cache)
+    hasil.append({'name': 'graph.generate_membership_graph', 'params': {'cache': 'miss'},
+                  **ukur(lambda: fuzzy.generate_membership_graph(next(nilai)), number=5, repeat=args.repeat)})
+    hasil.append({'name': 'graph.generate_membership_graph', 'params': {'cache': 'hit'},
+                  **ukur(lambda: fuzzy.generate_membership_graph(50.0), number=100, repeat=args.repeat)})
+    hasil.append({'name': 'graph.renderer_stats', 'stats': renderer.stats()})
+
+def bench_database(args, rng, hasil):
+    for rows in args.rows:
+        db = buka_database(args, rows)
+        waktu_isi = isi_database(db, rows, rng)
+        params = {'rows': rows, 'db': args.db}
+        hasil.append({'name': 'db.seed', 'params': params, 'seconds': waktu_isi})
+
+        contoh = next(baris_sintetis(rng, 1, datetime.now()))
+        hasil.append({'name': 'db.save_calculation', 'params': params,
+                      **ukur(lambda: db.save_calculation(contoh), number=20, repeat=args.repeat)})
+        batch = list(baris_sintetis(rng, 1000, datetime.now()))
+        hasil.append({'name': 'db.save_calculations', 'params': {**params, 'batch': 1000},
+                      **ukur(lambda: db.save_calculations(batch), repeat=args.repeat)})
+        hasil.append({'name': 'db.get_calculation_statistics', 'params': {**params, 'cache': False},
+                      **ukur(lambda: db.get_calculation_statistics(use_cache=False), repeat=args.repeat)})
+        hasil.append({'name': 'db.get_calculation_statistics', 'params': {**params, 'cache': True},
+                      **ukur(lambda: db.get_calculation_statistics(), number=1000, repeat=args.repeat)})
+        hasil.append({'name': 'db.iter_calculations', 'params': {**params, 'limit': 1000},
+                      **ukur(lambda: list(db.iter_calculations(limit=1000)), repeat=args.repeat)})
+        db.close_connection()
+
+def bench_calculate(aplikasi, rng, hasil, args):
+    client = aplikasi.app.test_client()
+    token = 'benchmark'
+    aplikasi.session_cache.add(token, datetime.now() + timedelta(hours=1))
+    with client.session_transaction() as session:
+        session['user_id'] = 0
+        session['session_token'] = token
+    nilai = iter(rng.uniform(0, 100, 1000000).round(2).tolist())
+
+    def calculate():
+        response = client.post('/calculate', json={'humidity': next(nilai), 'weather': 'Berawan'})
+        assert response.status_code == 200, response.data
+    hasil.append({'name': 'http.calculate', **ukur(calculate, number=100, repeat=args.repeat)})
+    aplikasi.calculation_writer.flush()
+    hasil.append({'name': 'http.calculate.write_behind', 'stats': aplikasi.calculation_writer.stats()})
+
+def bandingkan(hasil, path):
+    """Cetak perubahan median terhadap file hasil sebelumnya (positif = lebih lambat)"""
+    with open(path) as f:
+        lama = {(r['name'], json.dumps(r.get('params'), sort_keys=True)): r for r in json.load(f)['results']}
+    for r in hasil:
+        sebelum = lama.get((r['name'], json.dumps(r.get('params'), sort_keys=True)))
+        if sebelum and 'median_ms' in r and 'median_ms' in sebelum and sebelum['median_ms']:
+            selisih = (r['median_ms'] - sebelum['median_ms']) / sebelum['median_ms'] * 100
+            r['change_pct'] = round(selisih, 1)
+            print(f"{r['name']:45} {json.dumps(r.get('params', {})):60} {selisih:+7.1f}%")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--compare', help='File JSON hasil sebelumnya untuk dibandingkan')
+    parser.add_argument('--only', nargs='+', choices=['engine', 'graph', 'db', 'http'],
+                        default=['engine', 'graph', 'db', 'http'])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 1000000])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--db', choices=['sqlite', 'mysql'], default='sqlite')
+    parser.add_argument('--workdir', default=None, help='Direktori file SQLite (default direktori sementara)')
+    parser.add_argument('--mysql-host', default='localhost')
+    parser.add_argument('--mysql-port', type=int, default=3306)
+    parser.add_argument('--mysql-user', default='root')
+    parser.add_argument('--mysql-password', default='')
+    parser.add_argument('--mysql-database', default='fuzzy_irrigation_bench')
+    args = parser.parse_args()
+    args.workdir = args.workdir or tempfile.mkdtemp(prefix='fuzzy_bench_')
+
+    import numpy as np
+    rng = np.random.default_rng(args.seed)
+
+    # Aplikasi memakai database SQLite terpisah agar /calculate tidak menulis ke database produksi
+    os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(args.workdir, 'app.db'))
+    os.environ.setdefault('MAINTENANCE_INTERVAL', '0')
+    import app as aplikasi
+
+    hasil = []
+    langkah = {
+        'engine': lambda: bench_engine(aplikasi, rng, hasil, args),
+        'graph': lambda: bench_graph(aplikasi, rng, hasil, args),
+        'db': lambda: bench_database(args, rng, hasil),
+        'http': lambda: bench_calculate(aplikasi, rng, hasil, args)
+    }
+    for nama in args.only:
+        jumlah = len(hasil)
+        langkah[nama]()
+        for r in hasil[jumlah:]:
+            if 'median_ms' in r:
+                print(f"{r['name']:45} {json.dumps(r.get('params', {})):60} {r['median_ms']:12.4f} ms")
+
+    if args.compare:
+        bandingkan(hasil, args.compare)
+
+    with open(args.output, 'w') as f:
+        json.dump({'meta': metadata(args), 'results': hasil}, f, indent=2, default=str)
+    print(f"Hasil disimpan di {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,9 @@
+import os
+import tempfile
+
+# app.py membaca konfigurasi saat import: pakai SQLite sementara, tanpa penjadwal
+# pemeliharaan dan tanpa lookup table kecuali test mengaktifkannya sendiri
+_direktori = tempfile.mkdtemp(prefix='fuzzy-test-')
+os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(_direktori, 'app.db'))
+os.environ.setdefault('MAINTENANCE_INTERVAL', '0')
+os.environ.setdefault('FUZZY_LUT_STEP', '0')
@@ -0,0 +1,154 @@
+import time
+import threading
+from collections import deque
+from typing import Callable, Dict, Optional
+
+class PoolTimeoutError(Exception):
+    """Tidak ada koneksi yang tersedia dalam batas waktu checkout"""
+
+class ConnectionPool:
+    """Pool koneksi database berukuran tetap yang thread-safe
+
+    Koneksi dibuat lazy sampai batas `size`. Health check (ping) hanya
+    dilakukan untuk koneksi yang menganggur lebih lama dari
+    `health_check_interval`, bukan pada setiap checkout.
+    """
+
+    def __init__(self, factory: Callable, size: int = 5, timeout: float = 5.0,
+                 health_check_interval: float = 30.0, ping: Optional[Callable] = None,
+                 reset: Optional[Callable] = None, close: Optional[Callable] = None):
+        if size < 1:
+            raise ValueError("Ukuran pool minimal 1")
+        self.factory = factory
+        self.size = size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self._ping = ping
+        self._reset = reset
+        self._close = close or (lambda conn: conn.close())
+
+        self._idle = deque()  # (koneksi, waktu terakhir diketahui sehat)
+        self._cond = threading.Condition()
+        self._created = 0
+        self._closed = False
+
+        # Metrik pool
+        self.in_use = 0
+        self.checkouts = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.health_checks = 0
+        self.discarded = 0
+        self._checkout_time_total = 0.0
+        self._checkout_time_max = 0.0
+
+    def acquire(self, timeout: Optional[float] = None):
+        """Ambil koneksi dari pool, tunggu maksimal `timeout` detik jika pool penuh"""
+        start = time.perf_counter()
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        conn = None
+        checked_at = None
+
+        with self._cond:
+            waited = False
+            while True:
+                if self._closed:
+                    raise PoolTimeoutError("Pool koneksi sudah ditutup")
+                if self._idle:
+                    conn, checked_at = self._idle.pop()
+                    break
+                if self._created < self.size:
+                    self._created += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise PoolTimeoutError(f"Tidak ada koneksi tersedia dalam {self.timeout} detik")
+                if not waited:
+                    self.waits += 1
+                    waited = True
+                self._cond.wait(remaining)
+            self.in_use += 1
+
+        try:
+            if conn is not None and self._ping and time.monotonic() - checked_at > self.health_check_interval:
+                with self._cond:
+                    self.health_checks += 1
+                try:
+                    sehat = self._ping(conn)
+                except Exception:
+                    sehat = False
+                if not sehat:
+                    # Koneksi mati (ping gagal atau error) ditutup lalu diganti koneksi baru
+                    self._discard(conn)
+                    conn = None
+            if conn is None:
+                conn = self.factory()
+        except Exception:
+            with self._cond:
+                self.in_use -= 1
+                self._created -= 1
+                self._cond.notify()
+            raise
+
+        elapsed = time.perf_counter() - start
+        with self._cond:
+            self.checkouts += 1
+            self._checkout_time_total += elapsed
+            self._checkout_time_max = max(self._checkout_time_max, elapsed)
+        return conn
+
+    def release(self, conn, broken: bool = False):
+        """Kembalikan koneksi ke pool; koneksi rusak ditutup dan slotnya dibebaskan"""
+        if not broken and self._reset:
+            try:
+                self._reset(conn)
+            except Exception:
+                broken = True
+
+        with self._cond:
+            self.in_use -= 1
+            if broken or self._closed:
+                self._created -= 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+        if broken or self._closed:
+            self._discard(conn)
+
+    def _discard(self, conn):
+        with self._cond:
+            self.discarded += 1
+        try:
+            self._close(conn)
+        except Exception:
+            pass
+
+    def close_all(self):
+        """Tutup semua koneksi yang menganggur; koneksi yang sedang dipakai ditutup saat dikembalikan"""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._created -= len(idle)
+            self._cond.notify_all()
+        for conn, _ in idle:
+            self._discard(conn)
+
+    def stats(self) -> Dict:
+        """Metrik pool untuk monitoring"""
+        with self._cond:
+            return {
+                'size': self.size,
+                'created': self._created,
+                'idle': len(self._idle),
+                'in_use': self.in_use,
+                'checkouts': self.checkouts,
+                'waits': self.waits,
+                'timeouts': self.timeouts,
+                'health_checks': self.health_checks,
+                'discarded': self.discarded,
+                'checkout_ms_avg': round(self._checkout_time_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                'checkout_ms_max': round(self._checkout_time_max * 1000, 3)
+            }
@@ -1,396 +1,1082 @@
-import mysql.connector
-from mysql.connector import Error
 import os
-from datetime import datetime
-from typing import List, Dict, Optional
+import json
+import logging
+import time
+import base64
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+from decimal import Decimal, ROUND_HALF_UP
+from connection_pool import ConnectionPool, PoolTimeoutError
+from db_backends import Error, MySQLBackend
+
+logger = logging.getLogger(__name__)
+
+INSERT_CALCULATION_QUERY = """
+    INSERT INTO fuzzy_calculations 
+    (kelembaban_input, cuaca_input, durasi_output, tingkat_kebutuhan,
+     kelembaban_tanah, suhu, kelembaban_udara, curah_hujan, status_pompa,
+     timestamp, created_at, zona)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+# Rentang kelembaban untuk statistik (batas sama dengan CASE di SQL)
+HUMIDITY_RANGES = [(30, 'Rendah (0-29%)'), (60, 'Sedang (30-59%)'), (None, 'Tinggi (60-100%)')]
+HUMIDITY_RANGE_SQL = """
+    CASE 
+        WHEN kelembaban_input < 30 THEN 'Rendah (0-29%)'
+        WHEN kelembaban_input < 60 THEN 'Sedang (30-59%)'
+        ELSE 'Tinggi (60-100%)'
+    END
+"""
+
+def rebuild_rollup_queries(rollup_periode: Dict[str, str]) -> List[str]:
+    """Query backfill rollup dari fuzzy_calculations; ekspresi periode sesuai backend"""
+    return [
+        f"""
+            INSERT INTO calculation_rollups 
+            (granularitas, periode, cuaca_input, tingkat_kebutuhan, rentang_kelembaban,
+             jumlah, total_durasi, min_durasi, max_durasi)
+            SELECT '{granularitas}', {periode} as periode, cuaca_input, tingkat_kebutuhan,
+                   {HUMIDITY_RANGE_SQL} as rentang_kelembaban,
+                   COUNT(*), SUM(durasi_output), MIN(durasi_output), MAX(durasi_output)
+            FROM fuzzy_calculations 
+            GROUP BY periode, cuaca_input, tingkat_kebutuhan, rentang_kelembaban
+        """
+        for granularitas, periode in rollup_periode.items()
+    ]
+
+# Pengurangan rollup untuk baris fuzzy_calculations yang dihapus retensi
+DECREMENT_ROLLUP_QUERY = """
+    UPDATE calculation_rollups
+    SET jumlah = jumlah - %s, total_durasi = total_durasi - %s
+    WHERE granularitas = %s AND periode = %s AND cuaca_input = %s
+      AND tingkat_kebutuhan = %s AND rentang_kelembaban = %s
+"""
+# Kolom fuzzy_calculations yang menentukan bucket rollup
+ROLLUP_SOURCE_COLUMNS = 'kelembaban_input, cuaca_input, durasi_output, tingkat_kebutuhan, created_at'
+
+INSERT_SENSOR_READING_QUERY = """
+    INSERT INTO sensor_readings 
+    (device_id, recorded_at, kelembaban_tanah, suhu, kelembaban_udara, curah_hujan)
+    VALUES (%s, %s, %s, %s, %s, %s)
+"""
+
+# Tabel yang dapat dibersihkan per chunk beserta kolom waktu ber-index yang menjadi batas
+RETENTION_TABLES = {
+    'fuzzy_calculations': 'created_at',
+    'sensor_readings': 'recorded_at',
+    'user_sessions': 'expires_at'
+}
+
+# Partisi bulanan fuzzy_calculations (RANGE COLUMNS created_at): pYYYYMM berisi
+# satu bulan, p_max menampung baris di luar partisi yang sudah dibuat
+PARTITION_MAX = 'p_max'
+PARTITION_INFO_QUERY = """
+    SELECT PARTITION_NAME, PARTITION_DESCRIPTION
+    FROM information_schema.PARTITIONS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+    ORDER BY PARTITION_ORDINAL_POSITION
+"""
+
+def month_start(value: datetime, offset: int = 0) -> datetime:
+    """Awal bulan `value` digeser `offset` bulan"""
+    bulan = value.year * 12 + value.month - 1 + offset
+    return datetime(bulan // 12, bulan % 12 + 1, 1)
+
+def humidity_range(kelembaban) -> str:
+    """Label rentang kelembaban untuk nilai yang disimpan sebagai DECIMAL(5,2)"""
+    nilai = Decimal(str(kelembaban)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+    for batas, label in HUMIDITY_RANGES:
+        if batas is None or nilai < batas:
+            return label
+
+def encode_cursor(row: Dict) -> str:
+    """Cursor keyset (created_at, id) dari baris terakhir sebuah halaman"""
+    raw = json.dumps([row['created_at'].isoformat(), row['id']])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(token: str) -> Tuple[datetime, int]:
+    """Kebalikan encode_cursor; ValueError jika cursor tidak valid"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        created_at, calculation_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(calculation_id)
+    except Exception:
+        raise ValueError("Cursor tidak valid")
+
+def _as_datetime(value) -> Optional[datetime]:
+    """Ubah timestamp (datetime/string) menjadi datetime tanpa mikrodetik"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.replace(microsecond=0)
 
 class FuzzyDatabase:
     def __init__(self, host: str = "localhost", database: str = "fuzzy_irrigation", 
-                 user: str = "root", password: str = "", port: int = 3306):
-        self.host = host
-        self.database = database
-        self.user = user
-        self.password = password
-        self.port = port
-        self.connection = None
+                 user: str = "root", password: str = "", port: int = 3306,
+                 pool_size: int = 5, pool_timeout: float = 5.0, health_check_interval: float = 30.0,
+                 statistics_ttl: float = 60.0, partition_months_ahead: int = 3, backend=None):
+        # Backend penyimpanan: MySQL (default) atau SQLiteBackend untuk gateway tanpa server
+        self.backend = backend or MySQLBackend(host, database, user, password, port)
+        self.database = self.backend.database
+
+        # Pool koneksi bersama untuk semua thread request
+        self.pool = ConnectionPool(
+            self.backend.connect,
+            size=pool_size,
+            timeout=pool_timeout,
+            health_check_interval=health_check_interval,
+            ping=self.backend.ping,
+            reset=self.backend.reset,
+        )
+
+        # Cache statistik (TTL), dibatalkan setiap ada perhitungan baru tersimpan
+        self.statistics_ttl = statistics_ttl
+        self._statistics_cache = None  # (waktu kedaluwarsa, hasil)
+        self._statistics_versi = 0
+        self._statistics_lock = threading.Lock()
+        self.statistics_hits = 0
+        self.statistics_misses = 0
+
+        # Jumlah partisi bulan depan yang disiapkan jika tabel dipartisi
+        self.partition_months_ahead = partition_months_ahead
         self.connect()
     
     def connect(self):
-        """Create connection to MySQL database"""
+        """Open the first pooled connection and prepare the schema"""
         try:
-            self.connection = mysql.connector.connect(
-                host=self.host,
-                database=self.database,
-                user=self.user,
-                password=self.password,
-                port=self.port
-            )
-            if self.connection.is_connected():
-                print(f"Successfully connected to MySQL database: {self.database}")
-        except Error as e:
-            print(f"Error connecting to MySQL database: {e}")
-            self.connection = None
-    
-    def get_connection(self):
-        """Get database connection, reconnect if needed"""
-        if not self.connection or not self.connection.is_connected():
-            self.connect()
-        return self.connection
+            with self.connection() as connection:
+                if not connection:
+                    return
+                cursor = connection.cursor()
+                try:
+                    self.backend.initialize(cursor)
+                finally:
+                    cursor.close()
+            logger.info("Successfully connected to database: %s", self.backend)
+            self.ensure_calculation_columns()
+            self.ensure_rollup_table()
+            self.ensure_sensor_table()
+            self.ensure_partitions()
+        except Error + (PoolTimeoutError,) as e:
+            logger.error("Error connecting to database: %s", e)
+
+    @contextmanager
+    def connection(self):
+        """Pinjam koneksi dari pool (None jika gagal), otomatis dikembalikan"""
+        try:
+            connection = self.pool.acquire()
+        except Error + (PoolTimeoutError,) as e:
+            logger.error("Error getting database connection: %s", e)
+            yield None
+            return
+
+        broken = False
+        try:
+            yield connection
+        except self.backend.broken_errors:
+            broken = True
+            raise
+        finally:
+            self.pool.release(connection, broken=broken)
+
+    def pool_stats(self) -> Dict:
+        """Metrik pool koneksi (in-use, waits, latensi checkout)"""
+        return self.pool.stats()
+
+    def invalidate_statistics(self):
+        """Batalkan cache statistik setelah data perhitungan berubah"""
+        with self._statistics_lock:
+            self._statistics_versi += 1
+            self._statistics_cache = None
     
+    @staticmethod
+    def _calculation_values(calculation_data: Dict) -> tuple:
+        """Susun nilai kolom INSERT fuzzy_calculations dari dict hasil perhitungan"""
+        # created_at mengikuti waktu request (bukan waktu flush batch) dan dipotong
+        # ke detik agar sama dengan nilai DATETIME yang tersimpan untuk rollup
+        created_at = _as_datetime(calculation_data.get('created_at', calculation_data.get('timestamp')))
+        return (
+            calculation_data.get('kelembaban_input'),
+            calculation_data.get('cuaca_input'),
+            calculation_data.get('durasi_output'),
+            calculation_data.get('tingkat_kebutuhan'),
+            calculation_data.get('kelembaban_tanah'),
+            calculation_data.get('suhu'),
+            calculation_data.get('kelembaban_udara'),
+            calculation_data.get('curah_hujan'),
+            calculation_data.get('status_pompa'),
+            calculation_data.get('timestamp'),
+            created_at or datetime.now().replace(microsecond=0),
+            calculation_data.get('zona')
+        )
+
+    def _upsert_rollups(self, cursor, values: List[tuple]):
+        """Tambahkan baris baru ke agregat per jam/per hari (dalam transaksi yang sama)"""
+        cursor.executemany(self.backend.upsert_rollup_query,
+                           self._rollup_rows([row[:4] + (row[10],) for row in values]))
+
+    def _decrement_rollups(self, cursor, rows: List[Dict], cutoff: datetime):
+        """Kurangi agregat untuk baris yang dihapus (dalam transaksi yang sama dengan DELETE)
+
+        jumlah dan total_durasi dikurangi tepat; min/max bucket yang hanya
+        sebagian terhapus tidak dihitung ulang. Bucket yang kosong dihapus.
+        """
+        agregat = self._rollup_rows([
+            (row['kelembaban_input'], row['cuaca_input'], row['durasi_output'],
+             row['tingkat_kebutuhan'], _as_datetime(row['created_at']))
+            for row in rows
+        ])
+        # (granularitas, periode, cuaca, tingkat, rentang, jumlah, total, min, max)
+        cursor.executemany(DECREMENT_ROLLUP_QUERY, [row[5:7] + row[:5] for row in agregat])
+        # Semua bucket yang terpengaruh berperiode sebelum cutoff
+        cursor.execute("DELETE FROM calculation_rollups WHERE jumlah <= 0 AND periode < %s", (cutoff,))
+
+    @staticmethod
+    def _rollup_rows(rows: List[tuple]) -> List[tuple]:
+        """Baris upsert rollup dari (kelembaban, cuaca, durasi, tingkat, created_at)"""
+        agregat = {}
+        for kelembaban, cuaca, durasi, tingkat, created_at in rows:
+            durasi = float(durasi)
+            rentang = humidity_range(kelembaban)
+            for granularitas, periode in (
+                ('jam', created_at.replace(minute=0, second=0)),
+                ('hari', created_at.replace(hour=0, minute=0, second=0))
+            ):
+                key = (granularitas, periode, cuaca, tingkat, rentang)
+                item = agregat.get(key)
+                if item is None:
+                    agregat[key] = [1, durasi, durasi, durasi]
+                else:
+                    item[0] += 1
+                    item[1] += durasi
+                    item[2] = min(item[2], durasi)
+                    item[3] = max(item[3], durasi)
+
+        # Urutan kunci tetap agar transaksi paralel mengunci baris rollup dengan urutan sama
+        return [key + tuple(item) for key, item in sorted(agregat.items())]
+
     def save_calculation(self, calculation_data: Dict) -> int:
         """Save fuzzy calculation result to database"""
-        connection = self.get_connection()
-        if not connection:
-            raise Exception("Database connection failed")
+        with self.connection() as connection:
+            if not connection:
+                raise Exception("Database connection failed")
             
-        cursor = connection.cursor()
+            cursor = connection.cursor()
         
-        try:
-            insert_query = """
-                INSERT INTO fuzzy_calculations 
-                (kelembaban_input, cuaca_input, durasi_output, tingkat_kebutuhan,
-                 kelembaban_tanah, suhu, kelembaban_udara, curah_hujan, status_pompa, timestamp)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """
-            
-            values = (
-                calculation_data.get('kelembaban_input'),
-                calculation_data.get('cuaca_input'),
-                calculation_data.get('durasi_output'),
-                calculation_data.get('tingkat_kebutuhan'),
-                calculation_data.get('kelembaban_tanah'),
-                calculation_data.get('suhu'),
-                calculation_data.get('kelembaban_udara'),
-                calculation_data.get('curah_hujan'),
-                calculation_data.get('status_pompa'),
-                calculation_data.get('timestamp')
-            )
-            
-            cursor.execute(insert_query, values)
-            connection.commit()
-            
-            calculation_id = cursor.lastrowid
-            return calculation_id
-            
-        except Error as e:
-            print(f"Database error: {e}")
-            connection.rollback()
-            raise e
-        finally:
-            cursor.close()
+            try:
+                values = self._calculation_values(calculation_data)
+            
+                connection.start_transaction()
+                cursor.execute(INSERT_CALCULATION_QUERY, values)
+                calculation_id = cursor.lastrowid
+                self._upsert_rollups(cursor, [values])
+                connection.commit()
+                self.invalidate_statistics()
+            
+                return calculation_id
+            
+            except Error as e:
+                logger.error("Database error: %s", e)
+                connection.rollback()
+                raise e
+            finally:
+                cursor.close()
     
-    def get_all_calculations(self, limit: int = 100) -> List[Dict]:
-        """Get all calculations from database"""
-        connection = self.get_connection()
-        if not connection:
-            return []
+    def save_calculations(self, calculations: List[Dict]) -> int:
+        """Save many fuzzy calculation results in one batch (executemany + satu commit)"""
+        if not calculations:
+            return 0
+
+        with self.connection() as connection:
+            if not connection:
+                raise Exception("Database connection failed")
             
-        cursor = connection.cursor(dictionary=True)
+            cursor = connection.cursor()
         
-        try:
-            cursor.execute("""
-                SELECT * FROM fuzzy_calculations 
-                ORDER BY created_at DESC 
-                LIMIT %s
-            """, (limit,))
+            try:
+                values = [self._calculation_values(calculation_data) for calculation_data in calculations]
+            
+                connection.start_transaction()
+                cursor.executemany(INSERT_CALCULATION_QUERY, values)
+                self._upsert_rollups(cursor, values)
+                connection.commit()
+                self.invalidate_statistics()
+                return len(values)
+            
+            except Error as e:
+                logger.error("Database error: %s", e)
+                connection.rollback()
+                raise e
+            finally:
+                cursor.close()
+
+    def rebuild_rollups(self) -> int:
+        """Hitung ulang seluruh tabel rollup dari fuzzy_calculations (backfill)"""
+        with self.connection() as connection:
+            if not connection:
+                return 0
+            
+            cursor = connection.cursor()
+        
+            try:
+                connection.start_transaction()
+                cursor.execute("DELETE FROM calculation_rollups")
+                total = 0
+                for query in rebuild_rollup_queries(self.backend.rollup_periode):
+                    cursor.execute(query)
+                    total += cursor.rowcount
+                connection.commit()
+                self.invalidate_statistics()
+                return total
+            
+            except Error as e:
+                logger.error("Database error: %s", e)
+                connection.rollback()
+                return 0
+            finally:
+                cursor.close()
+
+    def save_sensor_readings(self, readings: List[tuple]) -> int:
+        """Save sensor readings (device_id, recorded_at, 4 nilai sensor) dengan multi-row insert"""
+        if not readings:
+            return 0
+
+        with self.connection() as connection:
+            if not connection:
+                raise Exception("Database connection failed")
+            
+            cursor = connection.cursor()
+        
+            try:
+                connection.start_transaction()
+                cursor.executemany(INSERT_SENSOR_READING_QUERY, readings)
+                connection.commit()
+                return len(readings)
+            
+            except Error as e:
+                logger.error("Database error: %s", e)
+                connection.rollback()
+                raise e
+            finally:
+                cursor.close()
+
+    def get_sensor_readings_after(self, after_id: int, limit: int = 5000) -> List[tuple]:
+        """Reading (id, device_id, 4 nilai sensor) dengan id > `after_id`, urut id"""
+        with self.connection() as connection:
+            if not connection:
+                raise Exception("Database connection failed")
+            
+            cursor = connection.cursor()
+        
+            try:
+                cursor.execute("""
+                    SELECT id, device_id, kelembaban_tanah, suhu, kelembaban_udara, curah_hujan
+                    FROM sensor_readings 
+                    WHERE id > %s
+                    ORDER BY id
+                    LIMIT %s
+                """, (after_id, limit))
+                return cursor.fetchall()
+            finally:
+                cursor.close()
+
+    def last_sensor_reading_id(self) -> int:
+        """Id reading sensor terbaru (0 jika tabel kosong)"""
+        with self.connection() as connection:
+            if not connection:
+                raise Exception("Database connection failed")
+            
+            cursor = connection.cursor()
+        
+            try:
+                cursor.execute("SELECT COALESCE(MAX(id), 0) FROM sensor_readings")
+                return int(cursor.fetchone()[0])
+            finally:
+                cursor.close()
+
+    def ensure_calculation_columns(self):
+        """Tambahkan kolom baru fuzzy_calculations yang belum ada (database lama)"""
+        with self.connection() as connection:
+            if not connection:
+                return
+            
+            cursor = connection.cursor()
+        
+            try:
+                for kolom, queries in self.backend.add_calculation_columns.items():
+                    if not self.backend.column_exists(cursor, 'fuzzy_calculations', kolom):
+                        for query in queries:
+                            cursor.execute(query)
+                        logger.info("Column fuzzy_calculations.%s added", kolom)
+            except Error as e:
+                logger.error("Database error: %s", e)
+            finally:
+                cursor.close()
+
+    def ensure_sensor_table(self):
+        """Buat tabel sensor_readings jika belum ada (database lama)"""
+        with self.connection() as connection:
+            if not connection:
+                return
             
-            results = cursor.fetchall()
-            return results
+            cursor = connection.cursor()
+        
+            try:
+                for query in self.backend.create_sensor_table_queries:
+                    cursor.execute(query)
+            except Error as e:
+                logger.error("Database error: %s", e)
+            finally:
+                cursor.close()
+
+    def ensure_rollup_table(self):
+        """Buat tabel rollup jika belum ada (database lama) lalu isi dari data yang ada"""
+        with self.connection() as connection:
+            if not connection:
+                return
             
-        except Error as e:
-            print(f"Database error: {e}")
+            cursor = connection.cursor()
+        
+            try:
+                ada = self.backend.table_exists(cursor, 'calculation_rollups')
+                if not ada:
+                    cursor.execute(self.backend.create_rollup_table_query)
+            except Error as e:
+                logger.error("Database error: %s", e)
+                return
+            finally:
+                cursor.close()
+
+        if not ada:
+            logger.info("Rollup table created, %s rollup rows backfilled", self.rebuild_rollups())
+    
+    def iter_calculations(self, weather_condition: Optional[str] = None, since: Optional[datetime] = None,
+                          after: Optional[Tuple[datetime, int]] = None, limit: Optional[int] = None,
+                          chunk_size: int = 500) -> Iterator[Dict]:
+        """Iterasi perhitungan terbaru dulu, diambil per chunk dengan keyset (created_at, id)
+
+        Setiap chunk memakai query sendiri dan koneksi dikembalikan ke pool
+        sebelum baris di-yield, sehingga memori dan pemakaian koneksi tetap
+        konstan berapapun jumlah hasilnya. `after` adalah posisi (created_at, id)
+        baris terakhir halaman sebelumnya (lihat decode_cursor).
+        """
+        sisa = limit
+        while sisa is None or sisa > 0:
+            kondisi = []
+            params = []
+            if weather_condition:
+                kondisi.append("cuaca_input = %s")
+                params.append(weather_condition)
+            if since:
+                kondisi.append("created_at >= %s")
+                params.append(since)
+            if after:
+                kondisi.append("(created_at < %s OR (created_at = %s AND id < %s))")
+                params.extend([after[0], after[0], after[1]])
+            ukuran = chunk_size if sisa is None else min(chunk_size, sisa)
+            params.append(ukuran)
+
+            with self.connection() as connection:
+                if not connection:
+                    raise Exception("Database connection failed")
+                
+                cursor = connection.cursor(dictionary=True)
+            
+                try:
+                    cursor.execute(f"""
+                        SELECT * FROM fuzzy_calculations 
+                        {'WHERE ' + ' AND '.join(kondisi) if kondisi else ''}
+                        ORDER BY created_at DESC, id DESC 
+                        LIMIT %s
+                    """, tuple(params))
+                    rows = cursor.fetchall()
+                finally:
+                    cursor.close()
+
+            yield from rows
+            if len(rows) < ukuran:
+                return
+            after = (rows[-1]['created_at'], rows[-1]['id'])
+            if sisa is not None:
+                sisa -= len(rows)
+
+    def get_all_calculations(self, limit: int = 100) -> List[Dict]:
+        """Get all calculations from database"""
+        try:
+            return list(self.iter_calculations(limit=limit))
+        except Exception as e:
+            logger.error("Database error: %s", e)
             return []
-        finally:
-            cursor.close()
     
-    def get_calculations_by_weather(self, weather_condition: str) -> List[Dict]:
+    def get_calculations_by_weather(self, weather_condition: str, limit: Optional[int] = None) -> List[Dict]:
         """Get calculations filtered by weather condition"""
-        connection = self.get_connection()
-        if not connection:
+        try:
+            return list(self.iter_calculations(weather_condition, limit=limit))
+        except Exception as e:
+            logger.error("Database error: %s", e)
             return []
+    
+    def get_calculation_statistics(self, use_cache: bool = True) -> Dict:
+        """Get statistical insights from calculations (cached selama statistics_ttl detik)"""
+        with self._statistics_lock:
+            cache = self._statistics_cache
+            if use_cache and cache and cache[0] > time.monotonic():
+                self.statistics_hits += 1
+                return cache[1]
+            self.statistics_misses += 1
+            versi = self._statistics_versi
+
+        statistics = self._query_calculation_statistics()
+
+        # Hasil tidak disimpan jika gagal atau ada data baru selama query berjalan
+        if statistics:
+            with self._statistics_lock:
+                if versi == self._statistics_versi:
+                    self._statistics_cache = (time.monotonic() + self.statistics_ttl, statistics)
+        return statistics
+
+    def _query_calculation_statistics(self) -> Dict:
+        """Hitung semua statistik dari tabel rollup (tanpa scan fuzzy_calculations)
+
+        Retensi mengurangi rollup bersama baris yang dihapus, sehingga angka
+        ini sama dengan isi fuzzy_calculations saat ini.
+        """
+        with self.connection() as connection:
+            if not connection:
+                return {}
             
-        cursor = connection.cursor(dictionary=True)
+            cursor = connection.cursor(dictionary=True)
         
-        try:
-            cursor.execute("""
-                SELECT * FROM fuzzy_calculations 
-                WHERE cuaca_input = %s
-                ORDER BY created_at DESC
-            """, (weather_condition,))
+            try:
+                # Rollup harian; distribusi per dimensi dijumlahkan di Python
+                cursor.execute("""
+                    SELECT cuaca_input, tingkat_kebutuhan, rentang_kelembaban,
+                           SUM(jumlah) as count, SUM(total_durasi) as total_duration
+                    FROM calculation_rollups 
+                    WHERE granularitas = 'hari'
+                    GROUP BY cuaca_input, tingkat_kebutuhan, rentang_kelembaban
+                """)
+                
+                total_calculations = 0
+                weather_dist = {}
+                weather_duration = {}
+                need_dist = {}
+                humidity_ranges = {}
+                for row in cursor.fetchall():
+                    count = int(row['count'])
+                    cuaca = row['cuaca_input']
+                    total_calculations += count
+                    weather_dist[cuaca] = weather_dist.get(cuaca, 0) + count
+                    weather_duration[cuaca] = weather_duration.get(cuaca, 0) + float(row['total_duration'] or 0)
+                    need_dist[row['tingkat_kebutuhan']] = need_dist.get(row['tingkat_kebutuhan'], 0) + count
+                    humidity_ranges[row['rentang_kelembaban']] = humidity_ranges.get(row['rentang_kelembaban'], 0) + count
+                
+                avg_duration = {
+                    cuaca: round(weather_duration[cuaca] / count, 2)
+                    for cuaca, count in weather_dist.items()
+                }
+                
+                # Recent calculations (last 7 days) dari rollup per jam
+                cursor.execute("""
+                    SELECT COALESCE(SUM(jumlah), 0) as recent_count 
+                    FROM calculation_rollups 
+                    WHERE granularitas = 'jam' AND periode >= %s
+                """, (datetime.now() - timedelta(days=7),))
+                recent_result = cursor.fetchone()
+                recent_calculations = int(recent_result['recent_count']) if recent_result else 0
             
-            results = cursor.fetchall()
-            return results
+                return {
+                    'total_calculations': total_calculations,
+                    'weather_distribution': weather_dist,
+                    'avg_duration_by_weather': avg_duration,
+                    'need_level_distribution': need_dist,
+                    'recent_calculations': recent_calculations,
+                    'humidity_ranges': humidity_ranges,
+                    'generated_at': datetime.now().isoformat()
+                }
             
-        except Error as e:
-            print(f"Database error: {e}")
-            return []
-        finally:
-            cursor.close()
-    
-    def get_calculation_statistics(self) -> Dict:
-        """Get statistical insights from calculations"""
-        connection = self.get_connection()
-        if not connection:
-            return {}
+            except Error as e:
+                logger.error("Database error: %s", e)
+                return {}
+            finally:
+                cursor.close()
+
+    def get_calculation_trends(self, granularitas: str = 'hari', days: int = 30) -> List[Dict]:
+        """Tren perhitungan per jam/per hari dari tabel rollup"""
+        if granularitas not in ('jam', 'hari'):
+            raise ValueError("Granularitas harus 'jam' atau 'hari'")
+
+        with self.connection() as connection:
+            if not connection:
+                return []
             
-        cursor = connection.cursor(dictionary=True)
+            cursor = connection.cursor(dictionary=True)
         
-        try:
-            # Total calculations
-            cursor.execute("SELECT COUNT(*) as total FROM fuzzy_calculations")
-            total_result = cursor.fetchone()
-            total_calculations = total_result['total'] if total_result else 0
-            
-            # Weather distribution
-            cursor.execute("""
-                SELECT cuaca_input, COUNT(*) as count 
-                FROM fuzzy_calculations 
-                GROUP BY cuaca_input
-            """)
-            weather_dist = {row['cuaca_input']: row['count'] for row in cursor.fetchall()}
-            
-            # Average duration by weather
-            cursor.execute("""
-                SELECT cuaca_input, AVG(durasi_output) as avg_duration 
-                FROM fuzzy_calculations 
-                GROUP BY cuaca_input
-            """)
-            avg_duration = {row['cuaca_input']: round(row['avg_duration'], 2) for row in cursor.fetchall()}
-            
-            # Need level distribution
-            cursor.execute("""
-                SELECT tingkat_kebutuhan, COUNT(*) as count 
-                FROM fuzzy_calculations 
-                GROUP BY tingkat_kebutuhan
-            """)
-            need_dist = {row['tingkat_kebutuhan']: row['count'] for row in cursor.fetchall()}
-            
-            # Recent calculations (last 7 days)
-            cursor.execute("""
-                SELECT COUNT(*) as recent_count 
-                FROM fuzzy_calculations 
-                WHERE created_at >= DATE_SUB(NOW(), INTERVAL 7 DAY)
-            """)
-            recent_result = cursor.fetchone()
-            recent_calculations = recent_result['recent_count'] if recent_result else 0
-            
-            # Humidity ranges
-            cursor.execute("""
-                SELECT 
-                    CASE 
-                        WHEN kelembaban_input < 30 THEN 'Rendah (0-29%)'
-                        WHEN kelembaban_input < 60 THEN 'Sedang (30-59%)'
-                        ELSE 'Tinggi (60-100%)'
-                    END as humidity_range,
-                    COUNT(*) as count
-                FROM fuzzy_calculations 
-                GROUP BY humidity_range
-            """)
-            humidity_ranges = {row['humidity_range']: row['count'] for row in cursor.fetchall()}
-            
-            return {
-                'total_calculations': total_calculations,
-                'weather_distribution': weather_dist,
-                'avg_duration_by_weather': avg_duration,
-                'need_level_distribution': need_dist,
-                'recent_calculations': recent_calculations,
-                'humidity_ranges': humidity_ranges,
-                'generated_at': datetime.now().isoformat()
-            }
-            
-        except Error as e:
-            print(f"Database error: {e}")
-            return {}
-        finally:
-            cursor.close()
+            try:
+                cursor.execute("""
+                    SELECT periode, cuaca_input, tingkat_kebutuhan, rentang_kelembaban,
+                           jumlah, total_durasi, min_durasi, max_durasi
+                    FROM calculation_rollups 
+                    WHERE granularitas = %s AND periode >= %s
+                    ORDER BY periode
+                """, (granularitas, datetime.now() - timedelta(days=days)))
+                
+                trends = {}
+                for row in cursor.fetchall():
+                    periode = row['periode']
+                    item = trends.get(periode)
+                    if item is None:
+                        item = trends[periode] = {
+                            'periode': periode.isoformat(),
+                            'count': 0,
+                            'total_duration': 0.0,
+                            'min_duration': None,
+                            'max_duration': None,
+                            'weather_distribution': {},
+                            'need_level_distribution': {},
+                            'humidity_ranges': {}
+                        }
+                    count = int(row['jumlah'])
+                    min_durasi, max_durasi = float(row['min_durasi']), float(row['max_durasi'])
+                    item['count'] += count
+                    item['total_duration'] += float(row['total_durasi'])
+                    item['min_duration'] = min_durasi if item['min_duration'] is None else min(item['min_duration'], min_durasi)
+                    item['max_duration'] = max_durasi if item['max_duration'] is None else max(item['max_duration'], max_durasi)
+                    for field, key in (('weather_distribution', row['cuaca_input']),
+                                       ('need_level_distribution', row['tingkat_kebutuhan']),
+                                       ('humidity_ranges', row['rentang_kelembaban'])):
+                        item[field][key] = item[field].get(key, 0) + count
+                
+                result = []
+                for item in trends.values():
+                    item['avg_duration'] = round(item.pop('total_duration') / item['count'], 2)
+                    result.append(item)
+                return result
+            
+            except Error as e:
+                logger.error("Database error: %s", e)
+                return []
+            finally:
+                cursor.close()
     
     def get_recent_calculations(self, limit: int = 10) -> List[Dict]:
         """Get recent calculations"""
-        connection = self.get_connection()
-        if not connection:
-            return []
-            
-        cursor = connection.cursor(dictionary=True)
-        
         try:
-            cursor.execute("""
-                SELECT * FROM fuzzy_calculations 
-                ORDER BY created_at DESC 
-                LIMIT %s
-            """, (limit,))
-            
-            results = cursor.fetchall()
-            return results
-            
-        except Error as e:
-            print(f"Database error: {e}")
+            return list(self.iter_calculations(limit=limit))
+        except Exception as e:
+            logger.error("Database error: %s", e)
             return []
-        finally:
-            cursor.close()
     
-    def delete_old_calculations(self, days_old: int = 30) -> int:
-        """Delete calculations older than specified days"""
-        connection = self.get_connection()
-        if not connection:
+    def delete_old_calculations(self, days_old: int = 30, chunk_size: int = 1000,
+                                pause: float = 0.1, archive=None) -> int:
+        """Delete calculations older than specified days (rollup ikut dikurangi)"""
+        cutoff = datetime.now() - timedelta(days=days_old)
+        try:
+            return self.purge_calculations(cutoff, chunk_size, pause, archive)
+        except Exception as e:
+            logger.error("Database error: %s", e)
             return 0
+
+    def purge_rows(self, table: str, cutoff: datetime, chunk_size: int = 1000,
+                   pause: float = 0.1, archive=None, max_chunks: Optional[int] = None) -> int:
+        """Hapus baris yang lebih lama dari `cutoff` per chunk dengan jeda antar transaksi
+
+        Setiap chunk memilih maksimal `chunk_size` id lewat index kolom waktu
+        lalu menghapusnya berdasarkan primary key dalam transaksi pendek,
+        sehingga lock InnoDB tidak ditahan lama dan koneksi kembali ke pool
+        di antara chunk. Jika `archive(table, rows)` diberikan, baris disimpan
+        dulu dan tidak dihapus bila arsip gagal.
+        """
+        kolom_waktu = RETENTION_TABLES[table]
+        rollup = table == 'fuzzy_calculations'
+        kolom = '*' if archive else f'id, {ROLLUP_SOURCE_COLUMNS}' if rollup else 'id'
+        total = 0
+        chunk = 0
+        while max_chunks is None or chunk < max_chunks:
+            with self.connection() as connection:
+                if not connection:
+                    raise Exception("Database connection failed")
+                
+                cursor = connection.cursor(dictionary=True)
+            
+                try:
+                    cursor.execute(f"""
+                        SELECT {kolom} FROM {table}
+                        WHERE {kolom_waktu} < %s
+                        ORDER BY {kolom_waktu}, id
+                        LIMIT %s
+                    """, (cutoff, chunk_size))
+                    rows = cursor.fetchall()
+                    if not rows:
+                        break
+                    if archive:
+                        archive(table, rows)
+                    ids = [row['id'] for row in rows]
+                    placeholder = ', '.join(['%s'] * len(ids))
+                    if rollup:
+                        # Rollup dikurangi bersama DELETE agar statistik tetap sama dengan isi tabel
+                        connection.start_transaction()
+                    cursor.execute(f"DELETE FROM {table} WHERE id IN ({placeholder})", ids)
+                    total += cursor.rowcount
+                    if rollup:
+                        self._decrement_rollups(cursor, rows, cutoff)
+                        connection.commit()
+                except Error as e:
+                    logger.error("Database error purging %s: %s", table, e)
+                    if rollup and connection.in_transaction:
+                        connection.rollback()
+                    raise e
+                finally:
+                    cursor.close()
+
+            chunk += 1
+            if table == 'fuzzy_calculations':
+                self.invalidate_statistics()
+            if len(rows) < chunk_size:
+                break
+            time.sleep(pause)
+        return total
+
+    def calculation_partitions(self) -> Optional[List[Tuple[str, Optional[datetime]]]]:
+        """Daftar (nama partisi, batas atas) fuzzy_calculations; None jika tabel tidak dipartisi"""
+        if not self.backend.supports_partitions:
+            return None
+        with self.connection() as connection:
+            if not connection:
+                raise Exception("Database connection failed")
             
-        cursor = connection.cursor()
+            cursor = connection.cursor()
         
+            try:
+                cursor.execute(PARTITION_INFO_QUERY, ('fuzzy_calculations',))
+                rows = cursor.fetchall()
+            finally:
+                cursor.close()
+
+        if not rows or rows[0][0] is None:
+            return None
+        partisi = []
+        for nama, batas in rows:
+            batas = batas.strip("'")
+            partisi.append((nama, None if batas == 'MAXVALUE' else datetime.fromisoformat(batas)))
+        return partisi
+
+    def ensure_partitions(self, months_ahead: Optional[int] = None) -> List[str]:
+        """Pecah p_max menjadi partisi bulanan sampai `months_ahead` bulan ke depan
+
+        Tidak melakukan apa pun jika fuzzy_calculations tidak dipartisi.
+        Mengembalikan nama partisi yang dibuat.
+        """
+        if months_ahead is None:
+            months_ahead = self.partition_months_ahead
         try:
-            cursor.execute("""
-                DELETE FROM fuzzy_calculations 
-                WHERE created_at < DATE_SUB(NOW(), INTERVAL %s DAY)
-            """, (days_old,))
-            
-            connection.commit()
-            deleted_count = cursor.rowcount
-            return deleted_count
-            
-        except Error as e:
-            print(f"Database error: {e}")
-            connection.rollback()
+            partisi = self.calculation_partitions()
+        except Exception as e:
+            logger.error("Database error reading partitions: %s", e)
+            return []
+        if not partisi or partisi[-1][0] != PARTITION_MAX:
+            return []
+
+        batas_terakhir = max((batas for _, batas in partisi if batas), default=None)
+        awal = batas_terakhir or month_start(datetime.now())
+        target = month_start(datetime.now(), months_ahead + 1)
+        baru = []
+        while awal < target:
+            akhir = month_start(awal, 1)
+            baru.append((f"p{awal:%Y%m}", akhir))
+            awal = akhir
+        if not baru:
+            return []
+
+        definisi = ', '.join(f"PARTITION {nama} VALUES LESS THAN ('{batas:%Y-%m-%d}')" for nama, batas in baru)
+        with self.connection() as connection:
+            if not connection:
+                return []
+            
+            cursor = connection.cursor()
+        
+            try:
+                cursor.execute(f"""
+                    ALTER TABLE fuzzy_calculations REORGANIZE PARTITION {PARTITION_MAX} INTO (
+                        {definisi}, PARTITION {PARTITION_MAX} VALUES LESS THAN (MAXVALUE)
+                    )
+                """)
+                return [nama for nama, _ in baru]
+            except Error as e:
+                logger.error("Database error creating partitions: %s", e)
+                return []
+            finally:
+                cursor.close()
+
+    def drop_partitions_before(self, cutoff: datetime) -> int:
+        """DROP PARTITION untuk partisi yang seluruh isinya lebih lama dari `cutoff`
+
+        Mengembalikan jumlah baris yang dihapus; 0 jika tabel tidak dipartisi.
+        """
+        partisi = self.calculation_partitions()
+        if not partisi:
             return 0
-        finally:
-            cursor.close()
+        lama = [nama for nama, batas in partisi if batas is not None and batas <= cutoff]
+        if not lama:
+            return 0
+
+        with self.connection() as connection:
+            if not connection:
+                raise Exception("Database connection failed")
+            
+            cursor = connection.cursor()
+        
+            try:
+                cursor.execute(f"SELECT COUNT(*) FROM fuzzy_calculations PARTITION ({', '.join(lama)})")
+                jumlah = cursor.fetchone()[0]
+                cursor.execute(f"ALTER TABLE fuzzy_calculations DROP PARTITION {', '.join(lama)}")
+                # Partisi dibuang berurutan dari yang tertua, jadi tidak ada lagi baris sebelum
+                # batas partisi terakhir; bucket rollup di periode itu ikut dihapus (DDL di atas
+                # sudah commit sendiri, jika langkah ini gagal rebuild_rollups() menyamakan ulang)
+                batas = max(batas for nama, batas in partisi if nama in lama)
+                cursor.execute("DELETE FROM calculation_rollups WHERE periode < %s", (batas,))
+            except Error as e:
+                logger.error("Database error dropping partitions: %s", e)
+                raise e
+            finally:
+                cursor.close()
+
+        self.invalidate_statistics()
+        return jumlah
+
+    def purge_calculations(self, cutoff: datetime, chunk_size: int = 1000,
+                           pause: float = 0.1, archive=None) -> int:
+        """Retensi fuzzy_calculations: DROP PARTITION untuk bulan yang sudah lewat, sisanya per chunk
+
+        Jika `archive` diberikan, semua baris dihapus per chunk agar tetap
+        diarsipkan; partisi yang kosong tetap di-drop.
+        """
+        total = 0
+        if archive:
+            total += self.purge_rows('fuzzy_calculations', cutoff, chunk_size, pause, archive)
+        total += self.drop_partitions_before(cutoff)
+        if not archive:
+            total += self.purge_rows('fuzzy_calculations', cutoff, chunk_size, pause)
+        return total
+
+    @contextmanager
+    def named_lock(self, name: str):
+        """Lock lintas proses (GET_LOCK di MySQL); menghasilkan True jika lock didapat"""
+        with self.connection() as connection:
+            if not connection:
+                yield False
+                return
+            cursor = connection.cursor()
+            try:
+                lock = self.backend.named_lock(cursor, name)
+                didapat = lock.__enter__()
+            except Error as e:
+                logger.error("Database error acquiring lock %s: %s", name, e)
+                lock, didapat = None, False
+            try:
+                yield didapat
+            finally:
+                if lock is not None:
+                    try:
+                        lock.__exit__(None, None, None)
+                    except Error as e:
+                        logger.error("Database error releasing lock %s: %s", name, e)
+                cursor.close()
     
     # Authentication Methods
     def get_user_by_username(self, username: str) -> Optional[Dict]:
         """Get user by username or email"""
-        connection = self.get_connection()
-        if not connection:
-            return None
+        with self.connection() as connection:
+            if not connection:
+                return None
             
-        cursor = connection.cursor(dictionary=True)
+            cursor = connection.cursor(dictionary=True)
         
-        try:
-            query = """
-                SELECT id, username, email, password_hash, full_name, role, is_active, last_login
-                FROM users 
-                WHERE (username = %s OR email = %s) AND is_active = TRUE
-            """
-            cursor.execute(query, (username, username))
-            user = cursor.fetchone()
-            return user
-        except Error as e:
-            print(f"Database error getting user: {e}")
-            return None
-        finally:
-            cursor.close()
+            try:
+                # UNION ALL agar setiap cabang memakai index unik masing-masing
+                # (OR lintas dua kolom tidak dapat memakai satu index)
+                query = """
+                    SELECT id, username, email, password_hash, full_name, role, is_active, last_login
+                    FROM users WHERE username = %s AND is_active = TRUE
+                    UNION ALL
+                    SELECT id, username, email, password_hash, full_name, role, is_active, last_login
+                    FROM users WHERE email = %s AND is_active = TRUE
+                    LIMIT 1
+                """
+                cursor.execute(query, (username, username))
+                user = cursor.fetchone()
+                return user
+            except Error as e:
+                logger.error("Database error getting user: %s", e)
+                return None
+            finally:
+                cursor.close()
     
     def update_last_login(self, user_id: int) -> bool:
         """Update user's last login timestamp"""
-        connection = self.get_connection()
-        if not connection:
-            return False
+        with self.connection() as connection:
+            if not connection:
+                return False
             
-        cursor = connection.cursor()
+            cursor = connection.cursor()
         
-        try:
-            query = "UPDATE users SET last_login = %s WHERE id = %s"
-            cursor.execute(query, (datetime.now(), user_id))
-            connection.commit()
-            return cursor.rowcount > 0
-        except Error as e:
-            print(f"Database error updating last login: {e}")
-            connection.rollback()
-            return False
-        finally:
-            cursor.close()
+            try:
+                query = "UPDATE users SET last_login = %s WHERE id = %s"
+                cursor.execute(query, (datetime.now(), user_id))
+                connection.commit()
+                return cursor.rowcount > 0
+            except Error as e:
+                logger.error("Database error updating last login: %s", e)
+                connection.rollback()
+                return False
+            finally:
+                cursor.close()
     
     def create_user(self, username: str, email: str, password_hash: str, 
                    full_name: str, role: str = 'user') -> int:
         """Create new user account"""
-        connection = self.get_connection()
-        if not connection:
-            return 0
+        with self.connection() as connection:
+            if not connection:
+                return 0
             
-        cursor = connection.cursor()
+            cursor = connection.cursor()
         
-        try:
-            query = """
-                INSERT INTO users (username, email, password_hash, full_name, role)
-                VALUES (%s, %s, %s, %s, %s)
-            """
-            cursor.execute(query, (username, email, password_hash, full_name, role))
-            connection.commit()
-            return cursor.lastrowid
-        except Error as e:
-            print(f"Database error creating user: {e}")
-            connection.rollback()
-            return 0
-        finally:
-            cursor.close()
+            try:
+                query = """
+                    INSERT INTO users (username, email, password_hash, full_name, role)
+                    VALUES (%s, %s, %s, %s, %s)
+                """
+                cursor.execute(query, (username, email, password_hash, full_name, role))
+                connection.commit()
+                return cursor.lastrowid
+            except Error as e:
+                logger.error("Database error creating user: %s", e)
+                connection.rollback()
+                return 0
+            finally:
+                cursor.close()
     
     def save_user_session(self, user_id: int, session_token: str, 
                          ip_address: str, user_agent: str, expires_at: datetime) -> bool:
         """Save user session to database"""
-        connection = self.get_connection()
-        if not connection:
-            return False
+        with self.connection() as connection:
+            if not connection:
+                return False
             
-        cursor = connection.cursor()
+            cursor = connection.cursor()
         
-        try:
-            query = """
-                INSERT INTO user_sessions (user_id, session_token, ip_address, user_agent, expires_at)
-                VALUES (%s, %s, %s, %s, %s)
-            """
-            cursor.execute(query, (user_id, session_token, ip_address, user_agent, expires_at))
-            connection.commit()
-            return True
-        except Error as e:
-            print(f"Database error saving session: {e}")
-            connection.rollback()
-            return False
-        finally:
-            cursor.close()
+            try:
+                query = """
+                    INSERT INTO user_sessions (user_id, session_token, ip_address, user_agent, expires_at)
+                    VALUES (%s, %s, %s, %s, %s)
+                """
+                cursor.execute(query, (user_id, session_token, ip_address, user_agent, expires_at))
+                connection.commit()
+                return True
+            except Error as e:
+                logger.error("Database error saving session: %s", e)
+                connection.rollback()
+                return False
+            finally:
+                cursor.close()
+    
+    def record_logins(self, logins: List[Dict]) -> int:
+        """Simpan session, last_login dan hash password baru dari banyak login dalam satu transaksi"""
+        if not logins:
+            return 0
+
+        # Satu UPDATE per user walaupun user login berkali-kali dalam satu batch
+        last_login = {}
+        password_hash = {}
+        for login in logins:
+            last_login[login['user_id']] = max(login['login_time'], last_login.get(login['user_id'], login['login_time']))
+            if login.get('password_hash'):
+                password_hash[login['user_id']] = login['password_hash']
+
+        with self.connection() as connection:
+            if not connection:
+                raise Exception("Database connection failed")
+            
+            cursor = connection.cursor()
+        
+            try:
+                connection.start_transaction()
+                cursor.executemany("""
+                    INSERT INTO user_sessions (user_id, session_token, ip_address, user_agent, expires_at)
+                    VALUES (%s, %s, %s, %s, %s)
+                """, [(login['user_id'], login['session_token'], login['ip_address'],
+                       login['user_agent'], login['expires_at']) for login in logins])
+                cursor.executemany("UPDATE users SET last_login = %s WHERE id = %s",
+                                   [(waktu, user_id) for user_id, waktu in sorted(last_login.items())])
+                if password_hash:
+                    cursor.executemany("UPDATE users SET password_hash = %s WHERE id = %s",
+                                       [(hashed, user_id) for user_id, hashed in sorted(password_hash.items())])
+                connection.commit()
+                return len(logins)
+            except Error as e:
+                logger.error("Database error recording logins: %s", e)
+                connection.rollback()
+                raise e
+            finally:
+                cursor.close()
+
+    def get_session_expiry(self, session_token: str):
+        """Waktu kadaluarsa session, False jika token tidak ada, None jika database tidak tersedia"""
+        with self.connection() as connection:
+            if not connection:
+                return None
+            
+            cursor = connection.cursor()
+        
+            try:
+                cursor.execute("SELECT expires_at FROM user_sessions WHERE session_token = %s",
+                               (session_token,))
+                row = cursor.fetchone()
+                return row[0] if row else False
+            except Error as e:
+                logger.error("Database error getting session: %s", e)
+                return None
+            finally:
+                cursor.close()
     
     def delete_user_session(self, session_token: str) -> bool:
         """Delete user session from database"""
-        connection = self.get_connection()
-        if not connection:
-            return False
+        with self.connection() as connection:
+            if not connection:
+                return False
             
-        cursor = connection.cursor()
+            cursor = connection.cursor()
         
-        try:
-            query = "DELETE FROM user_sessions WHERE session_token = %s"
-            cursor.execute(query, (session_token,))
-            connection.commit()
-            return cursor.rowcount > 0
-        except Error as e:
-            print(f"Database error deleting session: {e}")
-            connection.rollback()
-            return False
-        finally:
-            cursor.close()
+            try:
+                query = "DELETE FROM user_sessions WHERE session_token = %s"
+                cursor.execute(query, (session_token,))
+                connection.commit()
+                return cursor.rowcount > 0
+            except Error as e:
+                logger.error("Database error deleting session: %s", e)
+                connection.rollback()
+                return False
+            finally:
+                cursor.close()
     
-    def cleanup_expired_sessions(self) -> int:
+    def cleanup_expired_sessions(self, chunk_size: int = 1000, pause: float = 0.1) -> int:
         """Clean up expired sessions"""
-        connection = self.get_connection()
-        if not connection:
-            return 0
-            
-        cursor = connection.cursor()
-        
         try:
-            query = "DELETE FROM user_sessions WHERE expires_at < %s"
-            cursor.execute(query, (datetime.now(),))
-            connection.commit()
-            return cursor.rowcount
-        except Error as e:
-            print(f"Database error cleaning up sessions: {e}")
-            connection.rollback()
+            return self.purge_rows('user_sessions', datetime.now(), chunk_size, pause)
+        except Exception as e:
+            logger.error("Database error cleaning up sessions: %s", e)
             return 0
-        finally:
-            cursor.close()
     
     def close_connection(self):
-        """Close database connection"""
-        if self.connection and self.connection.is_connected():
-            self.connection.close()
-            print("MySQL connection closed")
+        """Close all pooled database connections"""
+        self.pool.close_all()
+        logger.info("Database connection pool closed")
     
     def __del__(self):
         """Destructor to ensure connection is closed"""
-        self.close_connection()
\ No newline at end of file
+        if hasattr(self, 'pool'):
+            self.pool.close_all()
\ No newline at end of file
@@ -10,8 +10,12 @@ COLLATE utf8mb4_unicode_ci;
 USE fuzzy_irrigation;
 
 -- 3. Buat tabel untuk menyimpan hasil perhitungan fuzzy logic
+--    Dipartisi per bulan pada created_at (RANGE COLUMNS) sehingga query dengan
+--    rentang waktu hanya membaca partisi terkait dan retensi cukup DROP PARTITION.
+--    Partisi bulanan dibuat otomatis oleh aplikasi dari p_max (FuzzyDatabase.ensure_partitions);
+--    primary key harus memuat created_at karena kolom tersebut kunci partisi.
 CREATE TABLE IF NOT EXISTS fuzzy_calculations (
-    id INT AUTO_INCREMENT PRIMARY KEY,
+    id INT AUTO_INCREMENT,
     timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
     kelembaban_input DECIMAL(5,2) NOT NULL COMMENT 'Input kelembaban tanah (%)',
     cuaca_input VARCHAR(50) NOT NULL COMMENT 'Kondisi cuaca (Cerah, Berawan, Hujan Ringan, Hujan Lebat)',
@@ -22,12 +26,29 @@ CREATE TABLE IF NOT EXISTS fuzzy_calculations (
     kelembaban_udara DECIMAL(5,2) COMMENT 'Kelembaban udara (%)',
     curah_hujan DECIMAL(5,2) COMMENT 'Curah hujan (mm)',
     status_pompa VARCHAR(20) COMMENT 'Status pompa (Aktif/Tidak Aktif)',
-    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    zona VARCHAR(64) NULL COMMENT 'Zona/perangkat untuk keputusan otomatis (NULL jika dari /calculate)',
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
     
+    PRIMARY KEY (id, created_at),
     INDEX idx_cuaca (cuaca_input),
     INDEX idx_created_at (created_at),
+    INDEX idx_cuaca_created_at (cuaca_input, created_at),
+    INDEX idx_zona_created_at (zona, created_at),
     INDEX idx_tingkat_kebutuhan (tingkat_kebutuhan)
-) ENGINE=InnoDB COMMENT='Tabel untuk menyimpan hasil perhitungan fuzzy logic irigasi';
+) ENGINE=InnoDB COMMENT='Tabel untuk menyimpan hasil perhitungan fuzzy logic irigasi'
+PARTITION BY RANGE COLUMNS (created_at) (
+    PARTITION p_awal VALUES LESS THAN ('2026-01-01'),
+    PARTITION p_max VALUES LESS THAN (MAXVALUE)
+);
+
+-- 3b. Migrasi tabel lama yang belum dipartisi (menyalin ulang tabel, jalankan saat sepi):
+-- ALTER TABLE fuzzy_calculations
+--     MODIFY created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+--     DROP PRIMARY KEY, ADD PRIMARY KEY (id, created_at);
+-- ALTER TABLE fuzzy_calculations PARTITION BY RANGE COLUMNS (created_at) (
+--     PARTITION p_awal VALUES LESS THAN ('2026-01-01'),
+--     PARTITION p_max VALUES LESS THAN (MAXVALUE)
+-- );
 
 -- 4. Buat tabel untuk insights dan analisis (opsional)
 CREATE TABLE IF NOT EXISTS calculation_insights (
@@ -40,6 +61,39 @@ CREATE TABLE IF NOT EXISTS calculation_insights (
     INDEX idx_created_at (created_at)
 ) ENGINE=InnoDB COMMENT='Tabel untuk menyimpan hasil analisis dan insights';
 
+-- 4b. Tabel rollup agregat per jam/per hari, diperbarui otomatis setiap perhitungan
+--     disimpan (dalam transaksi yang sama) sehingga statistik dan tren tidak perlu
+--     scan tabel fuzzy_calculations
+CREATE TABLE IF NOT EXISTS calculation_rollups (
+    granularitas ENUM('jam', 'hari') NOT NULL COMMENT 'Ukuran periode agregat',
+    periode DATETIME NOT NULL COMMENT 'Awal periode (jam atau hari)',
+    cuaca_input VARCHAR(50) NOT NULL,
+    tingkat_kebutuhan VARCHAR(20) NOT NULL,
+    rentang_kelembaban VARCHAR(20) NOT NULL COMMENT 'Rendah (0-29%), Sedang (30-59%), Tinggi (60-100%)',
+    jumlah INT NOT NULL DEFAULT 0 COMMENT 'Jumlah perhitungan',
+    total_durasi DECIMAL(14,2) NOT NULL DEFAULT 0 COMMENT 'Jumlah durasi (untuk rata-rata)',
+    min_durasi DECIMAL(5,2) NOT NULL,
+    max_durasi DECIMAL(5,2) NOT NULL,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    
+    PRIMARY KEY (granularitas, periode, cuaca_input, tingkat_kebutuhan, rentang_kelembaban)
+) ENGINE=InnoDB COMMENT='Agregat perhitungan fuzzy per jam/per hari';
+
+-- 4c. Tabel time-series data sensor dari perangkat lapangan (/api/ingest)
+CREATE TABLE IF NOT EXISTS sensor_readings (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    device_id VARCHAR(64) NOT NULL COMMENT 'ID perangkat pengirim',
+    recorded_at DATETIME(3) NOT NULL COMMENT 'Waktu pembacaan di perangkat',
+    kelembaban_tanah DECIMAL(5,2) NULL COMMENT 'Kelembaban tanah (%)',
+    suhu DECIMAL(4,1) NULL COMMENT 'Suhu lingkungan (°C)',
+    kelembaban_udara DECIMAL(5,2) NULL COMMENT 'Kelembaban udara (%)',
+    curah_hujan DECIMAL(5,2) NULL COMMENT 'Curah hujan (mm)',
+    received_at DATETIME DEFAULT CURRENT_TIMESTAMP COMMENT 'Waktu diterima server',
+    
+    INDEX idx_device_recorded_at (device_id, recorded_at),
+    INDEX idx_recorded_at (recorded_at)
+) ENGINE=InnoDB COMMENT='Data sensor IoT per perangkat';
+
 -- 5. Buat tabel untuk sistem authentication pengguna
 CREATE TABLE IF NOT EXISTS users (
     id INT AUTO_INCREMENT PRIMARY KEY,
@@ -96,9 +150,35 @@ VALUES
 (45.0, 'Berawan', 25.0, 'Sedang', 45.0, 28.0, 60.0, 2.0, 'Aktif'),
 (65.0, 'Hujan Ringan', 10.0, 'Rendah', 65.0, 25.0, 80.0, 15.0, 'Tidak Aktif');
 
+-- 10. Isi ulang tabel rollup dari data yang ada (sama dengan FuzzyDatabase.rebuild_rollups)
+DELETE FROM calculation_rollups;
+INSERT INTO calculation_rollups 
+(granularitas, periode, cuaca_input, tingkat_kebutuhan, rentang_kelembaban, jumlah, total_durasi, min_durasi, max_durasi)
+SELECT 'jam', DATE_FORMAT(created_at, '%Y-%m-%d %H:00:00') as periode, cuaca_input, tingkat_kebutuhan,
+       CASE 
+           WHEN kelembaban_input < 30 THEN 'Rendah (0-29%)'
+           WHEN kelembaban_input < 60 THEN 'Sedang (30-59%)'
+           ELSE 'Tinggi (60-100%)'
+       END as rentang_kelembaban,
+       COUNT(*), SUM(durasi_output), MIN(durasi_output), MAX(durasi_output)
+FROM fuzzy_calculations 
+GROUP BY periode, cuaca_input, tingkat_kebutuhan, rentang_kelembaban;
+INSERT INTO calculation_rollups 
+(granularitas, periode, cuaca_input, tingkat_kebutuhan, rentang_kelembaban, jumlah, total_durasi, min_durasi, max_durasi)
+SELECT 'hari', DATE(created_at) as periode, cuaca_input, tingkat_kebutuhan,
+       CASE 
+           WHEN kelembaban_input < 30 THEN 'Rendah (0-29%)'
+           WHEN kelembaban_input < 60 THEN 'Sedang (30-59%)'
+           ELSE 'Tinggi (60-100%)'
+       END as rentang_kelembaban,
+       COUNT(*), SUM(durasi_output), MIN(durasi_output), MAX(durasi_output)
+FROM fuzzy_calculations 
+GROUP BY periode, cuaca_input, tingkat_kebutuhan, rentang_kelembaban;
+
 -- Tampilkan struktur tabel
 DESCRIBE fuzzy_calculations;
 DESCRIBE calculation_insights;
+DESCRIBE calculation_rollups;
 
 -- Tampilkan data contoh
 SELECT * FROM fuzzy_calculations ORDER BY created_at DESC LIMIT 5;
\ No newline at end of file
@@ -0,0 +1,430 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from decimal import Decimal
+from functools import lru_cache
+from typing import Optional
+
+try:
+    import mysql.connector
+    from mysql.connector import InterfaceError, OperationalError
+except ImportError:  # Gateway tanpa MySQL: hanya backend SQLite yang tersedia
+    mysql = None
+
+# Tuple error database dari semua backend yang terpasang (dipakai di `except Error`)
+Error = (sqlite3.Error,) + ((mysql.connector.Error,) if mysql else ())
+
+class MySQLBackend:
+    """Backend MySQL (mysql-connector) untuk server"""
+
+    name = 'mysql'
+    supports_partitions = True
+
+    # Periode rollup per granularitas untuk backfill dari fuzzy_calculations
+    rollup_periode = {
+        'jam': "DATE_FORMAT(created_at, '%Y-%m-%d %H:00:00')",
+        'hari': "DATE(created_at)"
+    }
+
+    upsert_rollup_query = """
+        INSERT INTO calculation_rollups
+        (granularitas, periode, cuaca_input, tingkat_kebutuhan, rentang_kelembaban,
+         jumlah, total_durasi, min_durasi, max_durasi)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            jumlah = jumlah + VALUES(jumlah),
+            total_durasi = total_durasi + VALUES(total_durasi),
+            min_durasi = LEAST(min_durasi, VALUES(min_durasi)),
+            max_durasi = GREATEST(max_durasi, VALUES(max_durasi))
+    """
+
+    create_rollup_table_query = """
+        CREATE TABLE IF NOT EXISTS calculation_rollups (
+            granularitas ENUM('jam', 'hari') NOT NULL,
+            periode DATETIME NOT NULL,
+            cuaca_input VARCHAR(50) NOT NULL,
+            tingkat_kebutuhan VARCHAR(20) NOT NULL,
+            rentang_kelembaban VARCHAR(20) NOT NULL,
+            jumlah INT NOT NULL DEFAULT 0,
+            total_durasi DECIMAL(14,2) NOT NULL DEFAULT 0,
+            min_durasi DECIMAL(5,2) NOT NULL,
+            max_durasi DECIMAL(5,2) NOT NULL,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            PRIMARY KEY (granularitas, periode, cuaca_input, tingkat_kebutuhan, rentang_kelembaban)
+        ) ENGINE=InnoDB
+    """
+
+    create_sensor_table_queries = ["""
+        CREATE TABLE IF NOT EXISTS sensor_readings (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            device_id VARCHAR(64) NOT NULL,
+            recorded_at DATETIME(3) NOT NULL,
+            kelembaban_tanah DECIMAL(5,2) NULL,
+            suhu DECIMAL(4,1) NULL,
+            kelembaban_udara DECIMAL(5,2) NULL,
+            curah_hujan DECIMAL(5,2) NULL,
+            received_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_device_recorded_at (device_id, recorded_at),
+            INDEX idx_recorded_at (recorded_at)
+        ) ENGINE=InnoDB
+    """]
+
+    # Kolom yang ditambahkan setelah skema awal, dibuat otomatis pada database lama
+    add_calculation_columns = {
+        'zona': ["ALTER TABLE fuzzy_calculations ADD COLUMN zona VARCHAR(64) NULL AFTER status_pompa, "
+                 "ADD INDEX idx_zona_created_at (zona, created_at)"]
+    }
+
+    def __init__(self, host: str = "localhost", database: str = "fuzzy_irrigation",
+                 user: str = "root", password: str = "", port: int = 3306):
+        if mysql is None:
+            raise RuntimeError("mysql-connector-python belum terpasang")
+        self.host = host
+        self.database = database
+        self.user = user
+        self.password = password
+        self.port = port
+        self.broken_errors = (InterfaceError, OperationalError)
+
+    def connect(self):
+        """Create new MySQL connection for the pool"""
+        # autocommit agar SELECT tidak meninggalkan snapshot transaksi lama
+        # pada koneksi yang dipakai ulang; penulisan tetap memanggil commit()
+        return mysql.connector.connect(
+            host=self.host,
+            database=self.database,
+            user=self.user,
+            password=self.password,
+            port=self.port,
+            autocommit=True
+        )
+
+    @staticmethod
+    def ping(connection) -> bool:
+        """Health check untuk koneksi yang lama menganggur"""
+        try:
+            connection.ping(reconnect=False)
+            return True
+        except Error:
+            return False
+
+    @staticmethod
+    def reset(connection):
+        """Akhiri transaksi yang masih terbuka sebelum koneksi kembali ke pool"""
+        if connection.in_transaction:
+            connection.rollback()
+
+    def initialize(self, cursor):
+        """Skema MySQL dibuat dari database_schema.sql"""
+
+    @staticmethod
+    def table_exists(cursor, table: str) -> bool:
+        cursor.execute("SHOW TABLES LIKE %s", (table,))
+        return cursor.fetchone() is not None
+
+    @staticmethod
+    def column_exists(cursor, table: str, column: str) -> bool:
+        cursor.execute(f"SHOW COLUMNS FROM {table} LIKE %s", (column,))
+        return cursor.fetchone() is not None
+
+    @contextmanager
+    def named_lock(self, cursor, name: str):
+        """GET_LOCK lintas proses; menghasilkan True jika lock didapat"""
+        cursor.execute("SELECT GET_LOCK(%s, 0)", (name,))
+        didapat = cursor.fetchone()[0] == 1
+        try:
+            yield didapat
+        finally:
+            if didapat:
+                cursor.execute("SELECT RELEASE_LOCK(%s)", (name,))
+                cursor.fetchone()
+
+    def __str__(self):
+        return f"MySQL {self.database}@{self.host}:{self.port}"
+
+# Nilai Python <-> kolom SQLite: DATETIME disimpan sebagai teks ISO 'YYYY-MM-DD HH:MM:SS'
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(' '))
+sqlite3.register_adapter(Decimal, float)
+sqlite3.register_converter('DATETIME', lambda value: datetime.fromisoformat(value.decode()))
+
+@lru_cache(maxsize=512)
+def _sqlite_sql(query: str) -> str:
+    """Placeholder %s -> ? (string hasil sama sehingga statement cache sqlite3 terpakai)"""
+    return query.replace('%s', '?')
+
+class SQLiteCursor:
+    """Cursor sqlite3 dengan antarmuka yang dipakai FuzzyDatabase (placeholder %s, dictionary)"""
+
+    def __init__(self, cursor: sqlite3.Cursor, dictionary: bool = False):
+        self._cursor = cursor
+        self._dictionary = dictionary
+
+    def execute(self, query: str, params=()):
+        self._cursor.execute(_sqlite_sql(query), params)
+
+    def executemany(self, query: str, params):
+        self._cursor.executemany(_sqlite_sql(query), params)
+
+    def _row(self, row):
+        if row is None:
+            return None
+        return dict(zip([d[0] for d in self._cursor.description], row)) if self._dictionary else row
+
+    def fetchone(self):
+        return self._row(self._cursor.fetchone())
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        if not self._dictionary:
+            return rows
+        kolom = [d[0] for d in self._cursor.description]
+        return [dict(zip(kolom, row)) for row in rows]
+
+    @property
+    def rowcount(self) -> int:
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self) -> Optional[int]:
+        return self._cursor.lastrowid
+
+    def close(self):
+        self._cursor.close()
+
+class SQLiteConnection:
+    """Koneksi sqlite3 mode autocommit; start_transaction membuka BEGIN IMMEDIATE"""
+
+    def __init__(self, connection: sqlite3.Connection):
+        self._connection = connection
+
+    def cursor(self, dictionary: bool = False) -> SQLiteCursor:
+        return SQLiteCursor(self._connection.cursor(), dictionary)
+
+    def start_transaction(self):
+        # Kunci tulis diambil di awal agar batch tidak gagal di tengah karena SQLITE_BUSY
+        self._connection.execute("BEGIN IMMEDIATE")
+
+    @property
+    def in_transaction(self) -> bool:
+        return self._connection.in_transaction
+
+    def commit(self):
+        self._connection.commit()
+
+    def rollback(self):
+        self._connection.rollback()
+
+    def close(self):
+        self._connection.close()
+
+class SQLiteBackend:
+    """Backend SQLite embedded untuk gateway lapangan (tanpa server database)
+
+    Koneksi memakai WAL (pembaca tidak menunggu penulis), synchronous=NORMAL,
+    memory-mapped I/O (`mmap_size` byte) dan cache statement sqlite3 sehingga
+    query yang sama tidak di-parse ulang. Penulisan batch dari write-behind
+    berjalan dalam satu transaksi BEGIN IMMEDIATE.
+    """
+
+    name = 'sqlite'
+    supports_partitions = False
+
+    rollup_periode = {
+        'jam': "strftime('%Y-%m-%d %H:00:00', created_at)",
+        'hari': "strftime('%Y-%m-%d 00:00:00', created_at)"
+    }
+
+    upsert_rollup_query = """
+        INSERT INTO calculation_rollups
+        (granularitas, periode, cuaca_input, tingkat_kebutuhan, rentang_kelembaban,
+         jumlah, total_durasi, min_durasi, max_durasi)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+        ON CONFLICT (granularitas, periode, cuaca_input, tingkat_kebutuhan, rentang_kelembaban) DO UPDATE SET
+            jumlah = jumlah + excluded.jumlah,
+            total_durasi = total_durasi + excluded.total_durasi,
+            min_durasi = MIN(min_durasi, excluded.min_durasi),
+            max_durasi = MAX(max_durasi, excluded.max_durasi),
+            updated_at = CURRENT_TIMESTAMP
+    """
+
+    create_rollup_table_query = """
+        CREATE TABLE IF NOT EXISTS calculation_rollups (
+            granularitas TEXT NOT NULL CHECK (granularitas IN ('jam', 'hari')),
+            periode DATETIME NOT NULL,
+            cuaca_input TEXT NOT NULL,
+            tingkat_kebutuhan TEXT NOT NULL,
+            rentang_kelembaban TEXT NOT NULL,
+            jumlah INTEGER NOT NULL DEFAULT 0,
+            total_durasi REAL NOT NULL DEFAULT 0,
+            min_durasi REAL NOT NULL,
+            max_durasi REAL NOT NULL,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (granularitas, periode, cuaca_input, tingkat_kebutuhan, rentang_kelembaban)
+        ) WITHOUT ROWID
+    """
+
+    create_sensor_table_queries = [
+        """
+        CREATE TABLE IF NOT EXISTS sensor_readings (
+            id INTEGER PRIMARY KEY,
+            device_id TEXT NOT NULL,
+            recorded_at DATETIME NOT NULL,
+            kelembaban_tanah REAL,
+            suhu REAL,
+            kelembaban_udara REAL,
+            curah_hujan REAL,
+            received_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_sensor_device_recorded_at ON sensor_readings (device_id, recorded_at)",
+        "CREATE INDEX IF NOT EXISTS idx_sensor_recorded_at ON sensor_readings (recorded_at)"
+    ]
+
+    add_calculation_columns = {
+        'zona': ["ALTER TABLE fuzzy_calculations ADD COLUMN zona TEXT",
+                 "CREATE INDEX IF NOT EXISTS idx_calculations_zona_created_at ON fuzzy_calculations (zona, created_at)"]
+    }
+
+    # Tabel inti (kolom fuzzy_calculations sama dengan file SQLite versi awal;
+    # kolom tambahan dibuat lewat add_calculation_columns)
+    schema = [
+        """
+        CREATE TABLE IF NOT EXISTS fuzzy_calculations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            kelembaban_input REAL NOT NULL,
+            cuaca_input TEXT NOT NULL,
+            durasi_output REAL NOT NULL,
+            tingkat_kebutuhan TEXT NOT NULL,
+            kelembaban_tanah REAL,
+            suhu REAL,
+            kelembaban_udara REAL,
+            curah_hujan REAL,
+            status_pompa TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_calculations_created_at ON fuzzy_calculations (created_at, id)",
+        "CREATE INDEX IF NOT EXISTS idx_calculations_cuaca_created_at ON fuzzy_calculations (cuaca_input, created_at)",
+        """
+        CREATE TABLE IF NOT EXISTS calculation_insights (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            insight_type TEXT NOT NULL,
+            insight_data TEXT NOT NULL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            full_name TEXT NOT NULL,
+            role TEXT DEFAULT 'user' CHECK (role IN ('admin', 'user')),
+            is_active INTEGER DEFAULT 1,
+            last_login DATETIME NULL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS user_sessions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+            session_token TEXT UNIQUE NOT NULL,
+            ip_address TEXT,
+            user_agent TEXT,
+            expires_at DATETIME NOT NULL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_sessions_user_id ON user_sessions (user_id)",
+        "CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON user_sessions (expires_at)"
+    ]
+
+    def __init__(self, path: str, busy_timeout: float = 5.0, mmap_size: int = 64 * 1024 * 1024,
+                 cache_size_kb: int = 8192, cached_statements: int = 256):
+        self.path = path
+        self.database = path
+        self.busy_timeout = busy_timeout
+        self.mmap_size = mmap_size
+        self.cache_size_kb = cache_size_kb
+        self.cached_statements = cached_statements
+        self.broken_errors = (sqlite3.DatabaseError,)
+        self._lock_names = {}
+        self._lock_names_lock = threading.Lock()
+        direktori = os.path.dirname(os.path.abspath(path))
+        os.makedirs(direktori, exist_ok=True)
+
+    def connect(self) -> SQLiteConnection:
+        """Create new SQLite connection for the pool"""
+        connection = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout,
+            isolation_level=None,          # autocommit; transaksi eksplisit lewat start_transaction
+            check_same_thread=False,       # koneksi dipinjam bergantian oleh thread lewat pool
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            cached_statements=self.cached_statements
+        )
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        connection.execute(f"PRAGMA cache_size=-{int(self.cache_size_kb)}")
+        connection.execute("PRAGMA temp_store=MEMORY")
+        connection.execute("PRAGMA foreign_keys=ON")
+        return SQLiteConnection(connection)
+
+    @staticmethod
+    def ping(connection) -> bool:
+        try:
+            connection.cursor().execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    @staticmethod
+    def reset(connection):
+        """Akhiri transaksi yang masih terbuka sebelum koneksi kembali ke pool"""
+        if connection.in_transaction:
+            connection.rollback()
+
+    def initialize(self, cursor):
+        """Buat tabel inti jika belum ada"""
+        for query in self.schema:
+            cursor.execute(query)
+
+    @staticmethod
+    def table_exists(cursor, table: str) -> bool:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = %s", (table,))
+        return cursor.fetchone() is not None
+
+    @staticmethod
+    def column_exists(cursor, table: str, column: str) -> bool:
+        cursor.execute(f"PRAGMA table_info({table})")
+        return any(row[1] == column for row in cursor.fetchall())
+
+    @contextmanager
+    def named_lock(self, cursor, name: str):
+        """Lock di dalam proses (gateway menjalankan satu proses aplikasi)"""
+        with self._lock_names_lock:
+            lock = self._lock_names.setdefault(name, threading.Lock())
+        didapat = lock.acquire(blocking=False)
+        try:
+            yield didapat
+        finally:
+            if didapat:
+                lock.release()
+
+    def __str__(self):
+        return f"SQLite {self.path}"
+
+def backend_from_url(url: str):
+    """Backend dari DATABASE_URL: kosong/'mysql' untuk MySQL default, atau 'sqlite:///path/ke/file.db'"""
+    if not url or url == 'mysql':
+        return None
+    if url.startswith('sqlite:///'):
+        return SQLiteBackend(url[len('sqlite:///'):])
+    raise ValueError(f"DATABASE_URL tidak dikenali: {url}")
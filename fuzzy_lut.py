@@ -0,0 +1,103 @@
+import numpy as np
+from typing import Dict
+
+class FuzzyLUT:
+    """Lookup table durasi penyiraman hasil prakomputasi Fuzzy Tsukamoto
+
+    Tabel berisi durasi (belum dibulatkan) untuk setiap titik grid kelembaban
+    per kelas cuaca. Fungsi keanggotaan kelembaban bersifat piecewise-linear,
+    sehingga interpolasi linear antar titik grid yang memuat semua breakpoint
+    (default 20, 40, 60) menghasilkan nilai yang sama dengan rule engine.
+    Tabel terikat pada satu rule base; setelah rule base ditukar, LUT harus
+    dibangun ulang.
+    """
+
+    def __init__(self, engine, step: float = 0.01, kelembaban_max: float = 100.0, rule_base=None):
+        self.engine = engine
+        self.rule_base = rule_base or engine.rule_base
+        self.step = step
+        self.kelembaban_max = kelembaban_max
+        self.cuaca_kode = dict(self.rule_base.variabel['cuaca'].indeks)
+
+        # Titik grid dihitung sebagai i / skala agar breakpoint bulat tepat berada di grid
+        self.skala = 1.0 / step
+        self.n = int(round(kelembaban_max * self.skala)) + 1
+        self.grid = np.arange(self.n) / self.skala
+
+        jumlah_cuaca = len(self.cuaca_kode)
+        kelembaban = np.tile(self.grid, jumlah_cuaca)
+        kode_cuaca = np.repeat(np.arange(jumlah_cuaca), self.n)
+        hasil = engine.hitung_durasi_penyiraman_batch(kelembaban, kode_cuaca, rule_base=self.rule_base)
+        self.tabel = hasil['durasi_mentah'].reshape(jumlah_cuaca, self.n)
+
+        # Salinan list untuk lookup skalar (akses list lebih cepat dari indexing numpy)
+        self._baris = [row.tolist() for row in self.tabel]
+
+    def _interpolasi(self, kelembaban: float, kode: int) -> float:
+        posisi = kelembaban * self.skala
+        i = min(int(posisi), self.n - 2)
+        t = posisi - i
+        baris = self._baris[kode]
+        d0 = baris[i]
+        if t == 0:
+            return d0
+        return d0 + (baris[i + 1] - d0) * t
+
+    def lookup(self, kelembaban: float, cuaca: str) -> Dict:
+        """Durasi dan tingkat kebutuhan untuk satu input dalam O(1)"""
+        durasi = self._interpolasi(kelembaban, self.cuaca_kode[cuaca])
+        return {
+            'durasi': round(durasi, 2),
+            'tingkat': self.rule_base.tingkat(durasi)
+        }
+
+    def lookup_batch_mentah(self, kelembaban, kode_cuaca) -> np.ndarray:
+        """Durasi (belum dibulatkan) untuk array input"""
+        posisi = np.asarray(kelembaban, dtype=float) * self.skala
+        kode_cuaca = np.asarray(kode_cuaca, dtype=np.int64)
+        i = np.minimum(posisi.astype(np.int64), self.n - 2)
+        t = posisi - i
+        d0 = self.tabel[kode_cuaca, i]
+        d1 = self.tabel[kode_cuaca, i + 1]
+        return np.where(t == 0, d0, d0 + (d1 - d0) * t)
+
+    def lookup_batch(self, kelembaban, kode_cuaca) -> Dict:
+        """Durasi dan tingkat kebutuhan untuk array input, format sama dengan batch engine"""
+        durasi = self.lookup_batch_mentah(kelembaban, kode_cuaca)
+        return {
+            'durasi': np.array([round(d, 2) for d in durasi.tolist()], dtype=float),
+            'durasi_mentah': durasi,
+            'tingkat': self.rule_base.tingkat_batch(durasi)
+        }
+
+    def verify(self, tolerance: float = 1e-9, samples: int = 200000, seed: int = 0) -> Dict:
+        """Bandingkan LUT dengan rule engine di seluruh domain kelembaban
+
+        Titik uji: semua titik grid, titik tengah antar grid, dan sampel acak.
+        LUT dinyatakan valid jika selisih durasi maksimum <= tolerance dan
+        tidak ada perbedaan tingkat kebutuhan.
+        """
+        rng = np.random.default_rng(seed)
+        titik = np.concatenate([
+            self.grid,
+            (self.grid[:-1] + self.grid[1:]) / 2,
+            rng.uniform(0, self.kelembaban_max, samples)
+        ])
+
+        max_error = 0.0
+        tingkat_berbeda = 0
+        for kode in self.cuaca_kode.values():
+            kode_cuaca = np.full(len(titik), kode)
+            acuan = self.engine.hitung_durasi_penyiraman_batch(titik, kode_cuaca, rule_base=self.rule_base)
+            durasi = self.lookup_batch_mentah(titik, kode_cuaca)
+            max_error = max(max_error, float(np.max(np.abs(durasi - acuan['durasi_mentah']))))
+            tingkat_berbeda += int(np.count_nonzero(self.rule_base.tingkat_batch(durasi) != acuan['tingkat']))
+
+        return {
+            'valid': max_error <= tolerance and tingkat_berbeda == 0,
+            'max_error': max_error,
+            'tingkat_mismatch': tingkat_berbeda,
+            'titik_uji': len(titik) * len(self.cuaca_kode),
+            'tolerance': tolerance,
+            'step': self.step
+        }
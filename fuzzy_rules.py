@@ -0,0 +1,347 @@
+import json
+import os
+import math
+import hashlib
+import numpy as np
+from typing import Dict, List, Optional
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fuzzy_rules.json')
+
+T_NORM = {
+    'min': np.minimum,
+    'product': np.multiply
+}
+
+T_NORM_TUNGGAL = {
+    'min': min,
+    'product': lambda *nilai: math.prod(nilai)
+}
+
+# Di atas jumlah entri antecedent (rule x variabel) ini, evaluasi satu input memakai
+# gather NumPy; di bawahnya loop Python lebih cepat karena overhead NumPy per panggilan
+VEKTOR_TUNGGAL_MIN = 64
+
+def load_rule_definition(path: str = DEFAULT_RULES_PATH) -> Dict:
+    """Baca definisi rule base dari file JSON atau YAML"""
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith(('.yaml', '.yml')):
+            try:
+                import yaml
+            except ImportError:
+                raise ValueError("PyYAML diperlukan untuk membaca rule base YAML")
+            return yaml.safe_load(f)
+        return json.load(f)
+
+def save_rule_definition(definisi: Dict, path: str = DEFAULT_RULES_PATH):
+    """Simpan definisi rule base secara atomik (tulis ke file sementara lalu replace)"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        if path.endswith(('.yaml', '.yml')):
+            import yaml
+            yaml.safe_dump(definisi, f, allow_unicode=True, sort_keys=False)
+        else:
+            json.dump(definisi, f, indent=4, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+class _VariabelTrapesium:
+    """Variabel input numerik dengan himpunan trapesium [a, b, c, d]
+
+    Nilai null pada a/b berarti bahu kiri (-inf), pada c/d berarti bahu kanan (+inf).
+    """
+
+    def __init__(self, nama: str, definisi: Dict):
+        self.nama = nama
+        self.satuan = definisi.get('satuan')
+        himpunan = definisi.get('himpunan') or {}
+        if not himpunan:
+            raise ValueError(f"Variabel '{nama}' tidak memiliki himpunan")
+        if not isinstance(himpunan, dict):
+            raise ValueError(f"Himpunan variabel '{nama}' harus berupa object nama -> [a, b, c, d]")
+
+        self.nama_himpunan = list(himpunan.keys())
+        titik = []
+        for nama_himpunan, abcd in himpunan.items():
+            if not isinstance(abcd, (list, tuple)) or len(abcd) != 4:
+                raise ValueError(f"Himpunan '{nama}.{nama_himpunan}' harus berisi 4 titik [a, b, c, d]")
+            a, b, c, d = abcd
+            a = -np.inf if a is None else float(a)
+            b = -np.inf if b is None else float(b)
+            c = np.inf if c is None else float(c)
+            d = np.inf if d is None else float(d)
+            if not (a <= b <= c <= d):
+                raise ValueError(f"Titik himpunan '{nama}.{nama_himpunan}' harus terurut a <= b <= c <= d")
+            titik.append((a, b, c, d))
+
+        self._titik = titik
+        titik = np.array(titik, dtype=float)
+        self.a, self.b, self.c, self.d = titik.T
+        self.indeks = {h: i for i, h in enumerate(self.nama_himpunan)}
+
+    def breakpoints(self) -> List[float]:
+        """Titik patah fungsi keanggotaan yang berhingga, terurut"""
+        semua = np.concatenate([self.a, self.b, self.c, self.d])
+        return sorted(set(semua[np.isfinite(semua)].tolist()))
+
+    def fuzzifikasi(self, x) -> np.ndarray:
+        """Derajat keanggotaan untuk array input (N x jumlah himpunan)"""
+        x = np.asarray(x, dtype=float)[:, None]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            naik = (x - self.a) / (self.b - self.a)
+            turun = (self.d - x) / (self.d - self.c)
+        return np.where((x < self.a) | (x > self.d), 0.0,
+                        np.where(x < self.b, naik,
+                                 np.where(x <= self.c, 1.0, turun)))
+
+    def fuzzifikasi_tunggal(self, x: float) -> List[float]:
+        """Derajat keanggotaan untuk satu nilai input (rumus sama dengan versi array)"""
+        mu = []
+        for a, b, c, d in self._titik:
+            if x < a or x > d:
+                mu.append(0.0)
+            elif x < b:
+                mu.append((x - a) / (b - a))
+            elif x <= c:
+                mu.append(1.0)
+            else:
+                mu.append((d - x) / (d - c))
+        return mu
+
+    def to_dict(self) -> Dict:
+        def _nilai(v):
+            return None if np.isinf(v) else float(v)
+        return {
+            'tipe': 'trapesium',
+            'satuan': self.satuan,
+            'himpunan': {
+                h: [_nilai(self.a[i]), _nilai(self.b[i]), _nilai(self.c[i]), _nilai(self.d[i])]
+                for i, h in enumerate(self.nama_himpunan)
+            }
+        }
+
+class _VariabelKategori:
+    """Variabel input kategori (crisp), derajat keanggotaan 1 untuk kategori aktif"""
+
+    def __init__(self, nama: str, definisi: Dict):
+        self.nama = nama
+        himpunan = definisi.get('himpunan') or []
+        if not isinstance(himpunan, list):
+            raise ValueError(f"Kategori variabel '{nama}' harus berupa array")
+        self.nama_himpunan = list(himpunan)
+        if not self.nama_himpunan:
+            raise ValueError(f"Variabel '{nama}' tidak memiliki kategori")
+        self.indeks = {h: i for i, h in enumerate(self.nama_himpunan)}
+
+    def kode(self, nilai) -> int:
+        """Kode kategori untuk label, -1 jika tidak dikenal"""
+        return self.indeks.get(nilai, -1)
+
+    def fuzzifikasi(self, kode) -> np.ndarray:
+        """One-hot (N x jumlah kategori) untuk array kode kategori"""
+        kode = np.asarray(kode, dtype=np.int64)
+        return (kode[:, None] == np.arange(len(self.nama_himpunan))).astype(float)
+
+    def fuzzifikasi_tunggal(self, kode: int) -> List[float]:
+        """One-hot untuk satu kode kategori"""
+        return [1.0 if i == kode else 0.0 for i in range(len(self.nama_himpunan))]
+
+    def to_dict(self) -> Dict:
+        return {'tipe': 'kategori', 'himpunan': list(self.nama_himpunan)}
+
+_TIPE_VARIABEL = {
+    'trapesium': _VariabelTrapesium,
+    'kategori': _VariabelKategori
+}
+
+class CompiledRuleBase:
+    """Rule base Fuzzy Tsukamoto yang sudah dikompilasi menjadi array NumPy
+
+    Objek ini immutable setelah dibuat; penggantian rule base dilakukan dengan
+    membuat objek baru dan menukar referensinya, sehingga request yang sedang
+    berjalan tetap memakai rule base lama sampai selesai.
+    """
+
+    def __init__(self, definisi: Dict):
+        if not isinstance(definisi, dict):
+            raise ValueError("Definisi rule base harus berupa object")
+        variabel = definisi.get('variabel') or {}
+        if not variabel:
+            raise ValueError("Rule base harus mendefinisikan variabel input")
+        if not isinstance(variabel, dict):
+            raise ValueError("variabel harus berupa object nama -> definisi")
+
+        self.variabel = {}
+        for nama, var_def in variabel.items():
+            if not isinstance(var_def, dict):
+                raise ValueError(f"Definisi variabel '{nama}' harus berupa object")
+            tipe = var_def.get('tipe', 'trapesium')
+            if tipe not in _TIPE_VARIABEL:
+                raise ValueError(f"Tipe variabel '{tipe}' tidak dikenal")
+            self.variabel[nama] = _TIPE_VARIABEL[tipe](nama, var_def)
+        self.nama_variabel = list(self.variabel.keys())
+
+        self.t_norm = definisi.get('t_norm', 'min')
+        if self.t_norm not in T_NORM:
+            raise ValueError(f"t_norm harus salah satu dari {list(T_NORM)}")
+        self._t_norm = T_NORM[self.t_norm]
+        self._t_norm_tunggal = T_NORM_TUNGGAL[self.t_norm]
+
+        rules = definisi.get('rules') or []
+        if not rules:
+            raise ValueError("Rule base harus memiliki minimal satu rule")
+        if not isinstance(rules, list):
+            raise ValueError("rules harus berupa array")
+
+        # Matriks antecedent (R x V): indeks himpunan per variabel, -1 = variabel tidak dipakai
+        antecedent = np.full((len(rules), len(self.nama_variabel)), -1, dtype=np.int64)
+        z = np.zeros(len(rules), dtype=float)
+        self.deskripsi = []
+        self.z_asli = []
+        for r, rule in enumerate(rules):
+            if not isinstance(rule, dict):
+                raise ValueError(f"Rule {r + 1} harus berupa object")
+            for v, nama in enumerate(self.nama_variabel):
+                if nama not in rule:
+                    continue
+                himpunan = rule[nama]
+                if himpunan not in self.variabel[nama].indeks:
+                    raise ValueError(f"Rule {r + 1}: himpunan '{himpunan}' tidak ada pada variabel '{nama}'")
+                antecedent[r, v] = self.variabel[nama].indeks[himpunan]
+            if 'durasi' not in rule:
+                raise ValueError(f"Rule {r + 1}: nilai durasi wajib diisi")
+            z[r] = float(rule['durasi'])
+            self.z_asli.append(rule['durasi'])
+            self.deskripsi.append(rule.get('deskripsi') or f"Rule {r + 1}")
+
+        if np.all(antecedent < 0, axis=1).any():
+            raise ValueError("Setiap rule harus memiliki minimal satu antecedent")
+
+        self.antecedent = antecedent
+        self.z = z
+
+        # Bentuk list dari tabel yang sama untuk evaluasi satu input tanpa overhead NumPy
+        self._rule_tunggal = [
+            [(nama, int(antecedent[r, v])) for v, nama in enumerate(self.nama_variabel) if antecedent[r, v] >= 0]
+            for r in range(len(rules))
+        ]
+        self._z_tunggal = z.tolist()
+
+        # Tensor rule jarang sebagai indeks gather (R x V) ke vektor gabungan derajat
+        # keanggotaan semua variabel; antecedent kosong menunjuk slot terakhir bernilai 1
+        # (elemen netral min/product). Satu gather + reduce mengevaluasi semua rule
+        # sehingga kerja Python per input tidak bertambah dengan jumlah rule dan variabel.
+        jumlah_himpunan = [len(self.variabel[nama].nama_himpunan) for nama in self.nama_variabel]
+        offset = np.concatenate([[0], np.cumsum(jumlah_himpunan)[:-1]]).astype(np.int64)
+        self._slot_netral = int(sum(jumlah_himpunan))
+        self._indeks_gather = np.where(antecedent >= 0, antecedent + offset, self._slot_netral)
+        self._vektor_tunggal = antecedent.size > VEKTOR_TUNGGAL_MIN
+
+        tingkat = definisi.get('tingkat_kebutuhan') or []
+        if not isinstance(tingkat, list) or not all(isinstance(t, dict) for t in tingkat):
+            raise ValueError("tingkat_kebutuhan harus berupa array object")
+        if not tingkat or tingkat[-1].get('durasi_maks') is not None:
+            raise ValueError("tingkat_kebutuhan harus diakhiri level tanpa durasi_maks")
+        self.tingkat_label = [t['label'] for t in tingkat]
+        self.tingkat_batas = np.array([float(t['durasi_maks']) for t in tingkat[:-1]], dtype=float)
+        if np.any(np.diff(self.tingkat_batas) <= 0):
+            raise ValueError("durasi_maks pada tingkat_kebutuhan harus naik")
+        self._tingkat_label_array = np.array(self.tingkat_label)
+
+        self.definisi = self.to_dict()
+        self.versi = hashlib.sha1(
+            json.dumps(self.definisi, sort_keys=True).encode('utf-8')
+        ).hexdigest()[:12]
+
+    def fuzzifikasi(self, nama: str, x) -> np.ndarray:
+        """Derajat keanggotaan variabel untuk array input (N x jumlah himpunan)"""
+        return self.variabel[nama].fuzzifikasi(x)
+
+    def evaluasi(self, masukan: Dict[str, np.ndarray]) -> Dict:
+        """Evaluasi semua rule untuk array input dalam satu pass
+
+        masukan: nama variabel -> array nilai (variabel kategori memakai kode).
+        Mengembalikan derajat keanggotaan per variabel, matriks kekuatan rule
+        (N x R) dan durasi hasil defuzzifikasi (belum dibulatkan).
+        """
+        mu = {}
+        alpha = None
+        for v, nama in enumerate(self.nama_variabel):
+            mu[nama] = self.variabel[nama].fuzzifikasi(masukan[nama])
+            indeks = self.antecedent[:, v]
+            kolom = mu[nama][:, np.maximum(indeks, 0)]
+            if (indeks < 0).any():
+                kolom = np.where(indeks < 0, 1.0, kolom)
+            alpha = kolom if alpha is None else self._t_norm(alpha, kolom)
+
+        # Defuzzifikasi Tsukamoto (weighted average)
+        numerator = (alpha * self.z).sum(axis=1)
+        denominator = alpha.sum(axis=1)
+        durasi = np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator > 0)
+
+        return {
+            'mu': mu,
+            'alpha': alpha,
+            'durasi': durasi
+        }
+
+    def evaluasi_tunggal(self, masukan: Dict) -> Dict:
+        """Evaluasi rule untuk satu input (nilai skalar), hasil sama dengan evaluasi()"""
+        mu = {nama: self.variabel[nama].fuzzifikasi_tunggal(masukan[nama]) for nama in self.nama_variabel}
+        if self._vektor_tunggal:
+            gabungan = np.fromiter(
+                (m for nama in self.nama_variabel for m in mu[nama]), dtype=float, count=self._slot_netral
+            )
+            alpha = self._t_norm.reduce(np.append(gabungan, 1.0)[self._indeks_gather], axis=1).tolist()
+        else:
+            t_norm = self._t_norm_tunggal
+            alpha = [t_norm(*[mu[nama][i] for nama, i in antecedent]) for antecedent in self._rule_tunggal]
+
+        # Defuzzifikasi Tsukamoto (weighted average)
+        numerator = sum(a * z for a, z in zip(alpha, self._z_tunggal))
+        denominator = sum(alpha)
+        durasi = numerator / denominator if denominator > 0 else 0.0
+
+        return {
+            'mu': mu,
+            'alpha': alpha,
+            'durasi': durasi
+        }
+
+    def tingkat(self, durasi: float) -> str:
+        """Tingkat kebutuhan penyiraman untuk satu nilai durasi"""
+        for batas, label in zip(self.tingkat_batas, self.tingkat_label):
+            if durasi <= batas:
+                return label
+        return self.tingkat_label[-1]
+
+    def tingkat_batch(self, durasi: np.ndarray) -> np.ndarray:
+        """Tingkat kebutuhan penyiraman untuk array durasi"""
+        return self._tingkat_label_array[np.searchsorted(self.tingkat_batas, durasi, side='left')]
+
+    def to_dict(self) -> Dict:
+        """Definisi rule base dalam format yang sama dengan file JSON"""
+        rules = []
+        for r in range(len(self.z)):
+            rule = {}
+            for v, nama in enumerate(self.nama_variabel):
+                if self.antecedent[r, v] >= 0:
+                    rule[nama] = self.variabel[nama].nama_himpunan[self.antecedent[r, v]]
+            rule['durasi'] = self.z_asli[r]
+            rule['deskripsi'] = self.deskripsi[r]
+            rules.append(rule)
+
+        tingkat = [{'label': label, 'durasi_maks': float(batas)}
+                   for label, batas in zip(self.tingkat_label, self.tingkat_batas)]
+        tingkat.append({'label': self.tingkat_label[-1]})
+
+        return {
+            'variabel': {nama: var.to_dict() for nama, var in self.variabel.items()},
+            't_norm': self.t_norm,
+            'rules': rules,
+            'tingkat_kebutuhan': tingkat
+        }
+
+def compile_rule_base(definisi: Optional[Dict] = None, path: str = DEFAULT_RULES_PATH) -> CompiledRuleBase:
+    """Kompilasi rule base dari dict definisi atau dari file"""
+    if definisi is None:
+        definisi = load_rule_definition(path)
+    return CompiledRuleBase(definisi)
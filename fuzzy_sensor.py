@@ -0,0 +1,95 @@
+import os
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from fuzzy_rules import CompiledRuleBase, compile_rule_base
+from insights import generate_insights
+from irrigation_pipeline import klasifikasi_cuaca
+
+DEFAULT_SENSOR_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fuzzy_rules_sensor.json')
+
+# Input yang dapat dipakai model sensor (nama variabel rule base = kolom sensor_readings)
+SENSOR_INPUTS = ('kelembaban', 'curah_hujan', 'suhu', 'kelembaban_udara')
+
+class SensorFuzzyModel:
+    """Fuzzy Tsukamoto dengan cuaca kontinu dari nilai sensor
+
+    Curah hujan (mm), suhu (°C) dan kelembaban udara (%) difuzzifikasi
+    dengan himpunan trapesium, bukan label cuaca crisp. Rule base boleh
+    memakai sebagian SENSOR_INPUTS, tetapi semua variabelnya harus numerik.
+    Label cuaca hasil klasifikasi_cuaca tetap disertakan untuk penyimpanan
+    dan insights.
+    """
+
+    def __init__(self, rule_base: CompiledRuleBase):
+        tidak_dikenal = [nama for nama in rule_base.nama_variabel if nama not in SENSOR_INPUTS]
+        if tidak_dikenal:
+            raise ValueError(f"Variabel {tidak_dikenal} bukan input sensor {list(SENSOR_INPUTS)}")
+        kategori = [nama for nama, var in rule_base.variabel.items() if var.to_dict()['tipe'] != 'trapesium']
+        if kategori:
+            raise ValueError(f"Variabel {kategori} harus bertipe trapesium")
+        self.rule_base = rule_base
+
+    @classmethod
+    def from_file(cls, path: str = DEFAULT_SENSOR_RULES_PATH) -> 'SensorFuzzyModel':
+        return cls(compile_rule_base(path=path))
+
+    def hitung(self, kelembaban: float, curah_hujan: float, suhu: float, kelembaban_udara: float,
+               fields: Optional[Sequence[str]] = None) -> Dict:
+        """Durasi penyiraman untuk satu set nilai sensor (format hasil sama dengan /calculate)
+
+        fields memilih bagian penjelasan yang dihitung (rules, fuzzifikasi, insights).
+        """
+        return self.jelaskan(kelembaban, curah_hujan, suhu, kelembaban_udara, fields)
+
+    def jelaskan(self, kelembaban: float, curah_hujan: float, suhu: float, kelembaban_udara: float,
+                 fields: Optional[Sequence[str]] = None) -> Dict:
+        """Sama dengan hitung, tanpa dihitung di metrik inferensi (dipakai ulang oleh /history)"""
+        rule_base = self.rule_base
+        nilai = {'kelembaban': kelembaban, 'curah_hujan': curah_hujan, 'suhu': suhu,
+                 'kelembaban_udara': kelembaban_udara}
+        hasil = rule_base.evaluasi_tunggal({nama: nilai[nama] for nama in rule_base.nama_variabel})
+        durasi = hasil['durasi']
+        tingkat = rule_base.tingkat(durasi)
+        cuaca = str(klasifikasi_cuaca(curah_hujan, kelembaban_udara))
+
+        result = {
+            'kelembaban': kelembaban,
+            'cuaca': cuaca,
+            'durasi': round(durasi, 2),
+            'tingkat': tingkat
+        }
+        if fields is None or 'rules' in fields or 'insights' in fields:
+            alpha = hasil['alpha']
+            rules = [
+                (alpha[r], rule_base.z_asli[r], rule_base.deskripsi[r])
+                for r in range(len(alpha)) if alpha[r] > 0
+            ]
+            result['rules'] = rules
+        if fields is None or 'fuzzifikasi' in fields:
+            fuzzifikasi = {
+                f'{nama}_{himpunan}': round(hasil['mu'][nama][i], 3)
+                for nama in rule_base.nama_variabel
+                for i, himpunan in enumerate(rule_base.variabel[nama].nama_himpunan)
+            }
+            fuzzifikasi['cuaca_aktif'] = cuaca
+            result['fuzzifikasi'] = fuzzifikasi
+        if fields is None or 'insights' in fields:
+            result['insights'] = generate_insights(kelembaban, cuaca, round(durasi, 2), tingkat, rules)
+        return result
+
+    def hitung_batch(self, kelembaban, curah_hujan, suhu, kelembaban_udara) -> Dict:
+        """Durasi dan tingkat untuk array nilai sensor (format sama dengan hitung_durasi_penyiraman_batch)"""
+        nilai = {'kelembaban': kelembaban, 'curah_hujan': curah_hujan, 'suhu': suhu,
+                 'kelembaban_udara': kelembaban_udara}
+        hasil = self.rule_base.evaluasi({
+            nama: np.asarray(nilai[nama], dtype=float) for nama in self.rule_base.nama_variabel
+        })
+        durasi = hasil['durasi']
+        return {
+            'durasi': np.array([round(d, 2) for d in durasi.tolist()], dtype=float),
+            'durasi_mentah': durasi,
+            'tingkat': self.rule_base.tingkat_batch(durasi),
+            'alpha': hasil['alpha']
+        }
@@ -0,0 +1,57 @@
+"""Konfigurasi gunicorn: satu worker per core CPU, masing-masing dengan pool sendiri"""
+import multiprocessing
+import os
+import secrets
+
+bind = os.environ.get('BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+
+# Worker thread: /api/sensor-stream (SSE) menahan satu thread selama client terhubung.
+# Thread dibagi dua agar dashboard yang terbuka tidak menghabiskan thread /calculate dan
+# /login: GUNICORN_REQUEST_THREADS untuk request biasa ditambah SENSOR_STREAM_MAX_CLIENTS
+# untuk SSE. Kapasitas dashboard = workers x SENSOR_STREAM_MAX_CLIENTS; client berikutnya
+# mendapat 503 dan dashboard beralih ke polling /api/sensor-data.
+worker_class = 'gthread'
+request_threads = int(os.environ.get('GUNICORN_REQUEST_THREADS', 16))
+stream_clients = int(os.environ.setdefault('SENSOR_STREAM_MAX_CLIENTS', '64'))
+threads = request_threads + stream_clients
+
+# Aplikasi di-import di setiap worker setelah fork, sehingga pool koneksi MySQL
+# dan thread latar (write-behind, pipeline, SSE) tidak terbagi antar proses
+preload_app = False
+
+# Beri waktu antrean write-behind di-flush (atexit) saat worker berhenti
+graceful_timeout = 30
+timeout = 60
+
+# State yang dibagi antar worker. Nilai default dibuat di proses master lalu
+# diwarisi semua worker; atur SECRET_KEY sendiri agar session bertahan saat restart.
+os.environ.setdefault('SECRET_KEY', secrets.token_hex(32))
+os.environ.setdefault('ZONE_STATE_URL', 'sqlite:///' + os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'instance', 'zone_state.db'))
+
+# /api/ingest diterima worker mana saja, jadi window dan dedup pipeline tidak boleh per
+# worker: reading disimpan ke sensor_readings dan hanya satu worker (pemegang file lock)
+# yang membacanya kembali untuk evaluasi otomatis
+if workers > 1:
+    os.environ.setdefault('PIPELINE_SOURCE', 'database')
+os.environ.setdefault('PIPELINE_LOCK_PATH', os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'instance', 'pipeline.lock'))
+
+# Metrik /metrics digabung dari snapshot semua worker, sehingga scrape ke worker mana pun
+# memberi counter yang sama dan tidak pernah turun
+if workers > 1:
+    os.environ.setdefault('METRICS_MULTIPROC_DIR', os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), 'instance', 'metrics'))
+
+def on_starting(server):
+    # Snapshot dari run sebelumnya tidak boleh ikut dijumlahkan
+    direktori = os.environ.get('METRICS_MULTIPROC_DIR')
+    if direktori and os.path.isdir(direktori):
+        for nama in os.listdir(direktori):
+            if nama.endswith(('.json', '.tmp')):
+                os.remove(os.path.join(direktori, nama))
+
+# Ukuran pool per worker: total koneksi MySQL = workers x DB_POOL_SIZE (client SSE tidak
+# memegang koneksi, jadi cukup untuk thread request biasa dan thread latar)
+os.environ.setdefault('DB_POOL_SIZE', str(request_threads + 2))
@@ -0,0 +1,84 @@
+import time
+import threading
+from typing import Dict, List, Optional, Sequence, Set
+
+import numpy as np
+
+class HistoryStore:
+    """Ring buffer riwayat perhitungan dengan kapasitas tetap
+
+    Setiap perhitungan disimpan sebagai satu baris di array kolom
+    (kelembaban, kode cuaca, durasi, indeks tingkat, id rule base,
+    timestamp, nilai sensor), sekitar 54 byte per entri. Nilai sensor
+    (curah hujan, suhu, kelembaban udara) hanya diisi untuk hasil model
+    sensor, selain itu NaN. Jika penuh, entri tertua ditimpa.
+    """
+
+    def __init__(self, capacity: int = 10000):
+        if capacity < 1:
+            raise ValueError("Kapasitas history minimal 1")
+        self.capacity = capacity
+        self.kelembaban = np.zeros(capacity, dtype=np.float64)
+        self.kode_cuaca = np.zeros(capacity, dtype=np.int8)
+        self.durasi = np.zeros(capacity, dtype=np.float64)
+        self.tingkat = np.zeros(capacity, dtype=np.int8)
+        self.rule_base = np.zeros(capacity, dtype=np.int32)
+        self.timestamp = np.zeros(capacity, dtype=np.float64)
+        self.sensor = np.full((capacity, 3), np.nan, dtype=np.float64)
+        self._start = 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def append(self, kelembaban: float, kode_cuaca: int, durasi: float, tingkat: int,
+               rule_base: int = 0, timestamp: float = None, sensor: Optional[Sequence[float]] = None):
+        """Tambahkan satu entri; entri tertua ditimpa jika buffer penuh"""
+        with self._lock:
+            if self._count < self.capacity:
+                i = (self._start + self._count) % self.capacity
+                self._count += 1
+            else:
+                i = self._start
+                self._start = (self._start + 1) % self.capacity
+            self.kelembaban[i] = kelembaban
+            self.kode_cuaca[i] = kode_cuaca
+            self.durasi[i] = durasi
+            self.tingkat[i] = tingkat
+            self.rule_base[i] = rule_base
+            self.timestamp[i] = time.time() if timestamp is None else timestamp
+            self.sensor[i] = np.nan if sensor is None else sensor
+
+    def page(self, offset: int = 0, limit: int = 50) -> List[Dict]:
+        """Ambil entri terbaru dulu mulai dari `offset` sebanyak maksimal `limit`"""
+        with self._lock:
+            akhir = min(offset + limit, self._count)
+            if offset >= akhir:
+                return []
+            urutan = np.arange(offset, akhir)
+            indeks = (self._start + self._count - 1 - urutan) % self.capacity
+            kolom = {
+                'kelembaban': self.kelembaban[indeks].tolist(),
+                'kode_cuaca': self.kode_cuaca[indeks].tolist(),
+                'durasi': self.durasi[indeks].tolist(),
+                'tingkat': self.tingkat[indeks].tolist(),
+                'rule_base': self.rule_base[indeks].tolist(),
+                'timestamp': self.timestamp[indeks].tolist()
+            }
+            sensor = self.sensor[indeks]
+            kolom['sensor'] = [None if np.isnan(baris[0]) else baris for baris in sensor.tolist()]
+        return [dict(zip(kolom, baris)) for baris in zip(*kolom.values())]
+
+    def rule_base_terpakai(self) -> Set[int]:
+        """Id rule base yang masih direferensikan entri di buffer"""
+        with self._lock:
+            if self._count < self.capacity:
+                indeks = (self._start + np.arange(self._count)) % self.capacity
+                return set(np.unique(self.rule_base[indeks]).tolist())
+            return set(np.unique(self.rule_base).tolist())
+
+    def clear(self):
+        with self._lock:
+            self._start = 0
+            self._count = 0
+
+    def __len__(self):
+        return self._count
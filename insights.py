@@ -0,0 +1,169 @@
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from operator import itemgetter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Insight dan rekomendasi per band kelembaban tanah (batas atas inklusif, terakhir > 80)
+KELEMBABAN_BATAS = (20, 40, 60, 80)
+KELEMBABAN_TEKS = (
+    ("🔴 Kondisi tanah sangat kering - memerlukan perhatian segera",
+     "Lakukan penyiraman intensif dan pantau kelembaban secara berkala"),
+    ("🟡 Kondisi tanah cukup kering - perlu penyiraman",
+     "Tingkatkan frekuensi penyiraman untuk menjaga kelembaban optimal"),
+    ("🟢 Kondisi kelembaban tanah dalam rentang normal",
+     "Pertahankan jadwal penyiraman rutin sesuai kondisi cuaca"),
+    ("🔵 Kondisi tanah cukup lembab - penyiraman minimal",
+     "Kurangi intensitas penyiraman dan pastikan drainase baik"),
+    ("🟣 Kondisi tanah sangat lembab - risiko overwatering",
+     "Hentikan penyiraman sementara dan periksa sistem drainase")
+)
+
+# Pengaruh cuaca
+WEATHER_IMPACT = {
+    "Cerah": {
+        "icon": "☀️",
+        "impact": "Cuaca cerah meningkatkan evaporasi air dari tanah",
+        "advice": "Penyiraman lebih intensif diperlukan untuk mengkompensasi penguapan"
+    },
+    "Berawan": {
+        "icon": "⛅",
+        "impact": "Cuaca berawan mengurangi tingkat evaporasi",
+        "advice": "Penyiraman dapat dikurangi karena penguapan lebih rendah"
+    },
+    "Hujan Ringan": {
+        "icon": "🌦️",
+        "impact": "Hujan ringan memberikan kelembaban tambahan alami",
+        "advice": "Penyiraman dapat dikurangi atau ditunda sesuai intensitas hujan"
+    },
+    "Hujan Lebat": {
+        "icon": "🌧️",
+        "impact": "Hujan lebat memberikan kelembaban berlebih",
+        "advice": "Hentikan penyiraman dan pastikan drainase berfungsi baik"
+    }
+}
+
+# Insight per band durasi: 0 = tidak disiram, lalu batas atas inklusif (detik); band 40-50
+# dan > 50 memakai teks yang sama, batas 50 hanya untuk peringatan durasi panjang
+DURASI_BATAS = (0, 10, 25, 40, 50)
+DURASI_TEKS = (
+    ("✅ Tidak diperlukan penyiraman saat ini", "Pantau kondisi tanah dalam 6-12 jam ke depan"),
+    ("💧 Penyiraman sangat ringan sudah cukup", "Lakukan penyiraman singkat dengan semprotan halus"),
+    ("💦 Penyiraman ringan diperlukan", "Lakukan penyiraman dengan tekanan rendah"),
+    ("🌊 Penyiraman sedang diperlukan", "Lakukan penyiraman dengan intensitas normal untuk tanaman kecil"),
+    ("🚿 Penyiraman intensif diperlukan", "Lakukan penyiraman bertahap untuk tanaman yang sangat kering"),
+    ("🚿 Penyiraman intensif diperlukan", "Lakukan penyiraman bertahap untuk tanaman yang sangat kering")
+)
+
+# Tingkat keyakinan rule dominan: band 0 = tidak ada rule aktif
+KEYAKINAN_BATAS = (0.5, 0.8)
+KEYAKINAN_TEKS = (
+    None,
+    "⚠️ Keputusan dengan tingkat keyakinan rendah: {}",
+    "✓ Keputusan cukup yakin berdasarkan: {}",
+    "🎯 Keputusan sangat yakin berdasarkan: {}"
+)
+
+WAKTU_PENYIRAMAN = {
+    "Cerah": "⏰ Waktu optimal: pagi hari (06:00-08:00) atau sore hari (17:00-19:00)",
+    "Berawan": "⏰ Waktu optimal: pagi atau siang hari (08:00-16:00)"
+}
+WAKTU_PENYIRAMAN_HUJAN = "⏰ Hindari penyiraman saat hujan, tunggu hingga cuaca membaik"
+
+PERINGATAN_GENANGAN = "⚠️ PERINGATAN: Risiko tinggi genangan air dan pembusukan akar"
+PERINGATAN_KEKERINGAN = "⚠️ PERINGATAN: Risiko stress kekeringan pada tanaman"
+PERINGATAN_DURASI = "⚠️ PERINGATAN: Durasi penyiraman cukup lama untuk tanaman kecil, lakukan secara bertahap"
+
+_alpha_rule = itemgetter(0)
+
+def summary(kelembaban, cuaca, tingkat, durasi) -> str:
+    return f"Berdasarkan kelembaban {kelembaban}% dan cuaca {cuaca}, sistem merekomendasikan penyiraman {tingkat.lower()} selama {durasi} detik."
+
+@lru_cache(maxsize=4096)
+def insight_band(band_k: int, kering: bool, cuaca: str, band_d: int, band_a: int,
+                 rule_desc: Optional[str]) -> Tuple[Tuple[str, ...], Tuple[str, ...], Tuple[str, ...]]:
+    """Insight, rekomendasi dan peringatan untuk satu kombinasi band (dimemo)"""
+    insight_k, saran_k = KELEMBABAN_TEKS[band_k]
+    insight_d, saran_d = DURASI_TEKS[band_d]
+    insights = [insight_k]
+    recommendations = [saran_k]
+
+    weather_info = WEATHER_IMPACT.get(cuaca)
+    if weather_info:
+        insights.append(f"{weather_info['icon']} {weather_info['impact']}")
+        recommendations.append(weather_info['advice'])
+
+    insights.append(insight_d)
+    recommendations.append(saran_d)
+
+    if band_a:
+        insights.append(KEYAKINAN_TEKS[band_a].format(rule_desc))
+
+    if band_d > 0:
+        recommendations.append(WAKTU_PENYIRAMAN.get(cuaca, WAKTU_PENYIRAMAN_HUJAN))
+
+    warnings = ()
+    if band_k == len(KELEMBABAN_BATAS) and cuaca in ("Hujan Ringan", "Hujan Lebat"):
+        warnings = (PERINGATAN_GENANGAN,)
+    elif kering and cuaca == "Cerah":
+        warnings = (PERINGATAN_KEKERINGAN,)
+    elif band_d == len(DURASI_BATAS):
+        warnings = (PERINGATAN_DURASI,)
+    return tuple(insights), tuple(recommendations), warnings
+
+def generate_insights(kelembaban, cuaca, durasi, tingkat, rules) -> Dict:
+    """Insight dan rekomendasi untuk satu hasil perhitungan
+
+    insights/recommendations/warnings adalah tuple hasil memo yang dipakai
+    bersama antar request (jangan diubah); hanya summary yang dibuat baru.
+    """
+    band_a, rule_desc = 0, None
+    if rules:
+        # Rule dengan alpha tertinggi (rule pertama jika sama)
+        dominant_rule = max(rules, key=_alpha_rule)
+        alpha, rule_desc = dominant_rule[0], dominant_rule[2]
+        band_a = 1 + bisect_right(KEYAKINAN_BATAS, alpha) if alpha > 0 else 0
+    insights, recommendations, warnings = insight_band(
+        bisect_left(KELEMBABAN_BATAS, kelembaban), kelembaban < 20, cuaca,
+        bisect_left(DURASI_BATAS, durasi), band_a, rule_desc)
+    return {
+        "insights": insights,
+        "recommendations": recommendations,
+        "warnings": warnings,
+        "summary": summary(kelembaban, cuaca, tingkat, durasi)
+    }
+
+def generate_insights_batch(kelembaban: Sequence[float], cuaca: Sequence[str], durasi: Sequence[float],
+                            tingkat: Sequence[str], alpha: np.ndarray, deskripsi: Sequence[str]) -> List[Dict]:
+    """Insight untuk banyak hasil sekaligus
+
+    `alpha` adalah matriks kekuatan rule (N x R) dan `deskripsi` teks tiap
+    rule. Band dihitung sekaligus dengan numpy, selebihnya sama dengan
+    generate_insights.
+    """
+    kelembaban_arr = np.asarray(kelembaban, dtype=float)
+    durasi_arr = np.asarray(durasi, dtype=float)
+    alpha = np.asarray(alpha, dtype=float)
+
+    bands_k = np.searchsorted(KELEMBABAN_BATAS, kelembaban_arr, side='left').tolist()
+    kering = (kelembaban_arr < 20).tolist()
+    bands_d = np.searchsorted(DURASI_BATAS, durasi_arr, side='left').tolist()
+    dominan = alpha.argmax(axis=1)
+    alpha_dominan = alpha[np.arange(len(alpha)), dominan]
+    bands_a = np.where(alpha_dominan > 0, 1 + np.searchsorted(KEYAKINAN_BATAS, alpha_dominan, side='right'), 0).tolist()
+    dominan = dominan.tolist()
+
+    kelembaban_list = kelembaban_arr.tolist()
+    durasi_list = durasi_arr.tolist()
+    hasil = []
+    for i in range(len(kelembaban_list)):
+        insights, recommendations, warnings = insight_band(
+            bands_k[i], kering[i], cuaca[i], bands_d[i], bands_a[i], deskripsi[dominan[i]] if bands_a[i] else None)
+        hasil.append({
+            "insights": insights,
+            "recommendations": recommendations,
+            "warnings": warnings,
+            "summary": summary(kelembaban_list[i], cuaca[i], tingkat[i], durasi_list[i])
+        })
+    return hasil
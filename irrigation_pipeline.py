@@ -0,0 +1,371 @@
+import logging
+import os
+import time
+import queue
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: hanya mode satu proses (waitress)
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+# Kolom nilai sensor yang diakumulasi per zona dalam satu window
+METRIK = ['kelembaban_tanah', 'suhu', 'kelembaban_udara', 'curah_hujan']
+
+def klasifikasi_cuaca(curah_hujan, kelembaban_udara) -> np.ndarray:
+    """Tentukan label cuaca dari curah hujan (mm) dan kelembaban udara (%)
+
+    Batas mengikuti rentang simulasi generate_weather_based_sensor_data:
+    hujan lebat >= 15 mm, hujan ringan >= 2 mm, berawan jika ada gerimis
+    atau udara lembap (>= 70%), selain itu cerah. Nilai yang hilang (NaN)
+    tidak dianggap 0: jika curah hujan tidak ada, atau tidak hujan dan
+    kelembaban udara tidak ada, hasilnya None (cuaca tidak diketahui).
+    """
+    hujan = np.asarray(curah_hujan, dtype=float)
+    udara = np.asarray(kelembaban_udara, dtype=float)
+    label = np.where(hujan >= 15, 'Hujan Lebat',
+            np.where(hujan >= 2, 'Hujan Ringan',
+            np.where((hujan > 0) | (udara >= 70), 'Berawan', 'Cerah')))
+    diketahui = ~np.isnan(hujan) & ((hujan > 0) | ~np.isnan(udara))
+    return np.where(diketahui, label.astype(object), None)
+
+class IrrigationPipeline:
+    """Evaluasi fuzzy otomatis dari data sensor per zona (device_id)
+
+    Reading dari /api/ingest diantrekan tanpa menunggu, lalu thread latar
+    mengakumulasi rata-rata per zona selama `window` detik. Di akhir window
+    semua zona dievaluasi sekaligus dengan `evaluate` (jalur batch/LUT).
+    Keputusan yang tidak berubah (cuaca dan tingkat sama, selisih durasi
+    < `dedup_tolerance`) tidak ditulis ulang; keputusan baru dikirim ke
+    `writer` (antrean write-behind fuzzy_calculations).
+
+    Jika `sensor_evaluate` diberikan (mis. SensorFuzzyModel.hitung_batch),
+    zona dengan suhu, kelembaban udara dan curah hujan lengkap dievaluasi
+    dengan model cuaca kontinu; zona lain tetap memakai label cuaca. Zona
+    yang cuacanya tidak diketahui memakai label keputusan terakhirnya, atau
+    dilewati jika belum pernah ada keputusan.
+    """
+
+    def __init__(self, fuzzy_system, evaluate: Callable, writer, window: float = 5.0,
+                 max_queue: int = 1000, dedup_tolerance: float = 0.5,
+                 on_decision: Optional[Callable[[List[Dict]], None]] = None,
+                 sensor_evaluate: Optional[Callable] = None):
+        self.fuzzy_system = fuzzy_system
+        self.evaluate = evaluate
+        self.sensor_evaluate = sensor_evaluate
+        self.writer = writer
+        self.window = window
+        self.dedup_tolerance = dedup_tolerance
+        self.on_decision = on_decision
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._akumulasi = {}  # zona -> array [jumlah, cacah] per metrik
+        self._terakhir = {}   # zona -> keputusan terakhir yang ditulis
+        self._lock = threading.Lock()
+        self._closed = False
+
+        # Metrik pipeline
+        self.submitted = 0
+        self.dropped = 0
+        self.windows = 0
+        self.evaluated = 0
+        self.sensor_evaluated = 0
+        self.written = 0
+        self.deduplicated = 0
+        self.weather_missing = 0
+
+        self._thread = threading.Thread(target=self._run, name='irrigation-pipeline', daemon=True)
+        self._thread.start()
+
+    def submit(self, kolom: Dict) -> bool:
+        """Antrekan kolom reading tervalidasi (lihat validate_readings) tanpa menunggu"""
+        jumlah = len(kolom['device_id'])
+        if not jumlah or self._closed:
+            return False
+        try:
+            self._queue.put_nowait((kolom['device_id'], [kolom[m] for m in METRIK]))
+        except queue.Full:
+            # Reading berikutnya akan memperbarui keputusan, jadi cukup dicatat
+            with self._lock:
+                self.dropped += jumlah
+            return False
+        with self._lock:
+            self.submitted += jumlah
+        return True
+
+    def _run(self):
+        deadline = time.monotonic() + self.window
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = None
+            if item is _STOP:
+                self._evaluasi_window()
+                return
+            if item is not None:
+                try:
+                    self._tambah(*item)
+                except Exception:
+                    logger.exception("Pipeline error")
+            if time.monotonic() >= deadline:
+                try:
+                    self._evaluasi_window()
+                except Exception:
+                    logger.exception("Pipeline error")
+                deadline = time.monotonic() + self.window
+
+    def _tambah(self, devices: List[str], nilai: List[np.ndarray]):
+        """Jumlahkan nilai per zona secara vektor lalu gabungkan ke akumulasi window"""
+        zona, indeks = np.unique(np.asarray(devices, dtype=object).astype(str), return_inverse=True)
+        total = np.zeros((len(zona), len(METRIK), 2))
+        for j, v in enumerate(nilai):
+            terisi = ~np.isnan(v)
+            total[:, j, 0] = np.bincount(indeks, weights=np.where(terisi, v, 0.0), minlength=len(zona))
+            total[:, j, 1] = np.bincount(indeks, weights=terisi.astype(float), minlength=len(zona))
+        for i, nama in enumerate(zona.tolist()):
+            if nama in self._akumulasi:
+                self._akumulasi[nama] += total[i]
+            else:
+                self._akumulasi[nama] = total[i]
+
+    def _evaluasi_window(self):
+        akumulasi, self._akumulasi = self._akumulasi, {}
+        with self._lock:
+            self.windows += 1
+        zona = [z for z, total in akumulasi.items() if total[0, 1] > 0]
+        if not zona:
+            return
+
+        total = np.stack([akumulasi[z] for z in zona])
+        with np.errstate(invalid='ignore', divide='ignore'):
+            rata = total[:, :, 0] / total[:, :, 1]
+        kelembaban = np.clip(rata[:, 0], 0, 100)
+        cuaca = klasifikasi_cuaca(rata[:, 3], rata[:, 2])
+        # Tanpa data cuaca jangan anggap cerah (durasi maksimal): pakai label terakhir zona,
+        # zona yang belum punya keputusan tetap None sehingga tidak dievaluasi
+        hilang = [i for i, label in enumerate(cuaca.tolist()) if label is None]
+        for i in hilang:
+            terakhir = self._terakhir.get(zona[i])
+            if terakhir:
+                cuaca[i] = terakhir['cuaca_input']
+
+        durasi = np.zeros(len(zona))
+        tingkat = np.empty(len(zona), dtype=object)
+
+        # Model cuaca kontinu untuk zona dengan data suhu, kelembaban udara dan curah hujan lengkap
+        sensor = np.zeros(len(zona), dtype=bool)
+        if self.sensor_evaluate is not None:
+            sensor = ~np.isnan(rata[:, 1:]).any(axis=1)
+            if sensor.any():
+                hasil = self.sensor_evaluate(kelembaban[sensor], rata[sensor, 3], rata[sensor, 1], rata[sensor, 2])
+                durasi[sensor] = hasil['durasi']
+                tingkat[sensor] = hasil['tingkat'].tolist()
+
+        rule_base = self.fuzzy_system.rule_base
+        kode_cuaca = self.fuzzy_system.kode_cuaca(cuaca.tolist(), rule_base)
+        klasik = (kode_cuaca >= 0) & ~sensor
+        if klasik.any():
+            hasil = self.evaluate(kelembaban[klasik], kode_cuaca[klasik], rule_base)
+            durasi[klasik] = hasil['durasi']
+            tingkat[klasik] = hasil['tingkat'].tolist()
+        valid = sensor | klasik
+
+        sekarang = datetime.now().replace(microsecond=0)
+        keputusan = []
+        durasi = durasi.tolist()
+        tingkat = tingkat.tolist()
+        for i in np.flatnonzero(valid).tolist():
+            terakhir = self._terakhir.get(zona[i])
+            if (terakhir and terakhir['cuaca_input'] == cuaca[i] and terakhir['tingkat_kebutuhan'] == tingkat[i]
+                    and abs(terakhir['durasi_output'] - durasi[i]) < self.dedup_tolerance):
+                with self._lock:
+                    self.deduplicated += 1
+                continue
+            baris = {
+                'zona': zona[i],
+                'kelembaban_input': round(float(kelembaban[i]), 2),
+                'cuaca_input': str(cuaca[i]),
+                'durasi_output': durasi[i],
+                'tingkat_kebutuhan': tingkat[i],
+                'kelembaban_tanah': round(float(kelembaban[i]), 2),
+                'suhu': None if np.isnan(rata[i, 1]) else round(float(rata[i, 1]), 1),
+                'kelembaban_udara': None if np.isnan(rata[i, 2]) else round(float(rata[i, 2]), 2),
+                'curah_hujan': None if np.isnan(rata[i, 3]) else round(float(rata[i, 3]), 2),
+                'status_pompa': "Aktif" if durasi[i] > 0 else "Tidak Aktif",
+                'timestamp': sekarang
+            }
+            self._terakhir[zona[i]] = baris
+            keputusan.append(baris)
+
+        with self._lock:
+            self.evaluated += int(valid.sum())
+            self.sensor_evaluated += int(sensor.sum())
+            self.weather_missing += len(hilang)
+            self.written += len(keputusan)
+        if keputusan:
+            self.writer.put_many(keputusan)
+            if self.on_decision:
+                self.on_decision(keputusan)
+
+    def zones(self) -> Dict[str, Dict]:
+        """Keputusan terakhir per zona"""
+        return {zona: dict(baris, timestamp=baris['timestamp'].strftime('%Y-%m-%d %H:%M:%S'))
+                for zona, baris in list(self._terakhir.items())}
+
+    def close(self, timeout: float = 30.0):
+        """Evaluasi sisa window lalu hentikan thread latar"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def stats(self) -> Dict:
+        """Metrik pipeline untuk monitoring"""
+        with self._lock:
+            return {
+                'queued': self._queue.qsize(),
+                'zones': len(self._terakhir),
+                'submitted': self.submitted,
+                'dropped': self.dropped,
+                'windows': self.windows,
+                'evaluated': self.evaluated,
+                'sensor_evaluated': self.sensor_evaluated,
+                'written': self.written,
+                'deduplicated': self.deduplicated,
+                'weather_missing': self.weather_missing
+            }
+
+class DatabaseReadingSource:
+    """Umpan pipeline dari tabel sensor_readings untuk deployment multi-worker
+
+    Dengan beberapa worker gunicorn, POST /api/ingest diterima worker mana
+    saja sehingga window dan dedup di memori setiap worker hanya melihat
+    sebagian data. Mode ini menyematkan evaluasi ke satu proses: hanya
+    proses yang memegang file lock `lock_path` (flock, dilepas otomatis saat
+    proses berhenti) yang membaca reading baru dari database dan
+    meneruskannya ke pipeline; worker lain hanya menyimpan reading.
+
+    `fetch(after_id, limit)` mengembalikan baris (id, device_id, 4 nilai
+    sensor) urut id, `last_id()` id terbaru. Proses yang baru menjadi
+    pemegang lock mulai dari reading terbaru, sehingga reading selama
+    pergantian tidak ikut dievaluasi (reading berikutnya memperbarui
+    keputusan).
+
+    Id AUTO_INCREMENT dari beberapa worker bisa commit tidak berurutan:
+    reading dengan id lebih kecil baru terlihat setelah id yang lebih besar
+    dibaca. Karena itu setiap poll membaca ulang `lag` id terakhir dan
+    melewati id yang sudah diteruskan; reading yang commit lebih dari `lag`
+    id terlambat tidak ikut dievaluasi.
+    """
+
+    def __init__(self, pipeline: IrrigationPipeline, fetch: Callable, last_id: Callable[[], int],
+                 lock_path: str, interval: float = 1.0, batch_size: int = 5000, lag: int = 1000):
+        if fcntl is None:
+            raise ValueError("Sumber pipeline database memerlukan fcntl (Linux/macOS)")
+        self.pipeline = pipeline
+        self.fetch = fetch
+        self.last_id = last_id
+        self.lock_path = lock_path
+        self.interval = interval
+        self.batch_size = batch_size
+        self.lag = lag
+
+        self._lock_file = None
+        self._posisi = None
+        self._dasar = 0
+        # Id di jendela lag yang sudah diteruskan ke pipeline
+        self._terlihat = set()
+        self._stop = threading.Event()
+        self._thread = None
+
+        # Metrik sumber
+        self.read = 0
+        self.late = 0
+        self.errors = 0
+
+    @property
+    def leader(self) -> bool:
+        return self._lock_file is not None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='pipeline-source', daemon=True)
+            self._thread.start()
+
+    def _ambil_lock(self) -> bool:
+        os.makedirs(os.path.dirname(os.path.abspath(self.lock_path)), exist_ok=True)
+        f = open(self.lock_path, 'a')
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False
+        self._lock_file = f
+        return True
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                if self.leader or self._ambil_lock():
+                    self.poll()
+            except Exception:
+                self.errors += 1
+                logger.exception("Pipeline source error")
+            self._stop.wait(self.interval)
+
+    def poll(self) -> int:
+        """Teruskan reading baru ke pipeline; kembalikan jumlah reading"""
+        if self._posisi is None:
+            self._posisi = self._dasar = self.last_id()
+        # Baca ulang jendela lag (tidak pernah sebelum posisi awal pemegang lock)
+        bawah = max(self._posisi - self.lag, self._dasar)
+        self._terlihat = {i for i in self._terlihat if i > bawah}
+        total = 0
+        setelah = bawah
+        while True:
+            rows = self.fetch(setelah, self.batch_size)
+            if not rows:
+                break
+            setelah = rows[-1][0]
+            baru = [row for row in rows if row[0] not in self._terlihat]
+            if baru:
+                self._terlihat.update(row[0] for row in baru)
+                self.late += sum(1 for row in baru if row[0] <= self._posisi)
+                nilai = np.array([row[2:6] for row in baru], dtype=float)
+                self.pipeline.submit({
+                    'device_id': [row[1] for row in baru],
+                    **{m: nilai[:, j] for j, m in enumerate(METRIK)}
+                })
+                total += len(baru)
+            if len(rows) < self.batch_size:
+                break
+        self._posisi = max(self._posisi, setelah)
+        self.read += total
+        return total
+
+    def close(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def stats(self) -> Dict:
+        return {
+            'leader': self.leader,
+            'position': self._posisi,
+            'read': self.read,
+            'late': self.late,
+            'errors': self.errors
+        }
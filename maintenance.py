@@ -0,0 +1,187 @@
+import gzip
+import json
+import logging
+import os
+import time
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class RowArchiver:
+    """Arsip baris yang akan dihapus ke file JSON lines terkompresi gzip
+
+    Setiap tabel dan tanggal mendapat satu file
+    (`<direktori>/<tabel>/<tabel>-YYYYMMDD.jsonl.gz`); chunk berikutnya
+    ditambahkan sebagai member gzip baru sehingga file tetap dapat dibaca
+    utuh dengan `zcat` atau `gzip.open`.
+    """
+
+    def __init__(self, directory: str, compresslevel: int = 6):
+        self.directory = directory
+        self.compresslevel = compresslevel
+        self._lock = threading.Lock()
+
+        # Metrik arsip
+        self.archived = 0
+
+    def path(self, table: str) -> str:
+        return os.path.join(self.directory, table, f"{table}-{datetime.now():%Y%m%d}.jsonl.gz")
+
+    def __call__(self, table: str, rows: List[Dict]):
+        path = self.path(table)
+        data = ''.join(json.dumps(row, default=str) + '\n' for row in rows).encode('utf-8')
+        with self._lock:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'ab') as raw:
+                with gzip.GzipFile(fileobj=raw, mode='ab', compresslevel=self.compresslevel) as f:
+                    f.write(data)
+                # Pastikan arsip tersimpan di disk sebelum baris dihapus
+                raw.flush()
+                os.fsync(raw.fileno())
+            self.archived += len(rows)
+
+class MaintenanceScheduler:
+    """Penjadwal tugas pemeliharaan periodik di satu thread latar
+
+    Setiap tugas adalah fungsi tanpa argumen yang mengembalikan jumlah baris
+    yang diproses. Jika `lock` diberikan (context manager yang menghasilkan
+    True/False), satu putaran hanya dijalankan oleh proses yang mendapat
+    lock, sehingga beberapa worker gunicorn tidak menghapus data bersamaan.
+    """
+
+    def __init__(self, interval: float = 3600.0, lock: Optional[Callable] = None,
+                 initial_delay: float = 0.0):
+        self.interval = interval
+        self.lock = lock
+        self.initial_delay = initial_delay
+        self._tasks = {}
+        self._metrics = {}
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._run_lock = threading.Lock()
+        self._metrics_lock = threading.Lock()
+        self._thread = None
+        self._sekali = None
+
+        # Metrik putaran
+        self.runs = 0
+        self.skipped = 0
+        self.last_run = None
+
+    def add_task(self, name: str, task: Callable[[], int]):
+        self._tasks[name] = task
+        self._metrics[name] = {
+            'runs': 0, 'errors': 0, 'processed_total': 0, 'last_processed': None,
+            'last_duration': None, 'last_run': None, 'last_error': None
+        }
+
+    def start(self):
+        if self._thread is None and self.interval > 0 and self._tasks:
+            self._thread = threading.Thread(target=self._loop, name='maintenance', daemon=True)
+            self._thread.start()
+
+    def _tunggu(self, timeout: float) -> bool:
+        """Tunggu `timeout` detik atau sampai trigger(); True jika penjadwal dihentikan"""
+        self._wake.wait(timeout)
+        self._wake.clear()
+        return self._stop.is_set()
+
+    def _loop(self):
+        if self._tunggu(self.initial_delay):
+            return
+        while True:
+            self.run()
+            if self._tunggu(self.interval):
+                return
+
+    def trigger(self) -> bool:
+        """Minta satu putaran segera di thread latar, tanpa menunggu hasilnya
+
+        Jika penjadwal periodik berjalan, thread-nya dibangunkan; jika tidak
+        (MAINTENANCE_INTERVAL = 0), satu putaran dijalankan di thread
+        tersendiri. False jika penjadwal sudah dihentikan.
+        """
+        if self._stop.is_set():
+            return False
+        if self._thread is not None and self._thread.is_alive():
+            self._wake.set()
+            return True
+        with self._metrics_lock:
+            if self._sekali is None or not self._sekali.is_alive():
+                self._sekali = threading.Thread(target=self.run, name='maintenance-once', daemon=True)
+                self._sekali.start()
+        return True
+
+    def run(self, names: Optional[List[str]] = None) -> Dict:
+        """Jalankan tugas (semua atau `names`) sekarang; kembalikan jumlah baris per tugas"""
+        with self._run_lock:
+            if self.lock:
+                with self.lock() as didapat:
+                    if not didapat:
+                        with self._metrics_lock:
+                            self.skipped += 1
+                        return {}
+                    return self._jalankan(names)
+            return self._jalankan(names)
+
+    def _jalankan(self, names: Optional[List[str]]) -> Dict:
+        hasil = {}
+        for name in names or list(self._tasks):
+            if self._stop.is_set():
+                break
+            mulai = time.perf_counter()
+            processed = None
+            error = None
+            try:
+                processed = self._tasks[name]()
+            except Exception as e:
+                error = str(e)
+                logger.exception("Maintenance error (%s)", name)
+            with self._metrics_lock:
+                metrik = self._metrics[name]
+                metrik['runs'] += 1
+                metrik['last_run'] = datetime.now().isoformat()
+                metrik['last_duration'] = round(time.perf_counter() - mulai, 3)
+                metrik['last_processed'] = processed
+                if error:
+                    metrik['errors'] += 1
+                    metrik['last_error'] = error
+                else:
+                    metrik['processed_total'] += processed or 0
+            hasil[name] = processed
+        with self._metrics_lock:
+            self.runs += 1
+            self.last_run = datetime.now().isoformat()
+        return hasil
+
+    def close(self, timeout: float = 30.0):
+        """Hentikan penjadwal; tugas yang sedang berjalan diselesaikan dulu"""
+        self._stop.set()
+        self._wake.set()
+        for thread in (self._thread, self._sekali):
+            if thread is not None:
+                thread.join(timeout)
+
+    def stats(self) -> Dict:
+        with self._metrics_lock:
+            return {
+                'interval': self.interval,
+                'running': self._thread is not None and self._thread.is_alive(),
+                'runs': self.runs,
+                'skipped': self.skipped,
+                'last_run': self.last_run,
+                'tasks': {name: dict(metrik) for name, metrik in self._metrics.items()}
+            }
+
+def retention_task(db, table: str, days: float, chunk_size: int = 1000, pause: float = 0.1,
+                   archive: Optional[RowArchiver] = None) -> Callable[[], int]:
+    """Tugas penghapusan baris `table` yang lebih lama dari `days` hari"""
+    def task() -> int:
+        cutoff = datetime.now() - timedelta(days=days)
+        if table == 'fuzzy_calculations':
+            # Bulan yang sudah lewat dibuang dengan DROP PARTITION jika tabel dipartisi
+            return db.purge_calculations(cutoff, chunk_size, pause, archive)
+        return db.purge_rows(table, cutoff, chunk_size, pause, archive)
+    return task
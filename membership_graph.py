@@ -0,0 +1,296 @@
+import io
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from PIL import Image
+
+# Warna kurva per himpunan (berurutan), dipakai berulang jika himpunan lebih banyak
+WARNA_HIMPUNAN = [
+    ('red', 'darkred'),
+    ('green', 'darkgreen'),
+    ('blue', 'darkblue'),
+    ('orange', 'darkorange'),
+    ('purple', 'indigo')
+]
+
+# Anotasi titik transisi dan wilayah warna (0-100% kelembaban tanah)
+KEY_POINTS = [
+    (0, 'Sangat Kering'),
+    (20, 'Transisi Rendah-Sedang'),
+    (40, 'Optimal Sedang'),
+    (60, 'Transisi Sedang-Tinggi'),
+    (100, 'Sangat Basah')
+]
+WILAYAH = [(0, 20, 'red'), (20, 60, 'green'), (60, 100, 'blue')]
+
+JUDUL = 'Fungsi Keanggotaan Kelembaban Tanah'
+
+# Ukuran gambar yang dirender: dpi dan figsize dari request dibulatkan ke preset terdekat
+# agar jumlah background (satu figure penuh per ukuran) tetap kecil dan cache tidak thrash
+DPI_PRESETS = (50, 72, 100, 150, 200, 300)
+FIGSIZE_PRESETS = ((12, 8),)
+
+def _terdekat(nilai, pilihan):
+    # Jarak sama: pilih preset yang lebih besar agar gambar tidak lebih kecil dari permintaan
+    return min(pilihan, key=lambda p: (abs(p - nilai), -p))
+
+# Format gambar yang didukung beserta MIME type
+FORMAT_GAMBAR = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml'
+}
+
+class _LRUCache:
+    """LRU cache sederhana yang thread-safe dengan penghitung hit/miss"""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+class _Background:
+    """Figure dengan elemen statis yang sudah dirender + artist overlay (animated)"""
+
+    def __init__(self, rule_base, dpi: int, figsize: Tuple[float, float]):
+        self.lock = threading.Lock()
+        self.figure = Figure(figsize=figsize, dpi=dpi, facecolor='white')
+        self.canvas = FigureCanvasAgg(self.figure)
+        ax = self.ax = self.figure.add_subplot(111)
+
+        # Kurva fungsi keanggotaan (dihitung vektor dari rule base)
+        x = np.linspace(0, 100, 1000)
+        mu = rule_base.fuzzifikasi('kelembaban', x)
+        himpunan = rule_base.variabel['kelembaban'].nama_himpunan
+        self.warna = [WARNA_HIMPUNAN[i % len(WARNA_HIMPUNAN)] for i in range(len(himpunan))]
+        for i, nama in enumerate(himpunan):
+            warna = self.warna[i][0]
+            ax.plot(x, mu[:, i], color=warna, linestyle='-', linewidth=3, label=nama.capitalize(), alpha=0.8)
+            ax.fill_between(x, mu[:, i], alpha=0.2, color=warna)
+
+        ax.set_xlabel('Kelembaban Tanah (%)', fontsize=14, fontweight='bold')
+        ax.set_ylabel('Derajat Keanggotaan', fontsize=14, fontweight='bold')
+        ax.grid(True, alpha=0.4, linestyle='-', linewidth=0.5)
+        ax.legend(fontsize=12, loc='upper right', framealpha=0.9)
+        ax.set_xlim(0, 100)
+        ax.set_ylim(-0.2, 1.2)
+
+        for point, label in KEY_POINTS:
+            ax.axvline(x=point, color='gray', linestyle=':', alpha=0.5)
+            ax.text(point, 1.15, label, rotation=45, ha='left', va='bottom',
+                    fontsize=9, alpha=0.7, style='italic')
+
+        for awal, akhir, warna in WILAYAH:
+            ax.axvspan(awal, akhir, alpha=0.1, color=warna, label='_nolegend_')
+
+        # Layout dihitung dengan judul dua baris agar ruang judul cukup untuk kedua versi
+        self.judul = ax.set_title(f'{JUDUL}\nDengan Input Terbaru: 100.0%', fontsize=16, fontweight='bold', pad=20)
+        self.figure.tight_layout()
+
+        # Artist overlay: tidak ikut dirender di background, digambar ulang per request
+        self.garis_input = ax.axvline(x=0, color='black', linestyle='--', linewidth=2, alpha=0.7)
+        self.titik = []
+        self.anotasi = []
+        for i, nama in enumerate(himpunan):
+            warna, warna_gelap = self.warna[i]
+            titik, = ax.plot([0], [0], 'o', markersize=8, markerfacecolor=warna,
+                             markeredgecolor=warna_gelap, markeredgewidth=2)
+            anotasi = ax.annotate('', xy=(0, 0), xytext=(0, 0),
+                                  fontsize=10, fontweight='bold', color=warna_gelap,
+                                  bbox=dict(boxstyle="round,pad=0.3", facecolor='white', edgecolor=warna, alpha=0.8),
+                                  arrowprops=dict(arrowstyle='->', color=warna, alpha=0.7))
+            self.titik.append(titik)
+            self.anotasi.append((nama, anotasi))
+        self.label_input = ax.annotate('', xy=(0, 0), xytext=(0, -0.15),
+                                       fontsize=12, fontweight='bold', color='black', ha='center',
+                                       bbox=dict(boxstyle="round,pad=0.5", facecolor='yellow', alpha=0.8))
+
+        self.overlay = [self.judul, self.garis_input, *self.titik,
+                        *[a for _, a in self.anotasi], self.label_input]
+        for artist in self.overlay:
+            artist.set_animated(True)
+
+        self.canvas.draw()
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+
+    def _atur_overlay(self, rule_base, highlight_input: Optional[float]):
+        """Perbarui teks/posisi overlay; overlay input disembunyikan jika tidak ada highlight"""
+        if highlight_input is None:
+            self.judul.set_text(JUDUL)
+            for artist in self.overlay[1:]:
+                artist.set_visible(False)
+            return
+
+        self.judul.set_text(f'{JUDUL}\nDengan Input Terbaru: {highlight_input}%')
+        mu = rule_base.fuzzifikasi('kelembaban', [highlight_input])[0].tolist()
+
+        # Label ditaruh di kiri garis jika input dekat batas kanan grafik
+        offset, ha = (15, 'left') if highlight_input <= 70 else (-15, 'right')
+
+        self.garis_input.set_xdata([highlight_input, highlight_input])
+        for i, (nama, anotasi) in enumerate(self.anotasi):
+            self.titik[i].set_data([highlight_input], [mu[i]])
+            anotasi.set_text(f'μ_{nama} = {mu[i]:.3f}')
+            anotasi.xy = (highlight_input, mu[i])
+            anotasi.set_position((highlight_input + offset, mu[i] + 0.1))
+            anotasi.set_horizontalalignment(ha)
+
+        self.label_input.set_text(f'Input: {highlight_input}%')
+        self.label_input.xy = (highlight_input, 0)
+        self.label_input.set_position((highlight_input, -0.15))
+
+        for artist in self.overlay[1:]:
+            artist.set_visible(True)
+
+    def render(self, rule_base, highlight_input: Optional[float]) -> np.ndarray:
+        """Tempel overlay di atas background dan kembalikan salinan buffer RGB"""
+        with self.lock:
+            self.canvas.restore_region(self.background)
+            self._atur_overlay(rule_base, highlight_input)
+            for artist in self.overlay:
+                if artist.get_visible():
+                    self.ax.draw_artist(artist)
+            return np.asarray(self.canvas.buffer_rgba())[:, :, :3].copy()
+
+    def render_svg(self, rule_base, highlight_input: Optional[float]) -> bytes:
+        """Render figure lengkap (background + overlay) sebagai SVG"""
+        with self.lock:
+            self._atur_overlay(rule_base, highlight_input)
+            for artist in self.overlay:
+                artist.set_animated(False)
+            try:
+                buffer = io.BytesIO()
+                self.figure.savefig(buffer, format='svg', facecolor='white', edgecolor='none')
+                return buffer.getvalue()
+            finally:
+                for artist in self.overlay:
+                    artist.set_animated(True)
+
+class MembershipGraphRenderer:
+    """Renderer grafik fungsi keanggotaan kelembaban dengan cache
+
+    Elemen statis (kurva, area, anotasi titik transisi) dirender sekali per
+    rule base dan ukuran gambar; per request hanya overlay input yang
+    digambar ulang. Gambar hasil encode disimpan di LRU cache dengan kunci
+    (versi rule base, nilai highlight, format), yang sekaligus menjadi ETag.
+    dpi dan figsize dibulatkan ke DPI_PRESETS/FIGSIZE_PRESETS, sehingga
+    background semua ukuran satu rule base muat di cache.
+    """
+
+    def __init__(self, cache_size: int = 128,
+                 background_cache_size: int = len(DPI_PRESETS) * len(FIGSIZE_PRESETS),
+                 dpi: int = 200, figsize: Tuple[float, float] = (12, 8)):
+        self.dpi = self.snap_dpi(dpi)
+        self.figsize = self.snap_figsize(figsize)
+        self.cache = _LRUCache(cache_size)
+        self._backgrounds = _LRUCache(background_cache_size)
+        self._background_lock = threading.Lock()
+
+    @staticmethod
+    def _highlight(highlight_input: Optional[float]) -> Optional[float]:
+        # Input di luar 0-100% tidak ditandai pada grafik
+        if highlight_input is not None and not (0 <= highlight_input <= 100):
+            return None
+        return highlight_input
+
+    @staticmethod
+    def snap_dpi(dpi: float) -> int:
+        """dpi preset terdekat"""
+        return _terdekat(dpi, DPI_PRESETS)
+
+    @staticmethod
+    def snap_figsize(figsize: Tuple[float, float]) -> Tuple[float, float]:
+        """Ukuran figure (inci) preset terdekat"""
+        lebar, tinggi = figsize
+        return min(FIGSIZE_PRESETS, key=lambda p: (p[0] - lebar) ** 2 + (p[1] - tinggi) ** 2)
+
+    def _key(self, rule_base, highlight_input, fmt, dpi, figsize) -> tuple:
+        dpi = self.snap_dpi(dpi) if dpi else self.dpi
+        figsize = self.snap_figsize(figsize) if figsize else self.figsize
+        return (rule_base.versi, self._highlight(highlight_input), fmt, dpi, figsize)
+
+    def etag(self, rule_base, highlight_input: Optional[float] = None, fmt: str = 'png',
+             dpi: Optional[int] = None, figsize: Optional[Tuple[float, float]] = None) -> str:
+        """ETag gambar, dapat dihitung tanpa merender"""
+        key = self._key(rule_base, highlight_input, fmt, dpi, figsize)
+        return hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+
+    def _background(self, rule_base, dpi: int, figsize: Tuple[float, float]) -> _Background:
+        key = (rule_base.versi, dpi, tuple(figsize))
+        background = self._backgrounds.get(key)
+        if background is None:
+            with self._background_lock:
+                background = self._backgrounds.get(key)
+                if background is None:
+                    background = _Background(rule_base, dpi, figsize)
+                    self._backgrounds.put(key, background)
+        return background
+
+    def render(self, rule_base, highlight_input: Optional[float] = None, fmt: str = 'png',
+               dpi: Optional[int] = None, figsize: Optional[Tuple[float, float]] = None) -> bytes:
+        """Gambar grafik keanggotaan dalam format png/svg (dari cache jika tersedia)"""
+        if fmt not in FORMAT_GAMBAR:
+            raise ValueError(f"Format gambar harus salah satu dari {list(FORMAT_GAMBAR)}")
+        key = self._key(rule_base, highlight_input, fmt, dpi, figsize)
+        _, highlight_input, _, dpi, figsize = key
+        data = self.cache.get(key)
+        if data is not None:
+            return data
+
+        background = self._background(rule_base, dpi, figsize)
+        if fmt == 'svg':
+            data = background.render_svg(rule_base, highlight_input)
+        else:
+            pixels = background.render(rule_base, highlight_input)
+            # Grafik hanya memakai sedikit warna, palet 256 warna membuat encode
+            # PNG sekitar 2x lebih cepat dan ukuran file sekitar 3x lebih kecil
+            gambar = Image.fromarray(pixels).quantize(256, method=Image.Quantize.FASTOCTREE,
+                                                      dither=Image.Dither.NONE)
+            buffer = io.BytesIO()
+            gambar.save(buffer, format='png', compress_level=3)
+            data = buffer.getvalue()
+        self.cache.put(key, data)
+        return data
+
+    def render_png(self, rule_base, highlight_input: Optional[float] = None,
+                   dpi: Optional[int] = None, figsize: Optional[Tuple[float, float]] = None) -> bytes:
+        """Gambar PNG grafik keanggotaan (dari cache jika tersedia)"""
+        return self.render(rule_base, highlight_input, 'png', dpi, figsize)
+
+    def stats(self) -> Dict:
+        """Statistik cache untuk monitoring"""
+        return {
+            'entries': len(self.cache),
+            'hits': self.cache.hits,
+            'misses': self.cache.misses,
+            'backgrounds': len(self._backgrounds)
+        }
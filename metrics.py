@@ -0,0 +1,324 @@
+import functools
+import glob
+import inspect
+import json
+import logging
+import math
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Batas bucket histogram latensi (detik), sama dengan default client Prometheus
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+logger = logging.getLogger(__name__)
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if value == -math.inf:
+        return '-Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def _labels(labelnames: Sequence[str], values: Sequence, extra: Tuple = ()) -> str:
+    pasangan = [f'{n}="{_escape(v)}"' for n, v in zip(labelnames, values)] + list(extra)
+    return '{' + ','.join(pasangan) + '}' if pasangan else ''
+
+class _Metric:
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict) -> Tuple:
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f'# HELP {self.name} {_escape(self.documentation)}', f'# TYPE {self.name} {self.kind}']
+
+class Counter(_Metric):
+    """Counter monotonic per kombinasi label"""
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def snapshot(self) -> List:
+        with self._lock:
+            return [[list(k), v] for k, v in self._values.items()]
+
+    def samples(self, snapshots: Sequence = None) -> List[str]:
+        total = {}
+        for _, _, data in snapshots if snapshots is not None else [(None, True, self.snapshot())]:
+            for key, value in data:
+                key = tuple(key)
+                total[key] = total.get(key, 0.0) + value
+        return [f'{self.name}{_labels(self.labelnames, k)} {_format_value(v)}' for k, v in total.items()]
+
+class Histogram(_Metric):
+    """Histogram kumulatif (bucket, _sum, _count) per kombinasi label
+
+    Setiap observasi hanya mencari bucket dengan bisect kecil dan menambah
+    dua angka di bawah lock, sehingga aman dipanggil di setiap request.
+    """
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+        self._values = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        indeks = len(self.buckets)
+        for i, batas in enumerate(self.buckets):
+            if value <= batas:
+                indeks = i
+                break
+        with self._lock:
+            data = self._values.get(key)
+            if data is None:
+                # [jumlah per bucket (non-kumulatif, + slot +Inf), sum]
+                data = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            data[0][indeks] += 1
+            data[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        mulai = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - mulai, **labels)
+
+    def snapshot(self) -> List:
+        with self._lock:
+            return [[list(k), list(v[0]), v[1]] for k, v in self._values.items()]
+
+    def samples(self, snapshots: Sequence = None) -> List[str]:
+        gabungan = {}
+        for _, _, data in snapshots if snapshots is not None else [(None, True, self.snapshot())]:
+            for key, counts, total in data:
+                key = tuple(key)
+                item = gabungan.get(key)
+                if item is None:
+                    gabungan[key] = [list(counts), total]
+                else:
+                    item[0] = [a + b for a, b in zip(item[0], counts)]
+                    item[1] += total
+        baris = []
+        for key, (counts, total) in gabungan.items():
+            kumulatif = 0
+            for batas, jumlah in zip(self.buckets + (math.inf,), counts):
+                kumulatif += jumlah
+                le = ('le="' + _format_value(batas) + '"',)
+                baris.append(f'{self.name}_bucket{_labels(self.labelnames, key, le)} {kumulatif}')
+            baris.append(f'{self.name}_sum{_labels(self.labelnames, key)} {_format_value(total)}')
+            baris.append(f'{self.name}_count{_labels(self.labelnames, key)} {kumulatif}')
+        return baris
+
+class CallbackMetric(_Metric):
+    """Gauge/counter yang nilainya dibaca dari komponen lain saat scrape
+
+    `callback` mengembalikan angka (tanpa label) atau dict
+    {tuple nilai label: angka}.
+    """
+
+    def __init__(self, name: str, documentation: str, callback: Callable, labelnames: Sequence[str] = (),
+                 kind: str = 'gauge'):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+        self.kind = kind
+
+    def snapshot(self) -> List:
+        nilai = self.callback()
+        if nilai is None:
+            return []
+        if not isinstance(nilai, dict):
+            nilai = {(): nilai}
+        return [[list(k), float(v)] for k, v in nilai.items() if v is not None]
+
+    def samples(self, snapshots: Sequence = None) -> List[str]:
+        if snapshots is None:
+            return [f'{self.name}{_labels(self.labelnames, k)} {_format_value(v)}' for k, v in self.snapshot()]
+        if self.kind == 'counter':
+            # Counter dijumlahkan dari semua proses, termasuk worker yang sudah berhenti
+            total = {}
+            for _, _, data in snapshots:
+                for key, value in data:
+                    key = tuple(key)
+                    total[key] = total.get(key, 0.0) + value
+            return [f'{self.name}{_labels(self.labelnames, k)} {_format_value(v)}' for k, v in total.items()]
+        # Gauge (mis. rasio hit, kedalaman antrean) tidak dapat dijumlahkan: satu seri per proses hidup
+        labelnames = self.labelnames + ('pid',)
+        return [f'{self.name}{_labels(labelnames, tuple(key) + (pid,))} {_format_value(value)}'
+                for pid, hidup, data in snapshots if hidup for key, value in data]
+
+class MetricsRegistry:
+    """Kumpulan metrik proses ini, dirender dalam format teks Prometheus
+
+    Jika `multiprocess_dir` diisi (beberapa worker gunicorn), setiap proses
+    menulis snapshot metriknya ke `<dir>/<pid>-<id>.json` secara berkala
+    (start()) dan saat di-scrape, lalu render() menggabungkan snapshot semua
+    proses: counter dan histogram dijumlahkan (termasuk worker yang sudah
+    berhenti, sehingga tidak pernah turun), gauge diberi label `pid` untuk
+    setiap proses yang masih hidup. Kosongkan direktori saat server mulai.
+    """
+
+    def __init__(self, prefix: str = '', multiprocess_dir: Optional[str] = None):
+        self.prefix = prefix
+        self.multiprocess_dir = multiprocess_dir
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        if multiprocess_dir:
+            os.makedirs(multiprocess_dir, exist_ok=True)
+            self._path = os.path.join(multiprocess_dir, f'{os.getpid()}-{uuid.uuid4().hex[:8]}.json')
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metrik {metric.name} sudah terdaftar")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(self.prefix + name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(self.prefix + name, documentation, labelnames, buckets))
+
+    def callback(self, name: str, documentation: str, callback: Callable, labelnames: Sequence[str] = (),
+                 kind: str = 'gauge') -> CallbackMetric:
+        return self._register(CallbackMetric(self.prefix + name, documentation, callback, labelnames, kind))
+
+    def dump(self):
+        """Tulis snapshot metrik proses ini ke multiprocess_dir (atomik)"""
+        if not self.multiprocess_dir:
+            return
+        with self._lock:
+            metrics = list(self._metrics.values())
+        data = {}
+        for metric in metrics:
+            try:
+                data[metric.name] = metric.snapshot()
+            except Exception:
+                logger.exception("Gagal membaca metrik %s", metric.name)
+        sementara = self._path + '.tmp'
+        with open(sementara, 'w') as f:
+            json.dump({'pid': os.getpid(), 'metrics': data}, f)
+        os.replace(sementara, self._path)
+
+    def start(self, interval: float = 5.0):
+        """Tulis snapshot setiap `interval` detik di thread latar (mode multiproses)"""
+        if self.multiprocess_dir and self._thread is None:
+            self._thread = threading.Thread(target=self._loop, args=(interval,), name='metrics-dump', daemon=True)
+            self._thread.start()
+
+    def _loop(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                self.dump()
+            except Exception:
+                logger.exception("Gagal menulis snapshot metrik")
+
+    def close(self):
+        """Hentikan thread latar dan simpan snapshot terakhir (counter worker yang berhenti tetap dihitung)"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(5)
+        self.dump()
+
+    def _snapshots(self) -> Dict[str, List]:
+        """{nama metrik: [(pid, hidup, data)]} dari semua file snapshot"""
+        self.dump()
+        hasil = {}
+        for path in glob.glob(os.path.join(self.multiprocess_dir, '*.json')):
+            try:
+                with open(path) as f:
+                    isi = json.load(f)
+            except (OSError, ValueError):
+                continue
+            pid = isi['pid']
+            hidup = path == self._path or _proses_hidup(pid)
+            for nama, data in isi['metrics'].items():
+                hasil.setdefault(nama, []).append((pid, hidup, data))
+        return hasil
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        snapshots = self._snapshots() if self.multiprocess_dir else None
+        baris = []
+        for metric in metrics:
+            try:
+                samples = metric.samples(snapshots.get(metric.name, []) if snapshots is not None else None)
+            except Exception as e:
+                # Komponen yang gagal dibaca tidak boleh menggagalkan seluruh scrape
+                samples = []
+                baris.append(f'# ERROR {metric.name} {_escape(e)}')
+            baris.extend(metric.header())
+            baris.extend(samples)
+        return '\n'.join(baris) + '\n'
+
+def _proses_hidup(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def instrument(obj, names: Iterable[str], histogram: Histogram, label: str = 'method'):
+    """Ganti method `names` pada instance `obj` dengan versi yang mengukur durasi
+
+    Method generator diukur sampai iterasinya selesai. Panggil sebelum bound
+    method `obj` disimpan di tempat lain (mis. WriteBehindQueue), karena
+    referensi lama tidak ikut terukur.
+    """
+    for name in names:
+        fungsi = getattr(obj, name)
+        setattr(obj, name, _timed(fungsi, histogram, {label: name}))
+    return obj
+
+def _timed(fungsi: Callable, histogram: Histogram, labels: Dict) -> Callable:
+    if inspect.isgeneratorfunction(fungsi):
+        @functools.wraps(fungsi)
+        def generator(*args, **kwargs):
+            with histogram.time(**labels):
+                yield from fungsi(*args, **kwargs)
+        return generator
+
+    @functools.wraps(fungsi)
+    def wrapper(*args, **kwargs):
+        with histogram.time(**labels):
+            return fungsi(*args, **kwargs)
+    return wrapper
+
+def hit_ratio(hits: Optional[float], misses: Optional[float]) -> Optional[float]:
+    """Rasio hit cache, None jika belum ada akses"""
+    total = (hits or 0) + (misses or 0)
+    return (hits or 0) / total if total else None
@@ -0,0 +1,270 @@
+import csv
+import io
+import json
+import time
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Rentang nilai sensor yang valid; satu-satunya sumber batas untuk /api/ingest dan
+# input sensor /calculate
+SENSOR_RANGES = {
+    'kelembaban_tanah': (0, 100),
+    'suhu': (-20, 60),
+    'kelembaban_udara': (0, 100),
+    'curah_hujan': (0, 999)
+}
+
+# Kolom nilai sensor: (nama kolom database, alias di payload, batas bawah, batas atas)
+FIELDS = [
+    (nama, aliases) + SENSOR_RANGES[nama] for nama, aliases in (
+        ('kelembaban_tanah', ('kelembaban_tanah', 'soil_moisture', 'moisture')),
+        ('suhu', ('suhu', 'temperature', 'temp')),
+        ('kelembaban_udara', ('kelembaban_udara', 'udara', 'humidity')),
+        ('curah_hujan', ('curah_hujan', 'hujan', 'rain'))
+    )
+]
+DEVICE_KEYS = ('device_id', 'device')
+TIMESTAMP_KEYS = ('recorded_at', 'timestamp', 'ts')
+
+DEVICE_ID_MAX = 64
+FUTURE_TOLERANCE = timedelta(minutes=5)
+
+# Format body yang didukung berdasarkan Content-Type
+FORMAT_JSON_LINES = ('application/x-ndjson', 'application/jsonl', 'application/json-lines')
+FORMAT_CSV = ('text/csv',)
+
+def _ambil(record: Dict, keys):
+    for key in keys:
+        if key in record:
+            return record[key]
+    return None
+
+def parse_device_keys(value: str) -> Dict[str, frozenset]:
+    """Uraikan INGEST_API_KEYS (`device_id:key`, dipisah koma) menjadi {key: device_id yang diizinkan}
+
+    Key yang sama boleh didaftarkan untuk beberapa device_id, mis. gateway
+    yang meneruskan data beberapa sensor.
+    """
+    keys = {}
+    for entri in value.split(','):
+        entri = entri.strip()
+        if not entri:
+            continue
+        device_id, _, key = entri.partition(':')
+        if not device_id or not key:
+            raise ValueError("INGEST_API_KEYS harus berformat device_id:key (pisahkan dengan koma)")
+        keys.setdefault(key, set()).add(device_id)
+    return {key: frozenset(devices) for key, devices in keys.items()}
+
+def parse_body(body: bytes, content_type: str) -> List:
+    """Uraikan body request menjadi list record (dict); baris rusak menjadi None"""
+    content_type = (content_type or '').split(';')[0].strip().lower()
+    text = body.decode('utf-8')
+
+    if content_type in FORMAT_CSV:
+        reader = csv.reader(io.StringIO(text))
+        header = next(reader, None)
+        if not header:
+            return []
+        header = [h.strip() for h in header]
+        return [dict(zip(header, row)) if len(row) == len(header) else None
+                for row in reader if row]
+
+    if content_type in FORMAT_JSON_LINES:
+        records = []
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            records.append(record if isinstance(record, dict) else None)
+        return records
+
+    data = json.loads(text)
+    if isinstance(data, dict):
+        data = data.get('readings', [])
+    if not isinstance(data, list):
+        raise ValueError("Body JSON harus berupa list reading atau {'readings': [...]}")
+    return [record if isinstance(record, dict) else None for record in data]
+
+def _parse_timestamp(value, now: datetime) -> Optional[datetime]:
+    if value is None or value == '':
+        return now
+    if isinstance(value, (int, float)) or (isinstance(value, str) and value.replace('.', '', 1).isdigit()):
+        detik = float(value)
+        # Epoch dalam milidetik dari perangkat yang tidak mendukung float
+        if detik > 1e11:
+            detik /= 1000
+        return datetime.fromtimestamp(detik)
+    waktu = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    if waktu.tzinfo is not None:
+        waktu = waktu.astimezone().replace(tzinfo=None)
+    return waktu
+
+def validate_readings(records: List, default_device: Optional[str] = None,
+                      max_errors: int = 20, allowed_devices: Optional[frozenset] = None) -> Tuple[Dict, List[Dict], int]:
+    """Validasi semua reading sekaligus
+
+    Jika `allowed_devices` diberikan (device_id milik device key pengirim),
+    reading untuk perangkat lain ditolak. Mengembalikan (kolom hasil valid, daftar error (maksimal `max_errors`),
+    jumlah reading tidak valid). Kolom hasil berisi list 'device_id',
+    'recorded_at' dan array numpy untuk setiap kolom nilai sensor.
+    """
+    n = len(records)
+    now = datetime.now()
+    nilai = np.full((n, len(FIELDS)), np.nan)
+    devices = [None] * n
+    waktu = [None] * n
+    alasan = [None] * n
+
+    for i, record in enumerate(records):
+        if record is None:
+            alasan[i] = 'Format reading tidak valid'
+            continue
+        device = _ambil(record, DEVICE_KEYS) or default_device
+        if not device or len(str(device)) > DEVICE_ID_MAX:
+            alasan[i] = 'device_id wajib diisi (maksimal 64 karakter)'
+            continue
+        if allowed_devices is not None and str(device) not in allowed_devices:
+            alasan[i] = 'device_id tidak terdaftar untuk device key ini'
+            continue
+        devices[i] = str(device)
+        try:
+            waktu[i] = _parse_timestamp(_ambil(record, TIMESTAMP_KEYS), now)
+        except (ValueError, TypeError, OverflowError, OSError):
+            alasan[i] = 'Timestamp tidak valid'
+            continue
+        for j, (_, aliases, _, _) in enumerate(FIELDS):
+            value = _ambil(record, aliases)
+            if value is None or value == '':
+                continue
+            try:
+                nilai[i, j] = float(value)
+            except (ValueError, TypeError):
+                alasan[i] = f'Nilai {FIELDS[j][0]} harus berupa angka'
+                break
+
+    # Validasi rentang dan kelengkapan secara vektor
+    terisi = ~np.isnan(nilai)
+    batas_bawah = np.array([f[2] for f in FIELDS], dtype=float)
+    batas_atas = np.array([f[3] for f in FIELDS], dtype=float)
+    di_luar = terisi & ((nilai < batas_bawah) | (nilai > batas_atas) | ~np.isfinite(nilai))
+    kosong = ~terisi.any(axis=1)
+    for i in np.flatnonzero(di_luar.any(axis=1) | kosong).tolist():
+        if alasan[i] is None:
+            if kosong[i]:
+                alasan[i] = 'Reading tidak berisi nilai sensor'
+            else:
+                j = int(np.flatnonzero(di_luar[i])[0])
+                alasan[i] = f'Nilai {FIELDS[j][0]} harus antara {FIELDS[j][2]}-{FIELDS[j][3]}'
+    batas_waktu = now + FUTURE_TOLERANCE
+    for i in range(n):
+        if alasan[i] is None and waktu[i] > batas_waktu:
+            alasan[i] = 'Timestamp berada di masa depan'
+
+    valid = np.array([a is None for a in alasan], dtype=bool)
+    errors = [{'index': i, 'error': alasan[i]} for i in np.flatnonzero(~valid)[:max_errors].tolist()]
+    indeks = np.flatnonzero(valid).tolist()
+    hasil = {
+        'device_id': [devices[i] for i in indeks],
+        'recorded_at': [waktu[i] for i in indeks]
+    }
+    for j, (nama, _, _, _) in enumerate(FIELDS):
+        hasil[nama] = nilai[valid, j]
+    return hasil, errors, int(n - len(indeks))
+
+def to_rows(kolom: Dict) -> List[tuple]:
+    """Ubah kolom hasil validasi menjadi tuple baris INSERT sensor_readings (NaN -> NULL)"""
+    nilai = [[None if np.isnan(v) else round(v, 2) for v in kolom[nama].tolist()] for nama, _, _, _ in FIELDS]
+    return list(zip(kolom['device_id'], kolom['recorded_at'], *nilai))
+
+class DeviceRateTracker:
+    """Pencatatan jumlah reading per perangkat dengan batas laju token bucket
+
+    `rate` adalah jumlah reading per detik yang diizinkan per perangkat
+    (0 berarti tanpa batas) dengan kapasitas burst `burst`. Batas ini
+    disimpan di memori setiap proses: dengan beberapa worker gunicorn laju
+    efektif per perangkat menjadi `rate` x jumlah worker.
+
+    Tabel perangkat dibatasi `max_devices` dan diurutkan LRU. Perangkat
+    terlama hanya dibuang jika bucket-nya sudah penuh kembali, sehingga
+    pembuangan tidak mengembalikan burst lebih awal; jika belum, reading
+    perangkat baru ditolak (rate_limited) sampai ada slot.
+    """
+
+    def __init__(self, rate: float = 0, burst: float = None, max_devices: int = 10000):
+        self.rate = rate
+        self.burst = burst if burst is not None else rate * 10
+        self.max_devices = max_devices
+        self._devices = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Total seluruh perangkat
+        self.requests = 0
+        self.accepted = 0
+        self.rejected = 0
+        self.rate_limited = 0
+
+    def consume(self, jumlah_per_device: Dict[str, int], rejected: int = 0) -> Dict[str, int]:
+        """Catat reading satu request; kembalikan jumlah yang diizinkan per perangkat"""
+        now = time.monotonic()
+        waktu = datetime.now().isoformat()
+        diizinkan = {}
+        with self._lock:
+            self.requests += 1
+            self.rejected += rejected
+            for device_id, jumlah in jumlah_per_device.items():
+                info = self._devices.get(device_id)
+                if info is None:
+                    if len(self._devices) >= self.max_devices and not self._buang_terlama(now):
+                        self.rate_limited += jumlah
+                        diizinkan[device_id] = 0
+                        continue
+                    info = self._devices[device_id] = {
+                        'accepted': 0, 'rate_limited': 0, 'tokens': self.burst,
+                        'last_seen': now, 'last_seen_at': None
+                    }
+                else:
+                    self._devices.move_to_end(device_id)
+                if self.rate > 0:
+                    info['tokens'] = min(self.burst, info['tokens'] + (now - info['last_seen']) * self.rate)
+                    boleh = min(jumlah, int(info['tokens']))
+                    info['tokens'] -= boleh
+                else:
+                    boleh = jumlah
+                info['accepted'] += boleh
+                info['rate_limited'] += jumlah - boleh
+                info['last_seen'] = now
+                info['last_seen_at'] = waktu
+                self.accepted += boleh
+                self.rate_limited += jumlah - boleh
+                diizinkan[device_id] = boleh
+        return diizinkan
+
+    def _buang_terlama(self, now: float) -> bool:
+        """Buang perangkat yang paling lama tidak mengirim data jika bucket-nya sudah penuh"""
+        device_id, info = next(iter(self._devices.items()))
+        if self.rate > 0 and info['tokens'] + (now - info['last_seen']) * self.rate < self.burst:
+            return False
+        del self._devices[device_id]
+        return True
+
+    def stats(self) -> Dict:
+        """Jumlah reading total dan per perangkat untuk monitoring"""
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'accepted': self.accepted,
+                'rejected': self.rejected,
+                'rate_limited': self.rate_limited,
+                'devices': {
+                    device_id: {k: v for k, v in info.items() if k not in ('tokens', 'last_seen')}
+                    for device_id, info in self._devices.items()
+                }
+            }
@@ -0,0 +1,126 @@
+import json
+import logging
+import threading
+from typing import Callable, Dict, Iterator
+
+logger = logging.getLogger(__name__)
+
+class SensorBroadcaster:
+    """Satu producer data sensor yang dibagikan ke semua client Server-Sent Events
+
+    Thread producer hanya berjalan selama ada client yang terhubung. Data
+    dihitung sekali per `interval` detik (atau segera setelah `trigger()`)
+    dan hanya dikirim jika berbeda dari data sebelumnya; pesan SSE
+    diserialisasi sekali untuk semua client.
+
+    Setiap client menahan satu thread server selama terhubung; `max_subscribers`
+    (0 = tanpa batas) membatasinya agar thread untuk request lain tetap tersedia.
+    """
+
+    def __init__(self, producer: Callable[[], Dict], interval: float = 3.0,
+                 keepalive: float = 15.0, retry_ms: int = 3000, max_subscribers: int = 0):
+        self.producer = producer
+        self.interval = interval
+        self.keepalive = keepalive
+        self.retry_ms = retry_ms
+        self.max_subscribers = max_subscribers
+
+        self._cond = threading.Condition()
+        self._trigger = threading.Event()
+        self._thread = None
+        self._subscribers = 0
+        self._versi = 0
+        self._pesan = None
+        self._banding = None
+
+        # Metrik broadcaster
+        self.produced = 0
+        self.published = 0
+        self.rejected = 0
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if self._subscribers == 0:
+                    self._thread = None
+                    return
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("Error producing sensor data")
+            self._trigger.wait(self.interval)
+            self._trigger.clear()
+
+    def refresh(self) -> bool:
+        """Hitung data terbaru; kirim ke client hanya jika berubah"""
+        data = self.producer()
+        # timestamp selalu berubah, tidak dihitung sebagai perubahan data
+        banding = {k: v for k, v in data.items() if k != 'timestamp'}
+        with self._cond:
+            self.produced += 1
+            if banding == self._banding:
+                return False
+            self._banding = banding
+            self._versi += 1
+            self._pesan = f"id: {self._versi}\nevent: sensor\ndata: {json.dumps(data)}\n\n"
+            self.published += 1
+            self._cond.notify_all()
+            return True
+
+    def trigger(self):
+        """Minta producer menghitung ulang segera (mis. setelah perhitungan fuzzy baru)"""
+        self._trigger.set()
+
+    def available(self) -> bool:
+        """True jika masih ada slot untuk client baru"""
+        with self._cond:
+            if self.max_subscribers and self._subscribers >= self.max_subscribers:
+                self.rejected += 1
+                return False
+            return True
+
+    def subscribe(self) -> Iterator[str]:
+        """Generator pesan SSE untuk satu client"""
+        with self._cond:
+            penuh = bool(self.max_subscribers) and self._subscribers >= self.max_subscribers
+            if penuh:
+                self.rejected += 1
+            else:
+                self._subscribers += 1
+                if self._thread is None:
+                    self._trigger.clear()
+                    self._thread = threading.Thread(target=self._run, name='sensor-stream', daemon=True)
+                    self._thread.start()
+        if penuh:
+            # Slot habis sejak available() diperiksa: minta client beralih ke polling
+            yield f"retry: {self.retry_ms}\nevent: busy\ndata: {{}}\n\n"
+            return
+
+        try:
+            yield f"retry: {self.retry_ms}\n\n"
+            versi = 0
+            while True:
+                with self._cond:
+                    if self._versi == versi:
+                        self._cond.wait(self.keepalive)
+                    if self._versi == versi:
+                        pesan = ": keepalive\n\n"
+                    else:
+                        versi = self._versi
+                        pesan = self._pesan
+                yield pesan
+        finally:
+            with self._cond:
+                self._subscribers -= 1
+
+    def stats(self) -> Dict:
+        """Metrik broadcaster untuk monitoring"""
+        with self._cond:
+            return {
+                'subscribers': self._subscribers,
+                'produced': self.produced,
+                'published': self.published,
+                'rejected': self.rejected,
+                'max_subscribers': self.max_subscribers,
+                'running': self._thread is not None
+            }
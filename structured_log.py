@@ -0,0 +1,49 @@
+import json
+import logging
+import os
+import sys
+from datetime import datetime, timezone
+
+# Atribut bawaan LogRecord; atribut lain (dari `extra=`) ikut ditulis sebagai field JSON
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+class JsonFormatter(logging.Formatter):
+    """Satu objek JSON per baris: waktu, level, logger, fungsi, pesan dan field `extra`"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'function': record.funcName,
+            'message': record.getMessage(),
+            'pid': record.process
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                data[key] = value
+        if record.exc_info:
+            data['exception'] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str, ensure_ascii=False)
+
+TEXT_FORMAT = '%(asctime)s %(levelname)s [%(process)d] %(name)s.%(funcName)s: %(message)s'
+
+def configure_logging(level: str = None, fmt: str = None) -> logging.Handler:
+    """Pasang handler stderr pada root logger (format 'json' atau 'text')
+
+    Level dan format default dibaca dari LOG_LEVEL dan LOG_FORMAT. Aman
+    dipanggil berulang kali: handler yang dipasang sebelumnya diganti.
+    """
+    level = (level or os.environ.get('LOG_LEVEL', 'INFO')).upper()
+    fmt = (fmt or os.environ.get('LOG_FORMAT', 'json')).lower()
+
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(JsonFormatter() if fmt == 'json' else logging.Formatter(TEXT_FORMAT))
+    handler._structured_log = True
+
+    root = logging.getLogger()
+    for lama in [h for h in root.handlers if getattr(h, '_structured_log', False)]:
+        root.removeHandler(lama)
+    root.addHandler(handler)
+    root.setLevel(level)
+    return handler
@@ -0,0 +1,214 @@
+import json
+import secrets
+from datetime import datetime, timedelta
+
+import pytest
+
+import app as aplikasi
+
+# Endpoint Flask dengan session login palsu (token didaftarkan langsung ke cache session)
+
+
+def login(client, role='admin'):
+    token = secrets.token_urlsafe(16)
+    aplikasi.session_cache.add(token, datetime.now() + timedelta(hours=1))
+    with client.session_transaction() as sesi:
+        sesi['user_id'] = 1
+        sesi['username'] = 'tester'
+        sesi['role'] = role
+        sesi['session_token'] = token
+
+
+@pytest.fixture
+def client():
+    aplikasi.fuzzy_system.history.clear()
+    client = aplikasi.app.test_client()
+    login(client)
+    return client
+
+
+def aktifkan_lut(monkeypatch, step=0.01):
+    lut = aplikasi.build_fuzzy_lut(step, aplikasi.app.config['FUZZY_LUT_TOLERANCE'])
+    monkeypatch.setattr(aplikasi, 'fuzzy_lut', lut)
+    return lut
+
+
+PERMINTAAN = [
+    {'kelembaban': 25, 'cuaca': 'Cerah', 'verbose': False},
+    {'kelembaban': 47.5, 'cuaca': 'Berawan', 'fields': 'durasi,tingkat'},
+    {'kelembaban': 80, 'cuaca': 'Hujan Lebat'},
+    {'kelembaban': 12.34, 'cuaca': 'Berawan', 'verbose': False},
+    {'kelembaban': 60, 'cuaca': 'Cerah', 'fields': 'durasi'},
+]
+
+
+def kirim_semua(client):
+    hasil = []
+    for body in PERMINTAAN:
+        response = client.post('/calculate', json=body)
+        assert response.status_code == 200
+        hasil.append(response.get_json()['result'])
+    return hasil, client.get('/history').get_json()
+
+
+def test_history_sama_dengan_dan_tanpa_lut(client, monkeypatch):
+    monkeypatch.setattr(aplikasi, 'fuzzy_lut', None)
+    tanpa_lut, history_tanpa_lut = kirim_semua(client)
+
+    aplikasi.fuzzy_system.history.clear()
+    assert aktifkan_lut(monkeypatch) is not None
+    dengan_lut, history_dengan_lut = kirim_semua(client)
+
+    assert dengan_lut == tanpa_lut
+    assert history_dengan_lut['total'] == history_tanpa_lut['total'] == len(PERMINTAAN)
+    kunci = ('kelembaban', 'cuaca', 'durasi', 'tingkat')
+    assert ([{k: e[k] for k in kunci} for e in history_dengan_lut['history']] ==
+            [{k: e[k] for k in kunci} for e in history_tanpa_lut['history']])
+
+
+def test_hasil_model_sensor_masuk_history(client):
+    assert aplikasi.sensor_model is not None
+    response = client.post('/calculate', json={
+        'kelembaban': 30, 'suhu': 31.5, 'kelembaban_udara': 45, 'curah_hujan': 0, 'verbose': False
+    })
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['model'] == 'sensor'
+
+    history = client.get('/history').get_json()
+    assert history['total'] == 1
+    entri = history['history'][0]
+    assert entri['model'] == 'sensor'
+    assert entri['sensor'] == {'curah_hujan': 0.0, 'suhu': 31.5, 'kelembaban_udara': 45.0}
+    assert entri['cuaca'] == 'Cerah'
+    assert (entri['durasi'], entri['tingkat']) == (body['result']['durasi'], body['result']['tingkat'])
+    assert entri['rules'] and entri['insights']
+
+
+@pytest.mark.parametrize('days', ['-100000000', '0', '367', '99999999999'])
+def test_calculations_recent_days_tidak_valid(client, days):
+    response = client.get(f'/api/calculations/recent?days={days}')
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+
+
+def test_calculations_recent_days_valid(client):
+    assert client.get('/api/calculations/recent?days=30').status_code == 200
+
+
+@pytest.mark.parametrize('body', [
+    [1, 2],
+    'rules',
+    {'variabel': [1, 2]},
+    {'variabel': {'kelembaban': 5}},
+    {'variabel': {'kelembaban': {'himpunan': [0, 10, 20, 30]}}},
+    {'variabel': {'kelembaban': {'himpunan': {'rendah': [None, None, 20, 40]}}}, 'rules': [5]},
+    {'variabel': {'kelembaban': {'himpunan': {'rendah': [None, None, 20, 40]}}}, 'rules': {'a': 1}},
+    {'variabel': {'kelembaban': {'himpunan': {'rendah': [None, None, 20, 40]}}},
+     'rules': [{'kelembaban': 'rendah', 'durasi': 10}], 'tingkat_kebutuhan': ['Rendah']},
+])
+def test_reload_rules_definisi_tidak_valid(client, body):
+    versi = aplikasi.fuzzy_system.rule_base.versi
+    response = client.post('/api/rules/reload', json=body)
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+    assert aplikasi.fuzzy_system.rule_base.versi == versi
+
+
+def test_calculate_batch_item_bukan_object(client):
+    response = client.post('/calculate_batch', json={'items': [{'kelembaban': 30, 'cuaca': 'Cerah'}, 5, 'x']})
+    assert response.status_code == 400
+    body = response.get_json()
+    assert body['invalid_indices'] == [1, 2]
+    assert 'Item ke-1' in body['error']
+
+
+@pytest.mark.parametrize('body', [[1, 2], {'items': 5}])
+def test_calculate_batch_body_tidak_valid(client, body):
+    assert client.post('/calculate_batch', json=body).status_code == 400
+
+
+def test_calculate_batch_sama_dengan_calculate(client):
+    items = [{'kelembaban': k, 'cuaca': c} for k in (0, 15.5, 20, 33.3, 40, 59.99, 100)
+             for c in ('Cerah', 'Berawan', 'Hujan Ringan', 'Hujan Lebat')]
+    batch = client.post('/calculate_batch', json={'items': items}).get_json()['result']
+    for i, item in enumerate(items):
+        tunggal = client.post('/calculate', json=dict(item, verbose=False)).get_json()['result']
+        assert (batch['durasi'][i], batch['tingkat'][i]) == (tunggal['durasi'], tunggal['tingkat'])
+
+
+@pytest.fixture
+def rules_sementara(tmp_path, monkeypatch):
+    # Reload menulis definisi ke FUZZY_RULES_PATH: arahkan ke salinan sementara
+    path = tmp_path / 'fuzzy_rules.json'
+    path.write_text(open(aplikasi.DEFAULT_RULES_PATH).read())
+    monkeypatch.setitem(aplikasi.app.config, 'FUZZY_RULES_PATH', str(path))
+    asli = aplikasi.fuzzy_system.rule_base
+    yield path
+    aplikasi.fuzzy_system.muat_rule_base(asli.definisi)
+
+
+def test_reload_rules_dari_body(client, rules_sementara):
+    definisi = aplikasi.fuzzy_system.rule_base.to_dict()
+    for rule in definisi['rules']:
+        if rule['kelembaban'] == 'rendah' and rule['cuaca'] == 'Cerah':
+            rule['durasi'] = 55
+    response = client.post('/api/rules/reload', json=definisi)
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['versi'] == aplikasi.fuzzy_system.rule_base.versi
+    assert body['jumlah_rule'] == 12
+    assert json.loads(rules_sementara.read_text())['rules'] == definisi['rules']
+
+    hasil = client.post('/calculate', json={'kelembaban': 10, 'cuaca': 'Cerah', 'verbose': False}).get_json()
+    assert hasil['result']['durasi'] == 55
+
+
+def test_reload_rules_dari_file(client, rules_sementara):
+    definisi = json.loads(rules_sementara.read_text())
+    definisi['rules'] = definisi['rules'][:6]
+    rules_sementara.write_text(json.dumps(definisi))
+    response = client.post('/api/rules/reload')
+    assert response.status_code == 200
+    assert response.get_json()['jumlah_rule'] == 6
+
+
+def test_reload_rules_hanya_admin(client, rules_sementara):
+    login(client, role='user')
+    assert client.post('/api/rules/reload').status_code == 403
+
+
+@pytest.mark.parametrize('body, query, kunci', [
+    ({}, '', {'kelembaban', 'cuaca', 'durasi', 'tingkat', 'rules', 'fuzzifikasi', 'insights'}),
+    ({'verbose': False}, '', {'durasi', 'tingkat'}),
+    ({'verbose': 'false'}, '', {'durasi', 'tingkat'}),
+    ({}, '?verbose=0', {'durasi', 'tingkat'}),
+    ({'verbose': True}, '', {'kelembaban', 'cuaca', 'durasi', 'tingkat', 'rules', 'fuzzifikasi', 'insights'}),
+    ({'fields': 'durasi,rules'}, '', {'durasi', 'rules'}),
+    ({'fields': ['tingkat', 'insights', 'tingkat']}, '', {'tingkat', 'insights'}),
+    ({}, '?fields=fuzzifikasi', {'fuzzifikasi'}),
+    ({'fields': 'durasi', 'verbose': True}, '', {'durasi'}),
+])
+def test_calculate_bentuk_respons(client, body, query, kunci):
+    response = client.post('/calculate' + query, json=dict(body, kelembaban=35, cuaca='Berawan'))
+    assert response.status_code == 200
+    hasil = response.get_json()['result']
+    assert set(hasil) == kunci
+
+
+def test_calculate_ringkas_sama_dengan_lengkap(client):
+    lengkap = client.post('/calculate', json={'kelembaban': 35, 'cuaca': 'Berawan'}).get_json()['result']
+    ringkas = client.post('/calculate', json={'kelembaban': 35, 'cuaca': 'Berawan', 'verbose': False})
+    assert ringkas.get_json()['result'] == {'durasi': lengkap['durasi'], 'tingkat': lengkap['tingkat']}
+    # Mode ringkas tanpa spasi dan tanpa bagian penjelasan
+    assert b' ' not in ringkas.data
+    # Urutan fields mengikuti permintaan
+    urutan = client.post('/calculate', json={'kelembaban': 35, 'cuaca': 'Berawan', 'fields': 'tingkat,durasi'})
+    assert list(json.loads(urutan.data)['result']) == ['tingkat', 'durasi']
+
+
+@pytest.mark.parametrize('fields', ['durasi,alpha', 5, ['rules', 'x']])
+def test_calculate_field_tidak_dikenal(client, fields):
+    response = client.post('/calculate', json={'kelembaban': 35, 'cuaca': 'Berawan', 'fields': fields})
+    assert response.status_code == 400
+    assert response.get_json()['fields'] == list(aplikasi.RESULT_FIELDS)
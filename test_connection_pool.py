@@ -0,0 +1,99 @@
+import threading
+
+import pytest
+
+from connection_pool import ConnectionPool, PoolTimeoutError
+
+
+class Koneksi:
+    def __init__(self, nomor):
+        self.nomor = nomor
+        self.ditutup = False
+
+    def close(self):
+        self.ditutup = True
+
+
+class Pabrik:
+    def __init__(self):
+        self.dibuat = []
+
+    def __call__(self):
+        conn = Koneksi(len(self.dibuat))
+        self.dibuat.append(conn)
+        return conn
+
+
+def test_koneksi_dipakai_ulang():
+    pabrik = Pabrik()
+    pool = ConnectionPool(pabrik, size=2)
+    conn = pool.acquire()
+    pool.release(conn)
+    assert pool.acquire() is conn
+    assert len(pabrik.dibuat) == 1
+
+
+def test_timeout_jika_pool_penuh():
+    pool = ConnectionPool(Pabrik(), size=1, timeout=0.05)
+    pool.acquire()
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire()
+    assert pool.stats()['timeouts'] == 1
+
+
+def test_release_membangunkan_yang_menunggu():
+    pool = ConnectionPool(Pabrik(), size=1, timeout=5)
+    conn = pool.acquire()
+    hasil = []
+    thread = threading.Thread(target=lambda: hasil.append(pool.acquire()))
+    thread.start()
+    pool.release(conn)
+    thread.join()
+    assert hasil == [conn]
+    assert pool.stats()['waits'] == 1
+
+
+@pytest.mark.parametrize('ping', [lambda conn: False, lambda conn: 1 / 0])
+def test_ping_gagal_menutup_koneksi(ping):
+    pabrik = Pabrik()
+    pool = ConnectionPool(pabrik, size=1, health_check_interval=0, ping=ping)
+    lama = pool.acquire()
+    pool.release(lama)
+    baru = pool.acquire()
+    assert baru is not lama
+    assert lama.ditutup and not baru.ditutup
+    stats = pool.stats()
+    assert (stats['health_checks'], stats['discarded'], stats['created'], stats['in_use']) == (1, 1, 1, 1)
+
+
+def test_koneksi_rusak_membebaskan_slot():
+    pabrik = Pabrik()
+    pool = ConnectionPool(pabrik, size=1)
+    conn = pool.acquire()
+    pool.release(conn, broken=True)
+    assert conn.ditutup
+    assert pool.acquire() is not conn
+    assert pool.stats()['discarded'] == 1
+
+
+def test_factory_gagal_mengembalikan_slot():
+    def gagal():
+        raise RuntimeError('server down')
+
+    pool = ConnectionPool(gagal, size=1, timeout=0.05)
+    for _ in range(3):
+        with pytest.raises(RuntimeError):
+            pool.acquire()
+    assert pool.stats()['created'] == 0 and pool.stats()['in_use'] == 0
+
+
+def test_close_all():
+    pool = ConnectionPool(Pabrik(), size=2)
+    dipakai, idle = pool.acquire(), pool.acquire()
+    pool.release(idle)
+    pool.close_all()
+    assert idle.ditutup and not dipakai.ditutup
+    pool.release(dipakai)
+    assert dipakai.ditutup
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire()
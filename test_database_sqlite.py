@@ -0,0 +1,161 @@
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from database import FuzzyDatabase
+from db_backends import backend_from_url
+
+# Perilaku FuzzyDatabase yang sama untuk semua backend, dijalankan dengan SQLite
+# sementara (tanpa server database); test_db.py tetap sebagai skrip manual
+
+# Titik acuan tetap di masa lalu (pertengahan jam sebelumnya) agar purge, rollup dan
+# partisi tidak bergantung pada menit saat test dijalankan
+SEKARANG = datetime.now().replace(minute=0, second=0, microsecond=0) - timedelta(minutes=30)
+
+
+def kalkulasi(jam_lalu, cuaca='Cerah', kelembaban=25.0, durasi=40.0, tingkat='Tinggi'):
+    return {
+        'kelembaban_input': kelembaban, 'cuaca_input': cuaca, 'durasi_output': durasi,
+        'tingkat_kebutuhan': tingkat, 'status_pompa': 'Aktif',
+        'timestamp': SEKARANG - timedelta(hours=jam_lalu)
+    }
+
+
+def tanpa_min_max(trends):
+    # Min/max bucket tidak dikurangi saat purge (hanya jumlah dan total durasi)
+    return [{k: v for k, v in item.items() if k not in ('min_duration', 'max_duration')} for item in trends]
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = FuzzyDatabase(backend=backend_from_url(f"sqlite:///{tmp_path / 'test.db'}"))
+    yield database
+    database.close_connection()
+
+
+@pytest.fixture
+def db_terisi(db):
+    db.save_calculation(kalkulasi(0))
+    db.save_calculations(
+        [kalkulasi(jam, 'Berawan', 45.0 + jam, 25.0, 'Sedang') for jam in range(1, 6)] +
+        [kalkulasi(jam, 'Hujan', 80.0, 5.0, 'Rendah') for jam in range(3, 9)]
+    )
+    return db
+
+
+def test_save_dan_statistik(db_terisi):
+    stats = db_terisi.get_calculation_statistics(use_cache=False)
+    assert stats['total_calculations'] == 12
+    assert stats['weather_distribution'] == {'Cerah': 1, 'Berawan': 5, 'Hujan': 6}
+    assert len(db_terisi.get_calculations_by_weather('Hujan')) == 6
+
+
+def test_iter_calculations_keyset(db_terisi):
+    halaman = list(db_terisi.iter_calculations(limit=5, chunk_size=2))
+    lanjutan = list(db_terisi.iter_calculations(after=(halaman[-1]['created_at'], halaman[-1]['id'])))
+    assert len(halaman) == 5
+    assert len(halaman) + len(lanjutan) == 12
+    assert not {row['id'] for row in halaman} & {row['id'] for row in lanjutan}
+
+
+@pytest.mark.parametrize('granularitas', ['jam', 'hari'])
+def test_rollup_sama_dengan_rebuild(db_terisi, granularitas):
+    trends = db_terisi.get_calculation_trends(granularitas, days=2)
+    assert sum(item['count'] for item in trends) == 12
+    assert db_terisi.rebuild_rollups() > 0
+    assert db_terisi.get_calculation_trends(granularitas, days=2) == trends
+
+
+def test_purge_mengurangi_rollup(db_terisi):
+    cutoff = SEKARANG - timedelta(hours=4)
+    assert db_terisi.purge_rows('fuzzy_calculations', cutoff, chunk_size=2, pause=0) == 5
+
+    stats = db_terisi.get_calculation_statistics(use_cache=False)
+    assert stats['total_calculations'] == 7
+    trends = {granularitas: db_terisi.get_calculation_trends(granularitas, days=2) for granularitas in ('jam', 'hari')}
+    assert sum(item['count'] for item in trends['jam']) == 7
+
+    db_terisi.rebuild_rollups()
+    for granularitas, hasil in trends.items():
+        assert tanpa_min_max(hasil) == tanpa_min_max(db_terisi.get_calculation_trends(granularitas, days=2))
+
+
+def test_purge_dengan_arsip(db_terisi):
+    arsip = []
+    cutoff = SEKARANG - timedelta(hours=6)
+    jumlah = db_terisi.purge_rows('fuzzy_calculations', cutoff, chunk_size=100, pause=0,
+                                  archive=lambda table, rows: arsip.extend(rows))
+    assert jumlah == len(arsip) == 2
+    assert {row['cuaca_input'] for row in arsip} == {'Hujan'}
+
+
+def test_purge_arsip_gagal_tidak_menghapus(db_terisi):
+    def arsip_gagal(table, rows):
+        raise OSError('disk penuh')
+
+    with pytest.raises(OSError):
+        db_terisi.purge_rows('fuzzy_calculations', SEKARANG, chunk_size=100, pause=0, archive=arsip_gagal)
+    assert db_terisi.get_calculation_statistics(use_cache=False)['total_calculations'] == 12
+
+
+def test_tanpa_partisi(db_terisi):
+    assert db_terisi.calculation_partitions() is None
+    assert db_terisi.ensure_partitions(3) == []
+    assert db_terisi.drop_partitions_before(SEKARANG) == 0
+
+    # Tanpa partisi, retensi fuzzy_calculations jatuh ke penghapusan per chunk
+    assert db_terisi.purge_calculations(SEKARANG - timedelta(hours=4), chunk_size=3, pause=0) == 5
+    assert db_terisi.get_calculation_statistics(use_cache=False)['total_calculations'] == 7
+
+
+def test_delete_old_calculations(db_terisi):
+    db_terisi.save_calculation(kalkulasi(24 * 40))
+    assert db_terisi.delete_old_calculations(days_old=30, pause=0) == 1
+    assert db_terisi.get_calculation_statistics(use_cache=False)['total_calculations'] == 12
+
+
+def test_named_lock(db):
+    with db.named_lock('maintenance') as didapat:
+        assert didapat
+        hasil = []
+
+        def coba():
+            with db.named_lock('maintenance') as lain:
+                hasil.append(lain)
+
+        thread = threading.Thread(target=coba)
+        thread.start()
+        thread.join()
+        assert hasil == [False]
+        with db.named_lock('lain') as lain:
+            assert lain
+    with db.named_lock('maintenance') as didapat:
+        assert didapat
+    assert db.pool_stats()['in_use'] == 0
+
+
+def test_sensor_readings(db):
+    assert db.last_sensor_reading_id() == 0
+    assert db.save_sensor_readings([
+        ('gateway-1', SEKARANG, 30.5, 28.1, 70.0, 0.0),
+        ('gateway-1', SEKARANG, 31.0, 28.4, 69.0, 0.0)
+    ]) == 2
+    terakhir = db.last_sensor_reading_id()
+    assert len(db.get_sensor_readings_after(0)) == 2
+    assert db.get_sensor_readings_after(terakhir) == []
+
+
+def test_user_dan_session(db):
+    user_id = db.create_user('tester', 'tester@example.com', 'hash', 'Tester')
+    assert db.get_user_by_username('tester@example.com')['id'] == user_id
+
+    expires_at = SEKARANG + timedelta(days=1)
+    db.record_logins([{
+        'user_id': user_id, 'session_token': 'token-test', 'ip_address': '127.0.0.1', 'user_agent': 'test',
+        'expires_at': expires_at, 'login_time': SEKARANG, 'password_hash': 'hash-baru'
+    }])
+    assert db.get_session_expiry('token-test') == expires_at
+    assert db.get_user_by_username('tester')['password_hash'] == 'hash-baru'
+    assert db.delete_user_session('token-test')
+    assert db.get_session_expiry('token-test') is False
@@ -1,7 +1,31 @@
+import os
+import tempfile
+from datetime import datetime, timedelta
+
 from database import FuzzyDatabase
+from db_backends import backend_from_url
 
 # Test database functionality
-db = FuzzyDatabase()
+# DATABASE_URL kosong/'mysql' memakai server MySQL lokal; default memakai file SQLite
+# sementara sehingga test berjalan tanpa server database
+url = os.environ.get('DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'test.db'))
+db = FuzzyDatabase(backend=backend_from_url(url))
+print(f'Backend: {db.backend}')
+
+# Save calculations (tunggal dan batch)
+sekarang = datetime.now().replace(microsecond=0)
+calculation_id = db.save_calculation({
+    'kelembaban_input': 25.0, 'cuaca_input': 'Cerah', 'durasi_output': 40.0, 'tingkat_kebutuhan': 'Tinggi',
+    'kelembaban_tanah': 25.0, 'suhu': 32.0, 'kelembaban_udara': 45.0, 'curah_hujan': 0.0,
+    'status_pompa': 'Aktif', 'timestamp': sekarang
+})
+print(f'Saved calculation id: {calculation_id}')
+saved = db.save_calculations([
+    {'kelembaban_input': 45.0 + i, 'cuaca_input': 'Berawan', 'durasi_output': 25.0, 'tingkat_kebutuhan': 'Sedang',
+     'status_pompa': 'Aktif', 'timestamp': sekarang - timedelta(minutes=i), 'zona': 'zona-1'}
+    for i in range(5)
+])
+print(f'Saved batch: {saved}')
 
 # Get all calculations
 calculations = db.get_all_calculations()
@@ -12,6 +36,41 @@ if calculations:
 else:
     print('No calculations found')
 
+# Keyset pagination dan filter cuaca
+halaman = list(db.iter_calculations(limit=3, chunk_size=2))
+lanjutan = list(db.iter_calculations(after=(halaman[-1]['created_at'], halaman[-1]['id'])))
+assert len(halaman) + len(lanjutan) == len(calculations) == 6
+assert len(db.get_calculations_by_weather('Berawan')) == 5
+
 # Get statistics
 stats = db.get_calculation_statistics()
-print('Statistics:', stats)
\ No newline at end of file
+print('Statistics:', stats)
+assert stats['total_calculations'] == 6
+assert stats['weather_distribution'] == {'Cerah': 1, 'Berawan': 5}
+
+# Rollup hasil upsert sama dengan hasil rebuild
+trends = db.get_calculation_trends('jam', days=1)
+db.rebuild_rollups()
+assert db.get_calculation_trends('jam', days=1) == trends
+print('Trends:', trends)
+
+# Sensor readings
+assert db.save_sensor_readings([('gateway-1', sekarang, 30.5, 28.1, 70.0, 0.0)]) == 1
+
+# User dan session
+user_id = db.create_user('tester', 'tester@example.com', 'hash', 'Tester')
+assert db.get_user_by_username('tester@example.com')['id'] == user_id
+db.record_logins([{
+    'user_id': user_id, 'session_token': 'token-test', 'ip_address': '127.0.0.1', 'user_agent': 'test',
+    'expires_at': sekarang + timedelta(hours=1), 'login_time': sekarang, 'password_hash': 'hash-baru'
+}])
+assert db.get_session_expiry('token-test') == sekarang + timedelta(hours=1)
+assert db.get_user_by_username('tester')['password_hash'] == 'hash-baru'
+assert db.delete_user_session('token-test')
+assert db.get_session_expiry('token-test') is False
+
+# Retensi per chunk
+assert db.purge_rows('fuzzy_calculations', sekarang - timedelta(minutes=2), chunk_size=1, pause=0) == 2
+print('Remaining calculations:', len(db.get_all_calculations()))
+
+db.close_connection()
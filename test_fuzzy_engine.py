@@ -0,0 +1,166 @@
+import numpy as np
+import pytest
+
+import app as aplikasi
+from fuzzy_rules import DEFAULT_RULES_PATH, load_rule_definition
+
+# Engine fuzzy tanpa request Flask: batch, lookup table, rule base terkompilasi
+
+BREAKPOINT = [0.0, 20.0, 40.0, 60.0, 100.0, 19.999, 20.001, 39.5, 40.5, 59.99, 60.01, 33.333]
+
+
+@pytest.fixture
+def engine():
+    return aplikasi.FuzzyTsukamoto(aplikasi.compile_rule_base(), history_capacity=100)
+
+
+def input_acak(engine, n=2000, seed=3):
+    rng = np.random.default_rng(seed)
+    jumlah_cuaca = len(engine.rule_base.variabel['cuaca'].nama_himpunan)
+    kelembaban = np.concatenate([rng.uniform(0, 100, n), np.tile(BREAKPOINT, jumlah_cuaca)])
+    kode_cuaca = np.concatenate([rng.integers(0, jumlah_cuaca, n),
+                                 np.repeat(np.arange(jumlah_cuaca), len(BREAKPOINT))])
+    return kelembaban, kode_cuaca
+
+
+def test_batch_sama_dengan_skalar(engine):
+    kelembaban, kode_cuaca = input_acak(engine)
+    nama_cuaca = engine.rule_base.variabel['cuaca'].nama_himpunan
+    batch = engine.hitung_durasi_penyiraman_batch(kelembaban, kode_cuaca)
+    for i in range(len(kelembaban)):
+        skalar = engine.hitung_durasi_penyiraman(float(kelembaban[i]), nama_cuaca[kode_cuaca[i]], fields=())
+        assert batch['durasi'][i] == skalar['durasi']
+        assert batch['tingkat'][i] == skalar['tingkat']
+
+
+def test_batch_tidak_masuk_history(engine):
+    kelembaban, kode_cuaca = input_acak(engine, n=10)
+    engine.hitung_durasi_penyiraman_batch(kelembaban, kode_cuaca)
+    assert len(engine.history) == 0
+
+
+def test_insights_batch_sama_dengan_skalar(engine):
+    kelembaban, kode_cuaca = input_acak(engine, n=200)
+    nama_cuaca = engine.rule_base.variabel['cuaca'].nama_himpunan
+    batch = engine.hitung_durasi_penyiraman_batch(kelembaban, kode_cuaca)
+    insights = engine.generate_insights_batch(kelembaban, kode_cuaca, batch)
+    for i in range(len(kelembaban)):
+        skalar = engine.hitung_durasi_penyiraman(float(kelembaban[i]), nama_cuaca[kode_cuaca[i]])
+        assert insights[i] == skalar['insights']
+
+
+@pytest.mark.parametrize('step', [0.01, 0.25, 0.5])
+def test_lut_valid_jika_breakpoint_di_grid(engine, step):
+    lut = aplikasi.FuzzyLUT(engine, step=step)
+    laporan = lut.verify(samples=20000)
+    assert laporan['valid'] and laporan['tingkat_mismatch'] == 0
+
+    kelembaban, kode_cuaca = input_acak(engine)
+    acuan = engine.hitung_durasi_penyiraman_batch(kelembaban, kode_cuaca)
+    hasil = lut.lookup_batch(kelembaban, kode_cuaca)
+    assert np.array_equal(hasil['durasi'], acuan['durasi'])
+    assert np.array_equal(hasil['tingkat'], acuan['tingkat'])
+
+
+def test_lut_step_001_sama_dengan_skalar(engine):
+    lut = aplikasi.FuzzyLUT(engine, step=0.01)
+    kelembaban, kode_cuaca = input_acak(engine, n=500)
+    nama_cuaca = engine.rule_base.variabel['cuaca'].nama_himpunan
+    for i in range(len(kelembaban)):
+        cuaca = nama_cuaca[kode_cuaca[i]]
+        skalar = engine.hitung_durasi_penyiraman(float(kelembaban[i]), cuaca, fields=())
+        assert lut.lookup(float(kelembaban[i]), cuaca) == {'durasi': skalar['durasi'], 'tingkat': skalar['tingkat']}
+
+
+@pytest.mark.parametrize('step', [0.07, 0.3, 1.5])
+def test_lut_dinonaktifkan_jika_tidak_tepat(step):
+    # Breakpoint 20/40/60 tidak jatuh di grid: interpolasi menyimpang dan LUT ditolak
+    laporan = aplikasi.FuzzyLUT(aplikasi.fuzzy_system, step=step).verify(samples=20000)
+    assert not laporan['valid']
+    assert aplikasi.build_fuzzy_lut(step, aplikasi.app.config['FUZZY_LUT_TOLERANCE']) is None
+
+
+def test_lut_aktif_untuk_step_001():
+    lut = aplikasi.build_fuzzy_lut(0.01, aplikasi.app.config['FUZZY_LUT_TOLERANCE'])
+    assert lut is not None and lut.rule_base is aplikasi.fuzzy_system.rule_base
+
+
+def definisi_dasar():
+    return aplikasi.compile_rule_base().definisi
+
+
+def test_compile_rule_base_dari_file():
+    rule_base = aplikasi.compile_rule_base()
+    definisi = load_rule_definition(DEFAULT_RULES_PATH)
+    assert len(rule_base.z) == len(definisi['rules']) == 12
+    assert rule_base.nama_variabel == ['kelembaban', 'cuaca']
+    # Di bawah 20% hanya himpunan 'rendah' yang aktif: durasi = z rule (rendah, cuaca)
+    for rule in definisi['rules']:
+        if rule['kelembaban'] == 'rendah':
+            hasil = rule_base.evaluasi_tunggal({'kelembaban': 10.0, 'cuaca': rule_base.variabel['cuaca'].kode(rule['cuaca'])})
+            assert hasil['durasi'] == pytest.approx(rule['durasi'])
+
+
+def test_versi_mengikuti_isi_definisi():
+    definisi = definisi_dasar()
+    assert aplikasi.compile_rule_base(definisi).versi == aplikasi.compile_rule_base().versi
+    definisi['rules'][0]['durasi'] = 50
+    assert aplikasi.compile_rule_base(definisi).versi != aplikasi.compile_rule_base().versi
+
+
+def test_t_norm_product():
+    definisi = definisi_dasar()
+    definisi['t_norm'] = 'product'
+    rule_base = aplikasi.compile_rule_base(definisi)
+    hasil = rule_base.evaluasi_tunggal({'kelembaban': 30.0, 'cuaca': 0})
+    assert hasil['durasi'] == pytest.approx(aplikasi.compile_rule_base().evaluasi_tunggal(
+        {'kelembaban': 30.0, 'cuaca': 0})['durasi'])
+
+
+@pytest.mark.parametrize('ubah', [
+    lambda d: d['rules'][0].update(kelembaban='sangat_rendah'),
+    lambda d: d['rules'][0].pop('durasi'),
+    lambda d: d.update(t_norm='max'),
+    lambda d: d['variabel']['kelembaban']['himpunan'].update(rendah=[None, None, 40, 20]),
+    lambda d: d['tingkat_kebutuhan'][1].update(durasi_maks=10),
+    lambda d: d['tingkat_kebutuhan'][-1].update(durasi_maks=99),
+    lambda d: d.update(rules=[]),
+])
+def test_definisi_tidak_valid(ubah):
+    definisi = definisi_dasar()
+    ubah(definisi)
+    with pytest.raises(ValueError):
+        aplikasi.compile_rule_base(definisi)
+
+
+def test_history_menyimpan_id_rule_base(engine):
+    engine.hitung_durasi_penyiraman(30.0, 'Cerah')
+    definisi = definisi_dasar()
+    for rule in definisi['rules']:
+        rule['durasi'] = rule['durasi'] + 1
+    baru = engine.muat_rule_base(definisi)
+    engine.hitung_durasi_penyiraman(30.0, 'Cerah')
+
+    terbaru, lama = engine.riwayat(0, 2)
+    assert terbaru['durasi'] == pytest.approx(lama['durasi'] + 1)
+    # Entri lama tetap dijelaskan dengan rule base lama
+    assert [r[1] for r in lama['rules']] == [r[1] - 1 for r in terbaru['rules']]
+    assert engine.rule_base is baru
+
+
+def test_rule_base_tidak_terpakai_dibuang():
+    engine = aplikasi.FuzzyTsukamoto(aplikasi.compile_rule_base(), history_capacity=3)
+    definisi = definisi_dasar()
+    for i in range(50):
+        definisi['rules'][0]['durasi'] = 45 + i * 0.1
+        engine.muat_rule_base(definisi)
+        engine.hitung_durasi_penyiraman(10.0, 'Cerah')
+    # 3 entri history + rule base aktif (yang juga dipakai entri terbaru)
+    assert len(engine._rule_bases) <= 4
+    assert engine.history.rule_base_terpakai() <= set(engine._rule_bases)
+    assert [e['durasi'] for e in engine.riwayat(0, 3)] == [49.9, 49.8, 49.7]
+
+    # Definisi yang sama memakai id yang sama
+    id_aktif = engine._id_rule_base[engine.rule_base.versi]
+    engine.muat_rule_base(definisi)
+    assert engine._id_rule_base[engine.rule_base.versi] == id_aktif
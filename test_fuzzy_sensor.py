@@ -0,0 +1,73 @@
+import math
+
+import numpy as np
+import pytest
+
+from fuzzy_rules import compile_rule_base
+from fuzzy_sensor import SENSOR_INPUTS, SensorFuzzyModel
+from irrigation_pipeline import klasifikasi_cuaca
+
+
+@pytest.fixture(scope='module')
+def model():
+    return SensorFuzzyModel.from_file()
+
+
+def test_rule_base_sensor(model):
+    rule_base = model.rule_base
+    assert rule_base.nama_variabel == list(SENSOR_INPUTS)
+    # 3 himpunan untuk setiap input: 3^4 kombinasi
+    assert len(rule_base.deskripsi) == 81
+    assert all(var.to_dict()['tipe'] == 'trapesium' for var in rule_base.variabel.values())
+
+
+def test_rule_base_kategori_ditolak():
+    with pytest.raises(ValueError):
+        SensorFuzzyModel(compile_rule_base())
+
+
+@pytest.mark.parametrize('curah_hujan, kelembaban_udara, cuaca', [
+    (0.0, 40.0, 'Cerah'),
+    (0.0, 85.0, 'Berawan'),
+    (0.5, 40.0, 'Berawan'),
+    (5.0, 60.0, 'Hujan Ringan'),
+    (25.0, 95.0, 'Hujan Lebat'),
+])
+def test_label_cuaca_dari_sensor(model, curah_hujan, kelembaban_udara, cuaca):
+    assert klasifikasi_cuaca(curah_hujan, kelembaban_udara) == cuaca
+    hasil = model.hitung(35.0, curah_hujan, 28.0, kelembaban_udara)
+    assert hasil['cuaca'] == cuaca
+    assert hasil['fuzzifikasi']['cuaca_aktif'] == cuaca
+
+
+def test_label_cuaca_tidak_diketahui():
+    label = klasifikasi_cuaca([math.nan, 0.0, 3.0], [50.0, math.nan, math.nan])
+    assert label.tolist() == [None, None, 'Hujan Ringan']
+
+
+def test_hujan_mengurangi_durasi(model):
+    kering = model.hitung(30.0, 0.0, 32.0, 40.0)['durasi']
+    hujan = model.hitung(30.0, 25.0, 32.0, 40.0)['durasi']
+    assert hujan < kering
+
+
+def test_fields_membatasi_penjelasan(model):
+    hasil = model.hitung(30.0, 0.0, 32.0, 40.0, fields=('durasi', 'tingkat'))
+    assert set(hasil) == {'kelembaban', 'cuaca', 'durasi', 'tingkat'}
+    lengkap = model.hitung(30.0, 0.0, 32.0, 40.0)
+    assert {'rules', 'fuzzifikasi', 'insights'} <= set(lengkap)
+    assert lengkap['durasi'] == hasil['durasi']
+
+
+def test_hitung_batch_sama_dengan_hitung(model):
+    rng = np.random.default_rng(7)
+    n = 500
+    kelembaban = rng.uniform(0, 100, n)
+    curah_hujan = np.where(rng.random(n) < 0.3, 0.0, rng.uniform(0, 60, n))
+    suhu = rng.uniform(-5, 50, n)
+    udara = rng.uniform(0, 100, n)
+    batch = model.hitung_batch(kelembaban, curah_hujan, suhu, udara)
+    for i in range(n):
+        tunggal = model.hitung(kelembaban[i], curah_hujan[i], suhu[i], udara[i], fields=())
+        assert batch['durasi'][i] == tunggal['durasi']
+        assert batch['tingkat'][i] == tunggal['tingkat']
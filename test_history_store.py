@@ -0,0 +1,66 @@
+import pytest
+
+from history_store import HistoryStore
+
+
+def isi(store, n, mulai=0):
+    for i in range(mulai, mulai + n):
+        store.append(float(i), i % 4, i * 1.5, i % 3, rule_base=i % 2, timestamp=1000.0 + i)
+
+
+def test_kapasitas_minimal():
+    with pytest.raises(ValueError):
+        HistoryStore(0)
+
+
+def test_terbaru_dulu_sebelum_penuh():
+    store = HistoryStore(5)
+    isi(store, 3)
+    assert len(store) == 3
+    assert [e['kelembaban'] for e in store.page()] == [2.0, 1.0, 0.0]
+    entri = store.page(0, 1)[0]
+    assert entri == {'kelembaban': 2.0, 'kode_cuaca': 2, 'durasi': 3.0, 'tingkat': 2,
+                     'rule_base': 0, 'timestamp': 1002.0, 'sensor': None}
+
+
+def test_ring_menimpa_entri_tertua():
+    store = HistoryStore(5)
+    isi(store, 12)
+    assert len(store) == 5
+    assert [e['kelembaban'] for e in store.page()] == [11.0, 10.0, 9.0, 8.0, 7.0]
+    assert [e['timestamp'] for e in store.page(3, 10)] == [1008.0, 1007.0]
+    assert store.page(5, 10) == []
+
+
+def test_rule_base_terpakai_hanya_entri_hidup():
+    store = HistoryStore(4)
+    for rule_base in (7, 7, 8, 9):
+        store.append(10.0, 0, 1.0, 0, rule_base=rule_base)
+    assert store.rule_base_terpakai() == {7, 8, 9}
+    store.append(10.0, 0, 1.0, 0, rule_base=9)
+    store.append(10.0, 0, 1.0, 0, rule_base=9)
+    assert store.rule_base_terpakai() == {8, 9}
+
+
+def test_id_rule_base_besar_tidak_overflow():
+    store = HistoryStore(2)
+    store.append(10.0, 0, 1.0, 0, rule_base=70000)
+    assert store.page()[0]['rule_base'] == 70000
+
+
+def test_nilai_sensor():
+    store = HistoryStore(3)
+    store.append(10.0, 0, 1.0, 0)
+    store.append(20.0, 1, 2.0, 1, rule_base=-1, sensor=(0.5, 28.1, 75.0))
+    baru, lama = store.page()
+    assert baru['sensor'] == [0.5, 28.1, 75.0]
+    assert lama['sensor'] is None
+
+
+def test_clear():
+    store = HistoryStore(3)
+    isi(store, 5)
+    store.clear()
+    assert len(store) == 0 and store.page() == []
+    isi(store, 1)
+    assert [e['kelembaban'] for e in store.page()] == [0.0]
@@ -0,0 +1,100 @@
+import pytest
+
+from irrigation_pipeline import DatabaseReadingSource
+
+
+class PipelinePalsu:
+    def __init__(self):
+        self.device = []
+
+    def submit(self, readings):
+        self.device.extend(readings['device_id'])
+
+
+class TabelPalsu:
+    """sensor_readings yang commit-nya dapat diatur urutannya"""
+
+    def __init__(self, ids):
+        self.rows = {}
+        for i in ids:
+            self.commit(i)
+
+    def commit(self, i):
+        self.rows[i] = (i, f'dev-{i}', 30.0, 28.0, 60.0, 0.0)
+
+    def fetch(self, after_id, limit):
+        return [self.rows[i] for i in sorted(self.rows) if i > after_id][:limit]
+
+    def last_id(self):
+        return max(self.rows, default=0)
+
+
+@pytest.fixture
+def sumber(tmp_path):
+    def buat(tabel, **kwargs):
+        pipeline = PipelinePalsu()
+        source = DatabaseReadingSource(pipeline, tabel.fetch, tabel.last_id, str(tmp_path / 'pipeline.lock'), **kwargs)
+        return source, pipeline
+    return buat
+
+
+def test_mulai_dari_reading_terbaru(sumber):
+    tabel = TabelPalsu(range(1, 11))
+    source, pipeline = sumber(tabel)
+    assert source.poll() == 0
+    tabel.commit(11)
+    assert source.poll() == 1
+    assert pipeline.device == ['dev-11']
+
+
+def test_id_yang_commit_terlambat_tetap_dibaca(sumber):
+    tabel = TabelPalsu(range(1, 11))
+    source, pipeline = sumber(tabel, lag=100)
+    source.poll()
+
+    # Worker A mendapat id 11 tetapi commit setelah worker B (id 12, 13)
+    tabel.commit(12)
+    tabel.commit(13)
+    assert source.poll() == 2
+    tabel.commit(11)
+    assert source.poll() == 1
+    assert source.poll() == 0
+    assert pipeline.device == ['dev-12', 'dev-13', 'dev-11']
+    assert source.stats()['late'] == 1
+
+
+def test_jendela_lag_per_batch(sumber):
+    tabel = TabelPalsu([])
+    source, pipeline = sumber(tabel, lag=5, batch_size=2)
+    source.poll()
+    for i in range(1, 8):
+        if i != 3:
+            tabel.commit(i)
+    assert source.poll() == 6
+    tabel.commit(3)
+    assert source.poll() == 1
+    assert sorted(pipeline.device) == sorted(f'dev-{i}' for i in range(1, 8))
+    assert len(pipeline.device) == 7
+
+
+def test_terlambat_melewati_lag_tidak_dibaca(sumber):
+    tabel = TabelPalsu([])
+    source, pipeline = sumber(tabel, lag=2)
+    source.poll()
+    for i in range(2, 7):
+        tabel.commit(i)
+    source.poll()
+    tabel.commit(1)
+    assert source.poll() == 0
+    assert 'dev-1' not in pipeline.device
+
+
+def test_hanya_satu_pemegang_lock(sumber):
+    tabel = TabelPalsu([])
+    pertama, _ = sumber(tabel)
+    kedua, _ = sumber(tabel)
+    assert pertama._ambil_lock()
+    assert not kedua._ambil_lock()
+    pertama.close()
+    assert kedua._ambil_lock()
+    kedua.close()
@@ -0,0 +1,76 @@
+import pytest
+
+import sensor_ingest
+from sensor_ingest import DeviceRateTracker, parse_device_keys, validate_readings
+
+
+class Jam:
+    def __init__(self):
+        self.sekarang = 1000.0
+
+    def __call__(self):
+        return self.sekarang
+
+
+@pytest.fixture
+def jam(monkeypatch):
+    jam = Jam()
+    monkeypatch.setattr(sensor_ingest.time, 'monotonic', jam)
+    return jam
+
+
+def test_token_bucket_per_perangkat(jam):
+    tracker = DeviceRateTracker(rate=1, burst=5)
+    assert tracker.consume({'a': 8, 'b': 2}) == {'a': 5, 'b': 2}
+    assert tracker.consume({'a': 1}) == {'a': 0}
+    jam.sekarang += 3
+    assert tracker.consume({'a': 10}) == {'a': 3}
+    stats = tracker.stats()
+    assert (stats['accepted'], stats['rate_limited']) == (10, 11)
+    assert stats['devices']['a']['rate_limited'] == 11
+
+
+def test_tanpa_batas_laju_membuang_perangkat_terlama(jam):
+    tracker = DeviceRateTracker(rate=0, max_devices=3)
+    for device_id in 'abc':
+        tracker.consume({device_id: 1})
+        jam.sekarang += 1
+    tracker.consume({'a': 1})
+    tracker.consume({'d': 1})
+    # 'b' paling lama tidak mengirim data ('a' baru saja dipakai lagi)
+    assert list(tracker.stats()['devices']) == ['c', 'a', 'd']
+
+
+def test_pembuangan_tidak_mengembalikan_burst(jam):
+    tracker = DeviceRateTracker(rate=1, burst=10, max_devices=2)
+    assert tracker.consume({'a': 10, 'b': 10}) == {'a': 10, 'b': 10}
+    # Bucket 'a' dan 'b' masih kosong: perangkat baru ditolak, 'a' tidak dibuang
+    assert tracker.consume({'c': 5}) == {'c': 0}
+    assert set(tracker.stats()['devices']) == {'a', 'b'}
+    assert tracker.consume({'a': 10}) == {'a': 0}
+
+    # Setelah bucket 'b' penuh kembali, 'b' boleh dibuang untuk 'c'
+    jam.sekarang += 10
+    assert tracker.consume({'a': 1}) == {'a': 1}
+    assert tracker.consume({'c': 5}) == {'c': 5}
+    assert set(tracker.stats()['devices']) == {'a', 'c'}
+
+
+def test_parse_device_keys():
+    keys = parse_device_keys(' gw-1:rahasia, sensor-2:rahasia ,sensor-3:lain,')
+    assert keys == {'rahasia': frozenset({'gw-1', 'sensor-2'}), 'lain': frozenset({'sensor-3'})}
+    assert parse_device_keys('') == {}
+    with pytest.raises(ValueError):
+        parse_device_keys('tanpa-device')
+
+
+def test_validasi_perangkat_dan_rentang():
+    records = [
+        {'device_id': 'gw-1', 'kelembaban_tanah': 40, 'suhu': 25},
+        {'device_id': 'lain', 'kelembaban_tanah': 40},
+        {'device_id': 'gw-1', 'kelembaban_tanah': 140},
+        {'device_id': 'gw-1', 'suhu': 80},
+    ]
+    kolom, errors, tidak_valid = validate_readings(records, allowed_devices=frozenset({'gw-1'}))
+    assert kolom['device_id'] == ['gw-1']
+    assert tidak_valid == 3 and len(errors) == 3
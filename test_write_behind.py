@@ -0,0 +1,142 @@
+import threading
+import time
+
+import pytest
+
+from write_behind import WriteBehindQueue
+
+
+class Penulis:
+    """Writer palsu: mencatat batch, bisa gagal atau ditahan"""
+
+    def __init__(self, gagal=0):
+        self.batch = []
+        self.gagal = gagal
+        self.tahan = threading.Event()
+        self.tahan.set()
+
+    def __call__(self, batch):
+        self.tahan.wait()
+        if self.gagal:
+            self.gagal -= 1
+            raise RuntimeError('database down')
+        self.batch.append(list(batch))
+
+    @property
+    def baris(self):
+        return [item for batch in self.batch for item in batch]
+
+
+def test_parameter_tidak_valid():
+    with pytest.raises(ValueError):
+        WriteBehindQueue(Penulis(), batch_size=0)
+
+
+def test_flush_menulis_per_batch():
+    penulis = Penulis()
+    q = WriteBehindQueue(penulis, batch_size=10, flush_interval=0.2)
+    assert all(q.put(i) for i in range(25))
+    assert q.flush(timeout=5)
+    assert penulis.baris == list(range(25))
+    assert [len(b) for b in penulis.batch][:2] == [10, 10]
+    stats = q.stats()
+    assert (stats['enqueued'], stats['written'], stats['sync_writes']) == (25, 25, 0)
+    q.close()
+
+
+def test_flush_interval_menulis_batch_belum_penuh():
+    penulis = Penulis()
+    q = WriteBehindQueue(penulis, batch_size=100, flush_interval=0.05)
+    q.put('a')
+    batas = time.monotonic() + 5
+    while not penulis.batch and time.monotonic() < batas:
+        time.sleep(0.01)
+    assert penulis.batch == [['a']]
+    q.close()
+
+
+def test_antrean_penuh_ditulis_sinkron():
+    penulis = Penulis()
+    penulis.tahan.clear()
+    q = WriteBehindQueue(penulis, batch_size=1, flush_interval=0.01, max_queue=2, enqueue_timeout=0.01)
+    hasil = []
+    thread = threading.Thread(target=lambda: hasil.extend(q.put(i) for i in range(5)))
+    thread.start()
+    time.sleep(0.2)
+    penulis.tahan.set()
+    thread.join()
+    q.close()
+    assert False in hasil
+    assert sorted(penulis.baris) == list(range(5))
+    assert q.stats()['sync_writes'] == hasil.count(False)
+
+
+def test_put_many_sisa_ditulis_sebagai_satu_batch():
+    penulis = Penulis()
+    penulis.tahan.clear()
+    q = WriteBehindQueue(penulis, batch_size=1, flush_interval=0.01, max_queue=3, enqueue_timeout=0.01)
+    hasil = []
+    thread = threading.Thread(target=lambda: hasil.append(q.put_many(list(range(10)))))
+    thread.start()
+    time.sleep(0.2)
+    penulis.tahan.set()
+    thread.join()
+    q.close()
+    masuk = hasil[0]
+    assert 3 <= masuk < 10
+    assert list(range(masuk, 10)) in penulis.batch
+    assert sorted(penulis.baris) == list(range(10))
+
+
+def test_retry_lalu_dropped():
+    penulis = Penulis(gagal=2)
+    q = WriteBehindQueue(penulis, batch_size=5, flush_interval=0.01, max_retries=1, retry_delay=0)
+    q.put_many([1, 2, 3])
+    assert q.flush(timeout=5)
+    stats = q.stats()
+    assert (stats['failed'], stats['dropped'], stats['written']) == (2, 3, 0)
+    assert stats['last_error'] == 'database down'
+
+    q.put(4)
+    assert q.flush(timeout=5)
+    assert penulis.baris == [4]
+    q.close()
+
+
+def test_close_menulis_sisa_antrean():
+    penulis = Penulis()
+    q = WriteBehindQueue(penulis, batch_size=1000, flush_interval=60)
+    q.put_many(list(range(50)))
+    q.close()
+    assert penulis.baris == list(range(50))
+    assert not q._thread.is_alive()
+
+
+def test_put_setelah_close_ditulis_sinkron():
+    penulis = Penulis()
+    q = WriteBehindQueue(penulis)
+    q.close()
+    q.close()
+    assert q.put('x') is False
+    assert q.put_many(['y', 'z']) == 0
+    assert penulis.batch == [['x'], ['y', 'z']]
+
+
+def test_close_bersamaan_dengan_put_tidak_kehilangan_baris():
+    for _ in range(10):
+        penulis = Penulis()
+        q = WriteBehindQueue(penulis, batch_size=10, flush_interval=0.01, max_queue=50)
+
+        def produsen(k):
+            for i in range(300):
+                q.put((k, i))
+
+        threads = [threading.Thread(target=produsen, args=(k,)) for k in range(4)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.002)
+        q.close()
+        for thread in threads:
+            thread.join()
+        assert len(penulis.baris) == 1200
+        assert q._queue.qsize() == 0
@@ -0,0 +1,175 @@
+import logging
+import time
+import queue
+import threading
+from typing import Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+class WriteBehindQueue:
+    """Buffer write-behind: baris diantrekan lalu ditulis per batch di thread latar
+
+    Batch di-flush jika sudah berisi `batch_size` baris atau baris tertua
+    sudah menunggu `flush_interval` detik. Antrean dibatasi `max_queue`;
+    jika penuh, `put` menunggu maksimal `enqueue_timeout` detik lalu menulis
+    baris tersebut secara sinkron (backpressure) sehingga memori tetap
+    terbatas. Batch yang tetap gagal setelah `max_retries` dicatat sebagai
+    `dropped`.
+    """
+
+    def __init__(self, writer: Callable[[List], object], batch_size: int = 100,
+                 flush_interval: float = 1.0, max_queue: int = 10000,
+                 enqueue_timeout: float = 0.05, max_retries: int = 3,
+                 retry_delay: float = 1.0, name: str = 'write-behind'):
+        if batch_size < 1 or max_queue < 1:
+            raise ValueError("batch_size dan max_queue minimal 1")
+        self.writer = writer
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        # Cek `_closed` + enqueue dan penutupan + `_STOP` memakai lock yang
+        # sama agar tidak ada baris yang masuk antrean setelah `_STOP`
+        self._put_lock = threading.Lock()
+        self._closed = False
+
+        # Metrik antrean
+        self.enqueued = 0
+        self.written = 0
+        self.batches = 0
+        self.sync_writes = 0
+        self.failed = 0
+        self.dropped = 0
+        self._last_error = None
+
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def put(self, item) -> bool:
+        """Antrekan satu baris; True jika masuk antrean, False jika ditulis sinkron"""
+        with self._put_lock:
+            if not self._closed:
+                try:
+                    self._queue.put(item, timeout=self.enqueue_timeout)
+                    with self._lock:
+                        self.enqueued += 1
+                    return True
+                except queue.Full:
+                    pass
+
+        # Antrean penuh atau sudah ditutup: tulis langsung di thread pemanggil
+        with self._lock:
+            self.sync_writes += 1
+        self._write([item], retries=0)
+        return False
+
+    def put_many(self, items: List) -> int:
+        """Antrekan banyak baris; sisa yang tidak muat ditulis sinkron sebagai satu batch"""
+        masuk = 0
+        with self._put_lock:
+            if not self._closed:
+                for item in items:
+                    try:
+                        self._queue.put(item, timeout=self.enqueue_timeout)
+                    except queue.Full:
+                        break
+                    masuk += 1
+                with self._lock:
+                    self.enqueued += masuk
+
+        sisa = items[masuk:]
+        if sisa:
+            with self._lock:
+                self.sync_writes += 1
+            self._write(sisa, retries=0)
+        return masuk
+
+    def _run(self):
+        stop = False
+        while not stop:
+            item = self._queue.get()
+            if item is _STOP:
+                self._queue.task_done()
+                break
+
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    self._queue.task_done()
+                    stop = True
+                    break
+                batch.append(item)
+
+            self._write(batch)
+            for _ in batch:
+                self._queue.task_done()
+
+    def _write(self, batch: List, retries: int = None):
+        retries = self.max_retries if retries is None else retries
+        for percobaan in range(retries + 1):
+            try:
+                self.writer(batch)
+                with self._lock:
+                    self.written += len(batch)
+                    self.batches += 1
+                return
+            except Exception as e:
+                with self._lock:
+                    self.failed += 1
+                    self._last_error = str(e)
+                logger.exception("Write-behind error (%d baris, percobaan %d)", len(batch), percobaan + 1)
+                if percobaan < retries and not self._closed:
+                    time.sleep(self.retry_delay)
+                else:
+                    break
+
+        with self._lock:
+            self.dropped += len(batch)
+
+    def flush(self, timeout: float = None) -> bool:
+        """Tunggu sampai semua baris di antrean selesai ditulis"""
+        if timeout is None:
+            self._queue.join()
+            return True
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def close(self, timeout: float = 30.0):
+        """Hentikan thread latar setelah semua baris di antrean ditulis"""
+        with self._put_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def stats(self) -> Dict:
+        """Metrik antrean untuk monitoring"""
+        with self._lock:
+            return {
+                'queued': self._queue.qsize(),
+                'max_queue': self._queue.maxsize,
+                'enqueued': self.enqueued,
+                'written': self.written,
+                'batches': self.batches,
+                'sync_writes': self.sync_writes,
+                'failed': self.failed,
+                'dropped': self.dropped,
+                'last_error': self._last_error
+            }
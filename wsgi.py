@@ -0,0 +1,8 @@
+"""Entry point WSGI untuk produksi
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+    waitress-serve --threads=16 wsgi:app
+"""
+from app import start_app
+
+app = start_app()
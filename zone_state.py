@@ -0,0 +1,106 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+# Zona yang dipakai jika request tidak menyebutkan zona
+DEFAULT_ZONE = 'default'
+
+class InMemoryZoneState:
+    """State hasil fuzzy terbaru per zona di dalam satu proses (dict dengan lock striping)
+
+    Nilai yang disimpan tidak pernah diubah di tempat (set selalu mengganti
+    dict), sehingga pembaca mendapat snapshot yang konsisten tanpa menyalin.
+    """
+
+    def __init__(self, stripes: int = 16):
+        self._stripes = [(threading.Lock(), {}) for _ in range(stripes)]
+
+    def _stripe(self, zone: str):
+        return self._stripes[hash(zone) % len(self._stripes)]
+
+    def get(self, zone: str = DEFAULT_ZONE) -> Optional[Dict]:
+        lock, data = self._stripe(zone)
+        with lock:
+            return data.get(zone)
+
+    def set(self, zone: str, state: Dict):
+        lock, data = self._stripe(zone)
+        with lock:
+            data[zone] = dict(state)
+
+    def clear(self, zone: str = DEFAULT_ZONE):
+        lock, data = self._stripe(zone)
+        with lock:
+            data.pop(zone, None)
+
+    def all(self) -> Dict[str, Dict]:
+        hasil = {}
+        for lock, data in self._stripes:
+            with lock:
+                hasil.update(data)
+        return hasil
+
+class SQLiteZoneState:
+    """State per zona di file SQLite (WAL) yang dapat dibaca semua worker proses
+
+    Setiap thread memakai koneksi sendiri; baca dan tulis adalah lookup
+    primary key. Cocok untuk beberapa worker gunicorn di satu mesin.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        direktori = os.path.dirname(os.path.abspath(path))
+        os.makedirs(direktori, exist_ok=True)
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS zone_state (
+                zone TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        connection.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def get(self, zone: str = DEFAULT_ZONE) -> Optional[Dict]:
+        row = self._connection().execute(
+            "SELECT data FROM zone_state WHERE zone = ?", (zone,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, zone: str, state: Dict):
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO zone_state (zone, data, updated_at) VALUES (?, ?, ?)",
+                (zone, json.dumps(state), time.time())
+            )
+
+    def clear(self, zone: str = DEFAULT_ZONE):
+        connection = self._connection()
+        with connection:
+            connection.execute("DELETE FROM zone_state WHERE zone = ?", (zone,))
+
+    def all(self) -> Dict[str, Dict]:
+        rows = self._connection().execute("SELECT zone, data FROM zone_state").fetchall()
+        return {zone: json.loads(data) for zone, data in rows}
+
+def create_zone_state(url: str = 'memory'):
+    """Buat state store dari URL konfigurasi: 'memory' atau 'sqlite:///path/ke/file.db'"""
+    if url in ('', 'memory'):
+        return InMemoryZoneState()
+    if url.startswith('sqlite:///'):
+        return SQLiteZoneState(url[len('sqlite:///'):])
+    raise ValueError(f"ZONE_STATE_URL tidak dikenali: {url}")